@@ -0,0 +1,2 @@
+# app/__init__.py
+"""Heart Disease Prediction API package."""
@@ -0,0 +1,105 @@
+# app/admission.py
+"""Admission control and load shedding for the threaded Flask server.
+
+The werkzeug server starts a thread per connection and would otherwise
+queue work without bound, so a burst past capacity slows every request
+until clients time out on work the server still finishes.
+``AdmissionController`` caps requests in flight at ``limit``, lets up to
+``max_queue`` more wait at most ``queue_timeout_ms`` for a slot, and
+rejects the rest at once so they can be retried elsewhere.
+
+With ``target_ms`` set, the limit adapts to observed latency (AIMD): after
+every ``window`` completed requests, a p90 latency above the target cuts
+the limit by ``backoff``, while a window that ran at the limit and stayed
+under the target raises it by about ``sqrt(limit)``.  The limit stays
+within ``[min_limit, max_limit]``.
+"""
+import math
+import threading
+import time
+
+
+class AdmissionController:
+    """Bound concurrent and queued requests; adapt the bound to latency."""
+
+    def __init__(self, max_in_flight=32, max_queue=64, queue_timeout_ms=250.0,
+                 target_ms=None, min_limit=1, max_limit=None, window=100,
+                 backoff=0.9):
+        self.limit = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout_ms / 1000.0
+        self.target_ms = target_ms
+        self.min_limit = min_limit
+        self.max_limit = max_limit or max_in_flight * 4
+        self.window = window
+        self.backoff = backoff
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._samples = []
+        self._saturated = False
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """Admit a request; return False if it should be rejected."""
+        with self._cond:
+            if self.in_flight >= self.limit:
+                if self.queued >= self.max_queue:
+                    self.rejected += 1
+                    return False
+                self.queued += 1
+                deadline = time.monotonic() + self.queue_timeout
+                try:
+                    while self.in_flight >= self.limit:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.timed_out += 1
+                            self.rejected += 1
+                            return False
+                        self._cond.wait(remaining)
+                finally:
+                    self.queued -= 1
+            self.in_flight += 1
+            self.admitted += 1
+            if self.in_flight >= self.limit:
+                self._saturated = True
+            return True
+
+    def release(self, latency_s=None):
+        """Mark an admitted request finished after ``latency_s`` seconds."""
+        with self._cond:
+            self.in_flight -= 1
+            if self.target_ms and latency_s is not None:
+                self._samples.append(latency_s * 1000.0)
+                if len(self._samples) >= self.window:
+                    self._adapt()
+            self._cond.notify()
+
+    def _adapt(self):
+        samples = sorted(self._samples)
+        p90 = samples[int(0.9 * (len(samples) - 1))]
+        if p90 > self.target_ms:
+            self.limit = max(self.min_limit, int(self.limit * self.backoff))
+        elif self._saturated:
+            self.limit = min(self.max_limit,
+                             self.limit + max(1, int(math.sqrt(self.limit))))
+            # A raised limit can admit queued requests straight away
+            self._cond.notify_all()
+        self._samples = []
+        self._saturated = False
+
+    def stats(self):
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "in_flight": self.in_flight,
+                "queued": self.queued,
+                "max_queue": self.max_queue,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+                "adaptive": bool(self.target_ms),
+                "target_ms": self.target_ms,
+            }
@@ -1,13 +1,99 @@
 # app/app.py
-from flask import Flask, request, jsonify
-import joblib
-import json
-import os
-import pandas as pd
+import time
+
+STARTED_AT = time.perf_counter()
+
+from flask import Flask, Response, g, request, jsonify  # noqa: E402
+from flask import send_file, stream_with_context  # noqa: E402
+import hmac  # noqa: E402
+import json  # noqa: E402
+import os  # noqa: E402
+import sys  # noqa: E402
+import tempfile  # noqa: E402
+import threading  # noqa: E402
+import numpy as np  # noqa: E402
+
+if __package__ in (None, ""):
+    # Started as ``python app/app.py``: make the ``app`` package importable
+    sys.path.insert(0, os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__))))
+
+from app import metrics, profiling, wire  # noqa: E402
+from app.admission import AdmissionController  # noqa: E402
+from app.batcher import BatcherClosed, MicroBatcher  # noqa: E402
+from app.cache import PredictionCache  # noqa: E402
+from app.loader import StartupTimeline  # noqa: E402
+from app.metrics import StageTimer  # noqa: E402
+from app.loader import first_inference, load_bundle, warm_up  # noqa: E402
+from app.model_store import ModelStore, ModelWatcher  # noqa: E402
+from app.registry import ModelLoadError, ModelRegistry  # noqa: E402
 
 app = Flask(__name__)
 MODEL_PATH = os.path.join("model", "model.pkl")
 META_PATH = os.path.join("model", "metadata.json")
+ARTIFACT_PATH = os.environ.get("MODEL_ARTIFACT_DIR",
+                               os.path.join("model", "artifact"))
+# Check artifact block checksums on load (reads every page once)
+ARTIFACT_VERIFY = os.environ.get("ARTIFACT_VERIFY", "1") == "1"
+# Load the model on a background thread so the port binds immediately;
+# the sklearn pickle is then loaded after the server is already ready.
+FAST_START = os.environ.get("FAST_START", "0") == "1"
+MAX_BATCH_ROWS = int(os.environ.get("MAX_BATCH_ROWS", "100000"))
+# /predict/stream scores this many NDJSON lines per vectorised pass
+STREAM_CHUNK_ROWS = int(os.environ.get("STREAM_CHUNK_ROWS", "1000"))
+STREAM_MAX_LINE_BYTES = int(os.environ.get("STREAM_MAX_LINE_BYTES", "65536"))
+# The compiled forest wins on small batches; sklearn's Cython traversal is
+# faster past a few hundred rows, and both give identical float64 results.
+COMPILED_FOREST_MAX_ROWS = int(
+    os.environ.get("COMPILED_FOREST_MAX_ROWS", "256"))
+FOREST_DTYPE = os.environ.get("FOREST_DTYPE", "float64")
+# Coalesce concurrent /predict calls into one forest pass (off by default)
+MICRO_BATCH = os.environ.get("MICRO_BATCH", "0") == "1"
+MICRO_BATCH_MAX_SIZE = int(os.environ.get("MICRO_BATCH_MAX_SIZE", "32"))
+MICRO_BATCH_MAX_WAIT_MS = float(
+    os.environ.get("MICRO_BATCH_MAX_WAIT_MS", "1.0"))
+# LRU cache of /predict results; PREDICTION_CACHE_SIZE=0 disables it
+PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", "10000"))
+PREDICTION_CACHE_MB = float(os.environ.get("PREDICTION_CACHE_MB", "32"))
+# Poll the model files every N seconds and hot-reload on change (0 = off)
+MODEL_WATCH_INTERVAL = float(os.environ.get("MODEL_WATCH_INTERVAL", "5"))
+# Previous model versions kept in memory for instant rollback
+MODEL_HISTORY = int(os.environ.get("MODEL_HISTORY", "2"))
+# Required in the X-Admin-Token header of /admin calls and forced
+# profiling; while unset the admin endpoints are disabled
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+# Admission control for the /predict endpoints (0 in-flight = off): excess
+# requests wait up to ADMISSION_QUEUE_TIMEOUT_MS in a bounded queue, then
+# get 503; ADMISSION_TARGET_MS > 0 adapts the in-flight limit to latency
+ADMISSION_MAX_IN_FLIGHT = int(os.environ.get("ADMISSION_MAX_IN_FLIGHT", "32"))
+ADMISSION_MAX_QUEUE = int(os.environ.get("ADMISSION_MAX_QUEUE", "64"))
+ADMISSION_QUEUE_TIMEOUT_MS = float(
+    os.environ.get("ADMISSION_QUEUE_TIMEOUT_MS", "250"))
+ADMISSION_TARGET_MS = float(os.environ.get("ADMISSION_TARGET_MS", "250"))
+ADMISSION_MIN_LIMIT = int(os.environ.get("ADMISSION_MIN_LIMIT", "2"))
+# Synthetic predictions run on every new model before /ready succeeds; the
+# p95 of their single-row latency must be within READY_LATENCY_BUDGET_MS
+WARMUP_ROUNDS = int(os.environ.get("WARMUP_ROUNDS", "200"))
+READY_LATENCY_BUDGET_MS = float(
+    os.environ.get("READY_LATENCY_BUDGET_MS", "25"))
+# cProfile requests sent with "X-Profile: 1" (subject to ADMIN_TOKEN) and
+# this fraction of all others; the newest PROFILE_KEEP are kept on disk
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = os.environ.get(
+    "PROFILE_DIR", os.path.join(tempfile.gettempdir(), "heart-profiles"))
+PROFILE_KEEP = int(os.environ.get("PROFILE_KEEP", "50"))
+# Requests slower than this many ms go to the slow-request log
+SLOW_REQUEST_MS = float(os.environ.get("SLOW_REQUEST_MS", "250"))
+SLOW_REQUEST_LOG_SIZE = int(os.environ.get("SLOW_REQUEST_LOG_SIZE", "100"))
+# Named models, one directory each laid out like model/, served on
+# /models/<name>/predict... or with an X-Model header; they load on first
+# use and the least recently used are unloaded past MODEL_REGISTRY_MAX_MB
+MODEL_REGISTRY_DIR = os.environ.get("MODEL_REGISTRY_DIR", "models")
+MODEL_REGISTRY_MAX_MB = float(os.environ.get("MODEL_REGISTRY_MAX_MB", "512"))
+MODEL_HEADER = "X-Model"
+
+timeline = StartupTimeline(origin=STARTED_AT)
+timeline.record("imports", STARTED_AT, time.perf_counter())
 
 # Add debugging
 print(f"Current working directory: {os.getcwd()}")
@@ -16,39 +102,774 @@ print(f"Metadata path: {META_PATH}")
 print(f"Model file exists: {os.path.exists(MODEL_PATH)}")
 print(f"Metadata file exists: {os.path.exists(META_PATH)}")
 
-try:
-    model = joblib.load(MODEL_PATH)
-    with open(META_PATH, "r") as f:
-        metadata = json.load(f)
-    feature_names = metadata["feature_names"]
+# Mirrors of the active model, updated on every swap
+metadata = None
+feature_names = None
+model_version = None
+load_error = None
+loader_thread = None
+watcher = None
+_watcher_pid = None
+rewarm_thread = None
+
+
+def _on_swap(new):
+    """Point module state, cache and batcher at a newly activated model."""
+    global metadata, feature_names, model_version
+    if MICRO_BATCH and getattr(new, "batcher", None) is None:
+        new.batcher = MicroBatcher(new.score,
+                                   max_batch_size=MICRO_BATCH_MAX_SIZE,
+                                   max_wait_ms=MICRO_BATCH_MAX_WAIT_MS)
+    metadata, feature_names = new.metadata, new.feature_names
+    model_version = new.version
+    if cache is not None:
+        cache.set_model_version(model_version)
+    metrics.model_loaded(new.version, getattr(new, "load_ms", 0.0) / 1000.0)
+
+
+def _on_retire(old):
+    """Stop the micro-batcher of a bundle no longer active or kept."""
+    batcher, old.batcher = getattr(old, "batcher", None), None
+    if batcher is not None:
+        batcher.close()
+
+
+def _load_candidate():
+    """Load and warm the model files on disk as a complete bundle."""
+    bundle = load_bundle(MODEL_PATH, META_PATH, ARTIFACT_PATH,
+                         forest_dtype=FOREST_DTYPE, verify=ARTIFACT_VERIFY,
+                         compiled_max_rows=COMPILED_FOREST_MAX_ROWS,
+                         timeline=StartupTimeline())
+    bundle.warmup = warm_up(bundle, WARMUP_ROUNDS)
+    return bundle
+
+
+store = ModelStore(_load_candidate, history=MODEL_HISTORY, on_swap=_on_swap,
+                   on_retire=_on_retire)
+
+
+def _load_registered(model_path, meta_path, artifact_path):
+    """Load a registry model, scoring once so its first request is warm.
+
+    The pickle is skipped when the artifact is valid: the compiled forest
+    then scores every batch size, and the model costs only its arrays.
+    """
+    bundle = load_bundle(model_path, meta_path, artifact_path,
+                         forest_dtype=FOREST_DTYPE, verify=ARTIFACT_VERIFY,
+                         compiled_max_rows=COMPILED_FOREST_MAX_ROWS,
+                         defer_pickle=True, timeline=StartupTimeline())
+    first_inference(bundle)
+    return bundle
+
+
+registry = ModelRegistry(
+    MODEL_REGISTRY_DIR, _load_registered,
+    max_bytes=int(MODEL_REGISTRY_MAX_MB * 1024 * 1024),
+    on_load=lambda name, bundle: metrics.model_loaded(
+        bundle.version, bundle.load_ms / 1000.0))
+
+
+def load_model(defer_pickle=False):
+    """Load, warm and activate the model, recording the startup timeline."""
+    started = time.perf_counter()
+    new = load_bundle(MODEL_PATH, META_PATH, ARTIFACT_PATH,
+                      forest_dtype=FOREST_DTYPE, verify=ARTIFACT_VERIFY,
+                      compiled_max_rows=COMPILED_FOREST_MAX_ROWS,
+                      defer_pickle=defer_pickle, timeline=timeline)
+    first_inference(new, timeline)
+    new.load_ms = (time.perf_counter() - started) * 1000.0
+    store.activate(new)
+    timeline.mark("ready")
     print(f"Model loaded successfully. Features: {len(feature_names)}")
-except Exception as e:
-    print(f"Error loading model: {e}")
-    raise
+    print(f"Startup timeline: {timeline.summary()}")
+    if new.pipeline is None:
+        # Off the critical path: only needed for large batches
+        new.load_pipeline(MODEL_PATH, timeline)
+    new.warmup = warm_up(new, WARMUP_ROUNDS, timeline=timeline)
+    print(f"Warm-up: p50 {new.warmup['p50_ms']:.2f} ms, "
+          f"p95 {new.warmup['p95_ms']:.2f} ms over {WARMUP_ROUNDS} rounds")
+
+
+def start_watcher():
+    """Start the model file watcher in this process (idempotent).
+
+    Threads do not survive fork(), so pre-fork workers call this again.
+    """
+    global watcher, _watcher_pid
+    if MODEL_WATCH_INTERVAL <= 0 or _watcher_pid == os.getpid():
+        return
+    _watcher_pid = os.getpid()
+    watcher = ModelWatcher(store, [MODEL_PATH, META_PATH],
+                           interval=MODEL_WATCH_INTERVAL).start()
+
+
+def _load_in_background():
+    global load_error
+    try:
+        load_model(defer_pickle=True)
+    except Exception as e:
+        load_error = str(e)
+        print(f"Error loading model: {e}")
+
+
+def wait_for_loader(timeout=None):
+    """Block until background loading (if any) has finished."""
+    if loader_thread is not None:
+        loader_thread.join(timeout)
+
+
+def encode(records):
+    """Turn request records into the classifier's input matrix."""
+    return store.active.encode(records)
+
+
+def score(X):
+    """Return (predicted classes, class probabilities) for encoded rows."""
+    return store.active.score(X)
+
+
+if MICRO_BATCH:
+    print(f"Micro-batching enabled: max {MICRO_BATCH_MAX_SIZE} rows, "
+          f"{MICRO_BATCH_MAX_WAIT_MS} ms wait")
+
+admission = None
+if ADMISSION_MAX_IN_FLIGHT > 0:
+    admission = AdmissionController(
+        max_in_flight=ADMISSION_MAX_IN_FLIGHT,
+        max_queue=ADMISSION_MAX_QUEUE,
+        queue_timeout_ms=ADMISSION_QUEUE_TIMEOUT_MS,
+        target_ms=ADMISSION_TARGET_MS or None,
+        min_limit=ADMISSION_MIN_LIMIT)
+# Only scoring is admission-controlled; health checks, metrics and admin
+# calls always get through
+ADMITTED_ENDPOINTS = {"/predict", "/predict/batch", "/predict/stream",
+                      "/models/<name>/predict", "/models/<name>/predict/batch",
+                      "/models/<name>/predict/stream"}
+# Only single-row latencies steer the adaptive limit: batch times scale
+# with their row count and stream times include the client's upload, so
+# either would drag the limit down and shed fast /predict traffic
+LATENCY_SAMPLED_ENDPOINTS = {"/predict", "/models/<name>/predict"}
+OVERLOAD_HEADERS = {"Retry-After": "1"}
+
+profiles = profiling.ProfileStore(PROFILE_DIR, PROFILE_KEEP,
+                                  PROFILE_SAMPLE_RATE)
+slow_log = profiling.SlowRequestLog(SLOW_REQUEST_MS, SLOW_REQUEST_LOG_SIZE)
+
+cache = None
+if PREDICTION_CACHE_SIZE > 0:
+    cache = PredictionCache(
+        max_entries=PREDICTION_CACHE_SIZE,
+        max_bytes=int(PREDICTION_CACHE_MB * 1024 * 1024))
+
+if FAST_START:
+    loader_thread = threading.Thread(target=_load_in_background,
+                                     daemon=True, name="model-loader")
+    loader_thread.start()
+else:
+    try:
+        load_model()
+    except Exception as e:
+        print(f"Error loading model: {e}")
+        raise
+# A pre-fork master must not hold threads across fork(); its workers start
+# the watcher themselves
+if os.environ.get("PREFORK_MASTER") != "1":
+    start_watcher()
+
+
+def predict_row(current, x):
+    """Score one encoded row, via the micro-batcher when enabled."""
+    batcher = getattr(current, "batcher", None)
+    if batcher is not None:
+        try:
+            return batcher.predict(x)
+        except BatcherClosed:
+            pass  # the bundle was retired mid-request; score it directly
+    preds, proba = current.score(x[np.newaxis, :])
+    return preds[0], proba[0]
+
+
+ROOT_MESSAGE = "Heart Disease Prediction API running"
+LOADING_MESSAGE = "Heart Disease Prediction API loading model"
+# Extra headers for responses sent while the model is still loading
+LOADING_HEADERS = {"Retry-After": "1"}
+
+
+def loading_response():
+    """(payload, status) returned while no model is active yet."""
+    if load_error is not None:
+        return {"error": f"Model failed to load: {load_error}"}, 503
+    return {"error": "Model is loading"}, 503
+
+
+def resolve_model(name=None):
+    """``(bundle, None)`` for model ``name``, or ``(None, (payload,
+    status))`` when it cannot serve.
+
+    No name means the active model; named models come from the registry
+    and are loaded on first use.
+    """
+    if name is None:
+        current = store.active
+        return (current, None) if current is not None \
+            else (None, loading_response())
+    try:
+        return registry.get(name), None
+    except LookupError as e:
+        return None, ({"error": str(e)}, 404)
+    except ModelLoadError as e:
+        return None, ({"error": str(e)}, 503)
+
+
+def _rewarm(bundle):
+    bundle.warmup = warm_up(bundle, WARMUP_ROUNDS)
+
+
+def readiness():
+    """(payload, status) for /ready.
+
+    Ready once the active model has been warmed up and the p95 of its
+    warm-up predictions is within READY_LATENCY_BUDGET_MS.  An over-budget
+    model is re-measured in the background, so a pod slowed by start-up
+    contention becomes ready once it settles.
+    """
+    global rewarm_thread
+    current = store.active
+    report = getattr(current, "warmup", None)
+    payload = {"ready": False, "budget_ms": READY_LATENCY_BUDGET_MS,
+               "model_version": getattr(current, "version", None),
+               "warmup": report}
+    if current is None:
+        payload["reason"] = loading_response()[0]["error"]
+    elif report is None:
+        payload["reason"] = "Model is warming up"
+    elif report["p95_ms"] > READY_LATENCY_BUDGET_MS:
+        payload["reason"] = (f"Warm-up p95 {report['p95_ms']:.2f} ms is over "
+                             f"the {READY_LATENCY_BUDGET_MS} ms budget")
+        if rewarm_thread is None or not rewarm_thread.is_alive():
+            rewarm_thread = threading.Thread(
+                target=_rewarm, args=(current,), daemon=True,
+                name="model-rewarm")
+            rewarm_thread.start()
+    else:
+        payload["ready"] = True
+        return payload, 200
+    return payload, 503
+
+
+def _endpoint_label():
+    # The URL rule, not the raw path, keeps label cardinality bounded
+    return request.url_rule.rule if request.url_rule else "unmatched"
+
+
+def log_if_slow(seconds, stages, **details):
+    """Add a request to the slow-request log if it exceeded the limit."""
+    entry = slow_log.observe(
+        seconds, stages_ms={k: round(v * 1000.0, 3)
+                            for k, v in stages.items()}, **details)
+    if entry is not None:
+        print(f"Slow request: {json.dumps(entry)}")
+
+
+@app.before_request
+def _start_request():
+    g.metrics_started = metrics.request_started(_endpoint_label())
+    g.stage_timer = StageTimer()
+    g.profiler = None
+    if admission is not None and _endpoint_label() in ADMITTED_ENDPOINTS:
+        if not admission.acquire():
+            return jsonify({"error": "Server overloaded"}), 503, \
+                OVERLOAD_HEADERS
+        g.admitted = time.perf_counter()
+        g.latency_sampled = _endpoint_label() in LATENCY_SAMPLED_ENDPOINTS
+    forced = request.headers.get("X-Profile") == "1" and \
+        _admin_denied() is None
+    g.profiler = profiles.start() if profiles.wanted(forced) else None
+
+
+def _finish_profile():
+    """Save the request's profile, if any; return its id."""
+    profiler, g.profiler = g.get("profiler"), None
+    if profiler is None:
+        return None
+    return profiles.finish(profiler, f"{request.method} {request.full_path}")
+
+
+@app.after_request
+def _finish_request(response):
+    timer = g.get("stage_timer")
+    if timer is not None and timer.stages:
+        timer.lap("serialize")
+    stages = timer.stages if timer is not None else {}
+    elapsed = time.perf_counter() - g.metrics_started
+    response.headers["Server-Timing"] = profiling.server_timing(stages,
+                                                                elapsed)
+    profile_id = _finish_profile()
+    if profile_id is not None:
+        response.headers["X-Profile-Id"] = profile_id
+    log_if_slow(elapsed, stages, method=request.method, path=request.path,
+                status=response.status_code, profile_id=profile_id,
+                request_bytes=request.content_length,
+                payload=g.get("payload_shape") or None)
+    # Sizing a streamed response would buffer the whole generator
+    response_bytes = None if response.is_streamed \
+        else response.calculate_content_length()
+    metrics.request_finished(
+        _endpoint_label(), request.method, response.status_code,
+        g.metrics_started, request.content_length, response_bytes,
+        timer.stages if timer is not None else None)
+    g.metrics_done = True
+    return response
+
+
+@app.teardown_request
+def _abort_request(exc):
+    _finish_profile()
+    if "admitted" in g:
+        latency = time.perf_counter() - g.pop("admitted")
+        admission.release(latency if g.get("latency_sampled") else None)
+    if "metrics_started" in g and not g.get("metrics_done"):
+        metrics.request_finished(_endpoint_label(), request.method, 500,
+                                 g.metrics_started, request.content_length,
+                                 None)
 
 
 @app.route("/")
 def root():
-    return "Heart Disease Prediction API running"
+    if store.active is None:
+        return LOADING_MESSAGE, 503, LOADING_HEADERS
+    return ROOT_MESSAGE
 
 
-@app.route("/predict", methods=["POST"])
-def predict():
-    data = request.json
+def predict_one(data, timer=None, current=None):
+    """Score one request body; return (response payload, status code).
+
+    ``timer`` (a StageTimer) is charged the validate/encode/score stages;
+    ``current`` is the bundle to score with (default: the active model).
+    """
+    timer = timer or StageTimer()
+    current = current or store.active
+    if current is None:
+        return loading_response()
+    names = current.feature_names
     # Expect dict with all feature names
-    if not all(feat in data for feat in feature_names):
-        error_msg = f"Missing features. Expected: {feature_names}"
-        return jsonify({"error": error_msg}), 400
+    if not isinstance(data, dict) or not all(feat in data for feat in names):
+        error_msg = f"Missing features. Expected: {names}"
+        return {"error": error_msg}, 400
+    # Same per-feature checks as /predict/batch rows
+    error = current.validate_record(data)
+    if error is not None:
+        return {"error": error}, 400
+    timer.lap("validate")
 
-    X = pd.DataFrame([data], columns=feature_names)
-    pred = model.predict(X)[0]
-    proba = model.predict_proba(X)[0].tolist()
+    try:
+        X = current.encode([data])
+    except (TypeError, ValueError) as e:
+        return {"error": str(e)}, 400
+    x = X[0]
+    timer.lap("encode")
+    # The cache only holds results of the active version
+    if cache is not None:
+        pred, proba = cache.get_or_compute(
+            x, lambda: predict_row(current, x), current.version)
+    else:
+        pred, proba = predict_row(current, x)
+    timer.lap("score")
 
-    return jsonify({
+    return {
         "prediction": int(pred),
-        "probabilities": proba
+        "probabilities": proba.tolist(),
+        "model_version": current.version
+    }, 200
+
+
+def predict_many(data, timer=None, current=None):
+    """Score a batch request body; return (response payload, status code)."""
+    timer = timer or StageTimer()
+    current = current or store.active
+    if current is None:
+        return loading_response()
+    # Accept either a bare list of records or {"records": [...]}
+    records = data.get("records") if isinstance(data, dict) else data
+    if not isinstance(records, list) or not records:
+        return {"error": "Expected a non-empty list of records"}, 400
+    if len(records) > MAX_BATCH_ROWS:
+        error_msg = f"Batch too large: {len(records)} > {MAX_BATCH_ROWS} rows"
+        return {"error": error_msg}, 413
+
+    results = [None] * len(records)
+    valid_idx = []
+    for i, record in enumerate(records):
+        error = current.validate_record(record)
+        if error is None:
+            valid_idx.append(i)
+        else:
+            results[i] = {"error": error}
+    timer.lap("validate")
+
+    if valid_idx:
+        X = current.encode([records[i] for i in valid_idx])
+        timer.lap("encode")
+        preds, proba = current.score(X)
+        timer.lap("score")
+        for i, pred, row in zip(valid_idx, preds.tolist(), proba.tolist()):
+            results[i] = {"prediction": int(pred), "probabilities": row}
+
+    return {
+        "results": results,
+        "n_success": len(valid_idx),
+        "n_errors": len(records) - len(valid_idx),
+        "model_version": current.version
+    }, 200
+
+
+def predict_columns(columns, timer=None, current=None):
+    """Score a column-oriented batch ``{feature: values}``.
+
+    Returns ``(ColumnarResult or error payload, status code)``; rows are
+    validated, encoded and scored as arrays without per-row dicts.
+    """
+    timer = timer or StageTimer()
+    current = current or store.active
+    if current is None:
+        return loading_response()
+    try:
+        n, errors = current.validate_columns(columns)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    if n == 0:
+        return {"error": "Expected a non-empty list of records"}, 400
+    if n > MAX_BATCH_ROWS:
+        error_msg = f"Batch too large: {n} > {MAX_BATCH_ROWS} rows"
+        return {"error": error_msg}, 413
+    valid = np.ones(n, dtype=bool)
+    valid[list(errors)] = False
+    timer.lap("validate")
+
+    classes = current.classes
+    predictions = np.zeros(n, dtype=classes.dtype)
+    probabilities = np.zeros((n, len(classes)))
+    if errors:
+        rows = np.flatnonzero(valid)
+        X = current.encode_columns(columns, rows) if len(rows) else None
+    else:
+        rows, X = slice(None), current.encode_columns(columns)
+    timer.lap("encode")
+    if X is not None:
+        predictions[rows], probabilities[rows] = current.score(X)
+    timer.lap("score")
+    return wire.ColumnarResult(classes, predictions, probabilities, valid,
+                               errors, current.version), 200
+
+
+def handle_prediction(batch, body, content_type, accept, timer=None,
+                      shape=None, model=None):
+    """Decode, score and encode one ``/predict`` or ``/predict/batch`` call.
+
+    The request format follows ``content_type`` and the response format
+    ``accept`` (see ``app.wire``).  ``model`` names a registry model to
+    score with instead of the active one.  Returns ``(body bytes, status,
+    media type)``; ``shape``, if given, is filled with a summary of the
+    payload.
+    """
+    timer = timer or StageTimer()
+    current = None
+    try:
+        media_in = wire.request_format(content_type)
+        media_out = wire.response_format(accept, media_in)
+        data = wire.decode(body, media_in)
+        if shape is not None:
+            shape.update(profiling.payload_shape(data, media_in))
+        if media_in in wire.COLUMNAR and not batch:
+            data = wire.single_record(data)
+    except wire.WireError as e:
+        payload, status, media_out = {"error": str(e)}, e.status, wire.JSON
+    else:
+        timer.lap("parse")
+        current, error = resolve_model(model)
+        if model is not None:
+            # Only a cold registry model takes measurable time here
+            timer.lap("load")
+        if error is not None:
+            payload, status = error
+        elif not batch:
+            payload, status = predict_one(data, timer, current)
+        elif media_in in wire.COLUMNAR:
+            payload, status = predict_columns(data, timer, current)
+        else:
+            payload, status = predict_many(data, timer, current)
+    classes = current.classes.tolist() if current is not None else []
+    body, media_out = wire.encode(payload, media_out, classes)
+    timer.lap("serialize")
+    return body, status, media_out
+
+
+def score_lines(current, lines, first_index):
+    """Score a chunk of NDJSON lines; return (NDJSON bytes, n_success).
+
+    ``None`` in ``lines`` marks a line that exceeded the length limit.
+    Output lines carry the input line index and keep input order.
+    """
+    results = [None] * len(lines)
+    records, valid_idx = [], []
+    for offset, line in enumerate(lines):
+        if line is None:
+            results[offset] = {"error": "Line too long"}
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            results[offset] = {"error": "Invalid JSON"}
+            continue
+        error = current.validate_record(record)
+        if error is None:
+            records.append(record)
+            valid_idx.append(offset)
+        else:
+            results[offset] = {"error": error}
+
+    n_success = 0
+    if records:
+        try:
+            scored = [(valid_idx, current.score(current.encode(records)))]
+        except Exception as e:
+            # The response is already under way: rather than cut it short,
+            # score the chunk row by row and fail only the rows that raise
+            print(f"Scoring stream lines from {first_index} failed: {e}")
+            scored = []
+            for offset, record in zip(valid_idx, records):
+                try:
+                    scored.append(([offset], current.score(
+                        current.encode([record]))))
+                except Exception as e:
+                    results[offset] = {"error": f"Prediction failed: {e}"}
+        for offsets, (preds, proba) in scored:
+            for offset, pred, row in zip(offsets, preds.tolist(),
+                                         proba.tolist()):
+                results[offset] = {"prediction": int(pred),
+                                   "probabilities": row}
+            n_success += len(offsets)
+
+    out = "".join(json.dumps(dict(index=first_index + offset, **result))
+                  + "\n" for offset, result in enumerate(results))
+    return out.encode(), n_success
+
+
+def stream_summary(current, n_lines, n_success):
+    """Final NDJSON line of a /predict/stream response."""
+    return (json.dumps({"summary": {
+        "n_success": n_success,
+        "n_errors": n_lines - n_success,
+        "model_version": current.version
+    }}) + "\n").encode()
+
+
+def _read_lines(stream, max_bytes):
+    """Yield non-blank lines from a binary stream, ``None`` if too long."""
+    while True:
+        line = stream.readline(max_bytes + 1)
+        if not line:
+            return
+        if len(line) > max_bytes and not line.endswith(b"\n"):
+            # Discard the rest of the oversized line
+            while line and not line.endswith(b"\n"):
+                line = stream.readline(max_bytes + 1)
+            yield None
+        elif line.strip():
+            yield line
+
+
+def _json_response(body, status):
+    headers = LOADING_HEADERS if status == 503 else {}
+    return jsonify(body), status, headers
+
+
+def _wire_response(batch, name=None):
+    """Negotiated response for a /predict or /predict/batch request."""
+    g.stage_timer.skip()
+    g.payload_shape = {}
+    body, status, media = handle_prediction(
+        batch, request.get_data(), request.content_type,
+        request.headers.get("Accept"), g.stage_timer, g.payload_shape,
+        name or request.headers.get(MODEL_HEADER))
+    headers = LOADING_HEADERS if status == 503 else {}
+    return Response(body, status, headers, content_type=media)
+
+
+@app.route("/ready")
+def ready():
+    payload, status = readiness()
+    return _json_response(payload, status)
+
+
+@app.route("/predict", methods=["POST"])
+@app.route("/models/<name>/predict", methods=["POST"])
+def predict(name=None):
+    return _wire_response(batch=False, name=name)
+
+
+@app.route("/predict/batch", methods=["POST"])
+@app.route("/models/<name>/predict/batch", methods=["POST"])
+def predict_batch(name=None):
+    return _wire_response(batch=True, name=name)
+
+
+@app.route("/predict/stream", methods=["POST"])
+@app.route("/models/<name>/predict/stream", methods=["POST"])
+def predict_stream(name=None):
+    current, error = resolve_model(name or request.headers.get(MODEL_HEADER))
+    if error is not None:
+        return _json_response(*error)
+    stream = request.stream
+
+    def generate():
+        chunk, n_lines, n_success = [], 0, 0
+        for line in _read_lines(stream, STREAM_MAX_LINE_BYTES):
+            chunk.append(line)
+            if len(chunk) >= STREAM_CHUNK_ROWS:
+                out, ok = score_lines(current, chunk, n_lines)
+                n_lines, n_success = n_lines + len(chunk), n_success + ok
+                chunk = []
+                yield out
+        if chunk:
+            out, ok = score_lines(current, chunk, n_lines)
+            n_lines, n_success = n_lines + len(chunk), n_success + ok
+            yield out
+        yield stream_summary(current, n_lines, n_success)
+
+    return Response(stream_with_context(generate()),
+                    mimetype="application/x-ndjson")
+
+
+@app.route("/metrics")
+def prometheus_metrics():
+    body, content_type = metrics.render()
+    return Response(body, content_type=content_type)
+
+
+@app.route("/startup")
+def startup():
+    return jsonify({
+        "fast_start": FAST_START,
+        "ready": store.active is not None,
+        "error": load_error,
+        "phases": timeline.as_list()
     })
 
 
+def _admin_denied():
+    """Error response unless the request carries the admin token."""
+    if not ADMIN_TOKEN:
+        return jsonify({"error": "Admin endpoints are disabled"}), 404
+    token = request.headers.get("X-Admin-Token", "")
+    if not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        return jsonify({"error": "Forbidden"}), 403
+    return None
+
+
+@app.route("/admin/models")
+def admin_models():
+    denied = _admin_denied()
+    if denied:
+        return denied
+    return jsonify(store.versions())
+
+
+@app.route("/admin/reload", methods=["POST"])
+def admin_reload():
+    denied = _admin_denied()
+    if denied:
+        return denied
+    try:
+        version = store.reload()
+    except Exception as e:
+        return jsonify({"error": f"Reload failed: {e}",
+                        "model_version": model_version}), 409
+    return jsonify({"model_version": version})
+
+
+@app.route("/admin/rollback", methods=["POST"])
+def admin_rollback():
+    denied = _admin_denied()
+    if denied:
+        return denied
+    version = (request.get_json(silent=True) or {}).get("version")
+    try:
+        version = store.rollback(version)
+    except LookupError as e:
+        return jsonify({"error": str(e)}), 404
+    return jsonify({"model_version": version})
+
+
+@app.route("/admin/profiles")
+def admin_profiles():
+    denied = _admin_denied()
+    if denied:
+        return denied
+    return jsonify({"sample_rate": profiles.sample_rate,
+                    "profiles": profiles.list()})
+
+
+PROFILE_SORT_KEYS = ("cumulative", "tottime", "calls", "ncalls")
+
+
+@app.route("/admin/profiles/<profile_id>")
+def admin_profile(profile_id):
+    """A saved profile: pstats file, or a text report with ?format=text."""
+    denied = _admin_denied()
+    if denied:
+        return denied
+    sort = request.args.get("sort", "cumulative")
+    if sort not in PROFILE_SORT_KEYS:
+        return jsonify({"error": f"sort must be one of "
+                                 f"{PROFILE_SORT_KEYS}"}), 400
+    try:
+        if request.args.get("format") == "text":
+            report = profiles.report(profile_id, sort=sort)
+            return Response(report, mimetype="text/plain")
+        return send_file(profiles.path(profile_id),
+                         mimetype="application/octet-stream",
+                         as_attachment=True)
+    except LookupError as e:
+        return jsonify({"error": str(e)}), 404
+
+
+@app.route("/admin/slow-requests")
+def admin_slow_requests():
+    denied = _admin_denied()
+    if denied:
+        return denied
+    return jsonify({"threshold_ms": slow_log.threshold_ms,
+                    "pid": os.getpid(),
+                    "requests": slow_log.entries()})
+
+
+@app.route("/stats/batcher")
+def batcher_stats():
+    batcher = getattr(store.active, "batcher", None)
+    if batcher is None:
+        return jsonify({"enabled": False})
+    return jsonify(dict(batcher.stats(), enabled=True))
+
+
+@app.route("/stats/admission")
+def admission_stats():
+    if admission is None:
+        return jsonify({"enabled": False})
+    return jsonify(dict(admission.stats(), enabled=True))
+
+
+@app.route("/stats/models")
+def model_stats():
+    return jsonify(registry.stats())
+
+
+@app.route("/stats/cache")
+def cache_stats():
+    if cache is None:
+        return jsonify({"enabled": False})
+    return jsonify(dict(cache.stats(), enabled=True))
+
+
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000)
+    app.run(host="0.0.0.0", port=int(os.environ.get("PORT", "5000")))
@@ -0,0 +1,188 @@
+# app/artifact.py
+"""Compact, memory-mappable model artifact.
+
+``export_artifact`` compiles a fitted pipeline into the arrays used by
+``CompiledEncoder`` and ``CompiledForest`` and writes each one as an
+aligned ``.npy`` block, plus a ``manifest.json`` holding the encoder's
+category tables, the classes, per-file SHA-256 checksums and the digest of
+the ``model.pkl`` it was built from.  ``load_artifact`` maps the blocks
+read-only, so start-up does no unpickling and processes on one host share a
+single page-cache copy of the forest.
+
+Export from the current pickle without retraining:
+    python -m app.artifact --model model/model.pkl --out model/artifact
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+
+if __package__ in (None, ""):
+    # Started as ``python app/artifact.py``: make ``app`` importable
+    sys.path.insert(0, os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__))))
+
+from app.encoder import CompiledEncoder  # noqa: E402
+from app.forest import CompiledForest  # noqa: E402
+
+# 2: adds missing_left, the side NaN features take at each node
+FORMAT_VERSION = 2
+MANIFEST = "manifest.json"
+ARTIFACT_DIR = os.path.join("model", "artifact")
+
+
+class ArtifactError(Exception):
+    """Raised when an artifact is missing, corrupt or stale."""
+
+
+def sha256_file(path):
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def export_artifact(pipeline, out_dir=ARTIFACT_DIR, model_digest=None):
+    """Write the compiled form of ``pipeline`` to ``out_dir``.
+
+    Returns the manifest dict.  ``model_digest`` identifies the pickle the
+    artifact was built from so stale artifacts can be detected.
+    """
+    encoder = CompiledEncoder.from_preprocessor(
+        pipeline.named_steps["preprocessor"])
+    forest = CompiledForest.from_estimator(pipeline.steps[-1][1])
+    arrays = {
+        "num_columns": encoder.num_columns.astype(np.int32),
+        "mean": encoder.mean,
+        "scale": encoder.scale,
+        "feature": forest.feature,
+        "threshold": forest.threshold,
+        "children": forest.children,
+        "value": forest.value,
+        "roots": forest.roots,
+        "missing_left": forest.missing_left,
+    }
+
+    os.makedirs(out_dir, exist_ok=True)
+    files = {}
+    for name, array in arrays.items():
+        path = os.path.join(out_dir, f"{name}.npy")
+        # np.save pads the header so the data block is 64-byte aligned
+        np.save(path, np.ascontiguousarray(array))
+        files[name] = {
+            "dtype": str(array.dtype),
+            "shape": list(array.shape),
+            "sha256": sha256_file(path),
+        }
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "model_digest": model_digest,
+        "encoder": {
+            "n_outputs": encoder.n_outputs,
+            "cat_features": encoder.cat_features,
+            "cat_tables": [
+                {str(k): int(v) for k, v in table.items()}
+                for table in encoder.cat_tables
+            ],
+            "num_features": encoder.num_features,
+            "ignore_unknown": encoder.ignore_unknown,
+        },
+        "forest": {
+            "max_depth": forest.max_depth,
+            "classes": forest.classes_.tolist(),
+        },
+        "files": files,
+    }
+    # Write the manifest last so a half-written artifact is never valid
+    tmp = os.path.join(out_dir, MANIFEST + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, os.path.join(out_dir, MANIFEST))
+    return manifest
+
+
+def load_artifact(path=ARTIFACT_DIR, verify=True, model_digest=None):
+    """Memory-map an artifact; return ``(encoder, forest, manifest)``.
+
+    With ``verify`` every block's checksum is checked first.  If
+    ``model_digest`` is given, an artifact built from another pickle is
+    rejected.  Raises ``ArtifactError`` on any mismatch.
+    """
+    manifest_path = os.path.join(path, MANIFEST)
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ArtifactError(f"Cannot read {manifest_path}: {e}")
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ArtifactError(
+            f"Unsupported artifact format {manifest.get('format_version')}")
+    if model_digest is not None and \
+            manifest.get("model_digest") != model_digest:
+        raise ArtifactError("Artifact was built from a different model.pkl")
+
+    arrays = {}
+    for name, info in manifest["files"].items():
+        file_path = os.path.join(path, f"{name}.npy")
+        if verify and sha256_file(file_path) != info["sha256"]:
+            raise ArtifactError(f"Checksum mismatch for {file_path}")
+        array = np.load(file_path, mmap_mode="r")
+        if str(array.dtype) != info["dtype"] or \
+                list(array.shape) != info["shape"]:
+            raise ArtifactError(f"Unexpected dtype/shape in {file_path}")
+        arrays[name] = array
+
+    enc = manifest["encoder"]
+    encoder = CompiledEncoder(
+        enc["n_outputs"], enc["cat_features"], enc["cat_tables"],
+        enc["num_features"], arrays["num_columns"], arrays["mean"],
+        arrays["scale"], enc["ignore_unknown"])
+    forest = CompiledForest(
+        arrays["feature"], arrays["threshold"], arrays["children"],
+        arrays["value"], arrays["roots"], manifest["forest"]["max_depth"],
+        manifest["forest"]["classes"], arrays["missing_left"])
+    return encoder, forest, manifest
+
+
+def check_parity(pipeline, path, X):
+    """Compare artifact and pickle probabilities on DataFrame ``X``.
+
+    Returns the maximum absolute difference; raises ``ArtifactError`` if
+    the predicted classes differ.
+    """
+    encoder, forest, _ = load_artifact(path)
+    expected = pipeline.predict_proba(X)
+    actual = forest.predict_proba(
+        encoder.transform(X.to_dict(orient="records")))
+    if not np.array_equal(expected.argmax(axis=1), actual.argmax(axis=1)):
+        raise ArtifactError("Artifact predictions differ from the pickle")
+    return float(np.abs(expected - actual).max())
+
+
+def main(args):
+    import joblib
+    pipeline = joblib.load(args.model)
+    export_artifact(pipeline, args.out, sha256_file(args.model))
+    print(f"Exported artifact to {args.out}")
+    if args.data:
+        import pandas as pd
+        X = pd.read_csv(args.data)
+        X = X[[c for c in X.columns if c != args.target]]
+        print(f"Max |proba diff| vs pickle: "
+              f"{check_parity(pipeline, args.out, X):.3g}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=os.path.join("model", "model.pkl"))
+    parser.add_argument("--out", default=ARTIFACT_DIR)
+    parser.add_argument("--data", default=os.path.join("datasets",
+                                                       "data.csv"),
+                        help="CSV to run the parity check on ('' to skip)")
+    parser.add_argument("--target", default="HeartDisease")
+    main(parser.parse_args())
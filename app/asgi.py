@@ -0,0 +1,305 @@
+# app/asgi.py
+"""asyncio-native (ASGI) serving mode for the prediction API.
+
+Serves the same ``/``, ``/ready``, ``/predict`` and ``/predict/batch``
+contract as the Flask app, including its wire formats and registry models
+(``/models/<name>/...`` or the ``X-Model`` header), reusing its model,
+encoder, cache and scoring functions.  Request bodies are read on the event
+loop, so slow or idle keep-alive clients cost only a coroutine; decoding and
+inference run on a bounded thread pool.
+
+Run with ``python -m app.asgi`` (requires ``uvicorn``) or any ASGI server:
+``uvicorn app.asgi:application``.
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+if __package__ in (None, ""):
+    # Started as ``python app/asgi.py``: make the ``app`` package importable
+    sys.path.insert(0, os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__))))
+
+import app.app as api  # noqa: E402
+from app import metrics, profiling, wire  # noqa: E402
+from app.metrics import StageTimer  # noqa: E402
+
+# Threads doing CPU-bound parsing and inference
+INFERENCE_THREADS = int(os.environ.get("ASGI_INFERENCE_THREADS",
+                                       str(min(4, os.cpu_count() or 1))))
+# Requests allowed to wait for an inference thread before being rejected
+MAX_PENDING = int(os.environ.get("ASGI_MAX_PENDING", "1024"))
+MAX_BODY_BYTES = int(os.environ.get("ASGI_MAX_BODY_BYTES",
+                                    str(16 * 1024 * 1024)))
+
+# Prediction routes and whether each takes a batch
+ROUTES = {
+    "/predict": False,
+    "/predict/batch": True,
+}
+MODEL_PREFIX = "/models/"
+
+
+def split_model(path):
+    """``(route, model name or None, metrics label)`` for a request path.
+
+    ``/models/<name>/predict...`` maps to the plain route and ``name``;
+    the label keeps the placeholder so metrics stay bounded.
+    """
+    if path.startswith(MODEL_PREFIX):
+        name, sep, rest = path[len(MODEL_PREFIX):].partition("/")
+        if name and sep:
+            return "/" + rest, name, MODEL_PREFIX + "<name>/" + rest
+    return path, None, path
+
+
+class PredictionASGI:
+    """ASGI application delegating inference to a bounded executor."""
+
+    def __init__(self, threads=INFERENCE_THREADS, max_pending=MAX_PENDING,
+                 max_body_bytes=MAX_BODY_BYTES):
+        self.threads = threads
+        self.max_pending = max_pending
+        self.max_body_bytes = max_body_bytes
+        self._executor = None
+        self._slots = None
+
+    def _ensure_started(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.threads, thread_name_prefix="inference")
+            self._slots = asyncio.Semaphore(self.threads + self.max_pending)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        self._ensure_started()
+        # Prediction routes report their stages; everything else the total
+        send = _timed(send, time.perf_counter())
+        path, model, label = split_model(scope["path"])
+        method = scope["method"]
+        model = model or _header(scope, api.MODEL_HEADER.lower().encode())
+
+        if label != path and path not in ROUTES and \
+                path != "/predict/stream":
+            await _respond(send, 404, {"error": "Not Found"})
+            return
+        if path == "/metrics":
+            body, content_type = metrics.render()
+            await _send(send, 200, body, content_type.encode())
+            return
+        if path == "/":
+            if method not in ("GET", "HEAD"):
+                await _respond(send, 405, {"error": "Method Not Allowed"})
+                return
+            if api.store.active is None:
+                await _respond_text(send, 503, api.LOADING_MESSAGE)
+            else:
+                await _respond_text(send, 200, api.ROOT_MESSAGE)
+            return
+        if path == "/ready":
+            payload, status = api.readiness()
+            await _respond(send, status, payload)
+            return
+        if path == "/predict/stream":
+            if method != "POST":
+                await _respond(send, 405, {"error": "Method Not Allowed"})
+            else:
+                await self._stream(receive, send, model)
+            return
+        batch = ROUTES.get(path)
+        if batch is None:
+            await _respond(send, 404, {"error": "Not Found"})
+            return
+        if method != "POST":
+            await _respond(send, 405, {"error": "Method Not Allowed"})
+            return
+
+        started = metrics.request_started(label)
+        timer = StageTimer()
+        status, body, payload = 500, None, b""
+        media, shape = wire.JSON, {}
+        try:
+            body = await _read_body(receive, self.max_body_bytes)
+            if body is None:
+                status, payload = 413, {"error": "Request body too large"}
+            elif self._slots.locked():
+                status, payload = 503, {"error": "Server overloaded"}
+            else:
+                async with self._slots:
+                    loop = asyncio.get_running_loop()
+                    payload, status, media = await loop.run_in_executor(
+                        self._executor, api.handle_prediction, batch, body,
+                        _header(scope, b"content-type"),
+                        _header(scope, b"accept"), timer, shape, model)
+            timing = profiling.server_timing(
+                timer.stages, time.perf_counter() - started)
+            payload = await _respond(send, status, payload, media,
+                                     [(b"server-timing", timing.encode())])
+        finally:
+            api.log_if_slow(
+                time.perf_counter() - started, timer.stages, method=method,
+                path=scope["path"], status=status,
+                request_bytes=len(body) if body is not None else None,
+                payload=shape or None)
+            metrics.request_finished(
+                label, method, status, started,
+                len(body) if body is not None else None,
+                len(payload) if isinstance(payload, bytes) else None,
+                timer.stages)
+
+    async def _stream(self, receive, send, model=None):
+        """Score an NDJSON upload chunk by chunk as it arrives."""
+        loop = asyncio.get_running_loop()
+        # Loading a cold registry model must not block the event loop
+        current, error = await loop.run_in_executor(
+            self._executor, api.resolve_model, model)
+        if error is not None:
+            payload, status = error
+            await _respond(send, status, payload)
+            return
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"application/x-ndjson")],
+        })
+        max_line = api.STREAM_MAX_LINE_BYTES
+        buffer, chunk = b"", []
+        n_lines = n_success = 0
+        discarding, more = False, True
+        while more:
+            message = await receive()
+            buffer += message.get("body", b"")
+            more = message.get("more_body", False)
+            lines = buffer.split(b"\n")
+            buffer = lines.pop()
+            if not more and buffer:
+                lines.append(buffer)
+                buffer = b""
+            for line in lines:
+                if discarding:
+                    # Tail of an oversized line
+                    discarding = False
+                elif len(line) > max_line:
+                    chunk.append(None)
+                elif line.strip():
+                    chunk.append(line)
+            if len(buffer) > max_line and not discarding:
+                chunk.append(None)
+                discarding = True
+            if discarding:
+                buffer = b""
+            while len(chunk) >= api.STREAM_CHUNK_ROWS or \
+                    (chunk and not more):
+                part = chunk[:api.STREAM_CHUNK_ROWS]
+                del chunk[:api.STREAM_CHUNK_ROWS]
+                out, ok = await loop.run_in_executor(
+                    self._executor, api.score_lines, current, part, n_lines)
+                n_lines, n_success = n_lines + len(part), n_success + ok
+                await send({"type": "http.response.body", "body": out,
+                            "more_body": True})
+        await send({
+            "type": "http.response.body",
+            "body": api.stream_summary(current, n_lines, n_success),
+        })
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self._ensure_started()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self._executor is not None:
+                    self._executor.shutdown(wait=True)
+                    self._executor = None
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+def _header(scope, name):
+    for key, value in scope.get("headers", ()):
+        if key.lower() == name:
+            return value.decode("latin-1")
+    return None
+
+
+async def _read_body(receive, limit):
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > limit:
+            return None
+        chunks.append(chunk)
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+def _timed(send, started):
+    """Wrap ``send`` so every response carries a ``Server-Timing`` header."""
+    async def timed_send(message):
+        if message["type"] == "http.response.start":
+            headers = list(message.get("headers", ()))
+            if not any(key == b"server-timing" for key, _ in headers):
+                timing = profiling.server_timing(
+                    {}, time.perf_counter() - started)
+                headers.append((b"server-timing", timing.encode()))
+                message = dict(message, headers=headers)
+        await send(message)
+    return timed_send
+
+
+async def _respond(send, status, payload, media=wire.JSON, headers=()):
+    """Send a response (JSON unless encoded already); return the body."""
+    if not isinstance(payload, bytes):
+        payload = json.dumps(payload).encode()
+    await _send(send, status, payload, media.encode(), headers)
+    return payload
+
+
+async def _respond_text(send, status, text):
+    await _send(send, status, text.encode(), b"text/html; charset=utf-8")
+
+
+async def _send(send, status, body, content_type, extra_headers=()):
+    headers = [
+        (b"content-type", content_type),
+        (b"content-length", str(len(body)).encode()),
+    ]
+    headers.extend(extra_headers)
+    if status == 503:
+        headers.extend((k.lower().encode(), v.encode())
+                       for k, v in api.LOADING_HEADERS.items())
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": headers,
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+application = PredictionASGI()
+
+
+def main():
+    try:
+        import uvicorn
+    except ImportError:
+        sys.exit("The ASGI serving mode needs uvicorn: pip install uvicorn")
+    uvicorn.run(application, host="0.0.0.0",
+                port=int(os.environ.get("PORT", "5000")),
+                backlog=int(os.environ.get("ASGI_BACKLOG", "2048")),
+                timeout_keep_alive=int(os.environ.get("ASGI_KEEPALIVE", "75")),
+                log_level=os.environ.get("ASGI_LOG_LEVEL", "warning"))
+
+
+if __name__ == "__main__":
+    main()
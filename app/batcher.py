@@ -0,0 +1,155 @@
+# app/batcher.py
+"""Dynamic micro-batching of concurrent single-row predictions.
+
+Request threads hand their encoded row to a ``MicroBatcher`` and block.  A
+single worker thread drains the queue into batches of at most
+``max_batch_size`` rows, waiting no longer than ``max_wait_ms`` after the
+first row arrives, scores the batch with one vectorised call and hands each
+caller its own row of the result.
+"""
+import bisect
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+# Upper bounds (ms) of the queueing-delay histogram buckets
+DELAY_BUCKETS_MS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 50.0, 100.0)
+
+
+class BatcherClosed(RuntimeError):
+    """Raised by ``submit`` once the batcher has been closed."""
+
+
+class MicroBatcher:
+    """Coalesce concurrent ``score`` calls into vectorised batches.
+
+    ``score_fn`` takes an ``(n, n_features)`` array and returns a tuple of
+    per-row arrays, e.g. ``(predictions, probabilities)``.
+    """
+
+    def __init__(self, score_fn, max_batch_size=32, max_wait_ms=1.0):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.score_fn = score_fn
+        self.max_batch_size = int(max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self._closed = False
+        self._start_lock = threading.Lock()
+        # Orders submits against close() so no row lands after the sentinel
+        self._submit_lock = threading.Lock()
+        self._start()
+
+    def _start(self):
+        # Threads do not survive fork(), so a forked server worker starts
+        # its own queue and worker thread on first use.
+        self._pid = os.getpid()
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._batch_sizes = {}
+        self._delay_counts = [0] * (len(DELAY_BUCKETS_MS) + 1)
+        self._delay_sum_ms = 0.0
+        self._requests = 0
+        self._worker = threading.Thread(target=self._run, daemon=True,
+                                        name="micro-batcher")
+        self._worker.start()
+
+    def submit(self, row):
+        """Queue one encoded row; return a Future of its result tuple."""
+        if self._pid != os.getpid():
+            with self._start_lock:
+                if self._pid != os.getpid():
+                    self._start()
+        future = Future()
+        with self._submit_lock:
+            if self._closed:
+                raise BatcherClosed("MicroBatcher is closed")
+            self._queue.put((np.asarray(row), future, time.perf_counter()))
+        return future
+
+    def predict(self, row, timeout=None):
+        """Score one row through the batcher and wait for its result."""
+        return self.submit(row).result(timeout)
+
+    def close(self):
+        """Stop the worker once already-queued rows have been scored."""
+        with self._submit_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._worker.join()
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    item = self._queue.get(timeout=remaining)
+                else:
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # Re-post the sentinel so the loop exits after this batch
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            started = time.perf_counter()
+            futures = [future for _, future, _ in batch]
+            try:
+                X = np.vstack([row for row, _, _ in batch])
+                outputs = self.score_fn(X)
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+            else:
+                for i, future in enumerate(futures):
+                    future.set_result(tuple(out[i] for out in outputs))
+            self._record(len(batch),
+                         [started - queued for _, _, queued in batch])
+
+    def _record(self, size, delays):
+        with self._lock:
+            self._batch_sizes[size] = self._batch_sizes.get(size, 0) + 1
+            self._requests += size
+            for delay in delays:
+                delay_ms = delay * 1000.0
+                self._delay_sum_ms += delay_ms
+                idx = bisect.bisect_left(DELAY_BUCKETS_MS, delay_ms)
+                self._delay_counts[idx] += 1
+
+    def stats(self):
+        """Snapshot of batch-size and queueing-delay distributions."""
+        with self._lock:
+            batches = sum(self._batch_sizes.values())
+            bounds = [str(b) for b in DELAY_BUCKETS_MS] + ["+Inf"]
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "requests": self._requests,
+                "batches": batches,
+                "mean_batch_size": (self._requests / batches
+                                    if batches else 0.0),
+                "batch_sizes": dict(sorted(self._batch_sizes.items())),
+                "queue_delay_ms": {
+                    "buckets": dict(zip(bounds, self._delay_counts)),
+                    "mean": (self._delay_sum_ms / self._requests
+                             if self._requests else 0.0),
+                },
+            }
@@ -0,0 +1,133 @@
+# app/cache.py
+"""In-process LRU cache for single-row predictions.
+
+Entries are keyed on the model version plus the encoded feature row, so
+payloads that differ only in formatting (``65`` vs ``65.0``, key order)
+share an entry.  The cache is bounded by entry count and approximate bytes,
+collapses identical in-flight requests into one computation and drops every
+entry when the model version changes.
+"""
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+
+# Rough per-entry bookkeeping cost (dict slot, tuples, array headers)
+ENTRY_OVERHEAD_BYTES = 256
+
+
+class PredictionCache:
+    """Thread-safe, version-aware LRU cache with request coalescing."""
+
+    def __init__(self, max_entries=10000, max_bytes=32 * 1024 * 1024,
+                 model_version=None):
+        self.max_entries = int(max_entries)
+        self.max_bytes = int(max_bytes)
+        self.model_version = model_version
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(row):
+        """Canonical key for an encoded feature row."""
+        return np.ascontiguousarray(row, dtype=np.float64).tobytes()
+
+    def set_model_version(self, version):
+        """Switch to a new model version, clearing entries if it changed."""
+        with self._lock:
+            if version != self.model_version:
+                self.model_version = version
+                self._clear_locked()
+
+    def clear(self):
+        with self._lock:
+            self._clear_locked()
+
+    def _clear_locked(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def get_or_compute(self, row, compute, version=None):
+        """Return the cached result for ``row`` or ``compute()`` it once.
+
+        ``version`` is the model version ``compute`` scores with (default:
+        the cache's); for any other version the cache is bypassed, so a
+        result is never stored or served under a version it did not come
+        from.  Concurrent callers asking for the same row while it is
+        being computed wait for that computation instead of repeating it.
+        """
+        key = self.make_key(row)
+        with self._lock:
+            if version is None:
+                version = self.model_version
+            if version != self.model_version:
+                pending = future = None
+            else:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                pending = self._inflight.get((version, key))
+                if pending is None:
+                    self.misses += 1
+                    future = self._inflight[(version, key)] = Future()
+                else:
+                    self.coalesced += 1
+        if pending is not None:
+            return pending.result()
+        if future is None:
+            return compute()
+
+        try:
+            value = compute()
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop((version, key), None)
+        with self._lock:
+            # A result computed by a model that has since been replaced
+            # must not be served for the new version.
+            if version == self.model_version and key not in self._entries:
+                self._store_locked(key, value)
+        future.set_result(value)
+        return value
+
+    def _store_locked(self, key, value):
+        size = len(key) + ENTRY_OVERHEAD_BYTES + sum(
+            getattr(part, "nbytes", 8) for part in value)
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+        self._entries[key] = (value, size)
+        self._bytes += size
+        while (len(self._entries) > self.max_entries
+               or self._bytes > self.max_bytes):
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "model_version": self.model_version,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "hit_rate": ((self.hits + self.coalesced) / lookups
+                             if lookups else 0.0),
+            }
@@ -0,0 +1,134 @@
+# app/encoder.py
+"""Pandas-free feature encoder compiled from a fitted ColumnTransformer.
+
+The encoder reproduces ``preprocessor.transform`` for the OneHotEncoder /
+StandardScaler layout produced by ``train.py`` using plain dict lookups and
+NumPy vector arithmetic, so a single request dict can be turned into a model
+row without building a DataFrame or dispatching through sklearn.
+"""
+import numpy as np
+
+
+class CompiledEncoder:
+    """Encode request dicts into the preprocessor's output layout."""
+
+    def __init__(self, n_outputs, cat_features, cat_tables, num_features,
+                 num_columns, mean, scale, ignore_unknown=True):
+        self.n_outputs = int(n_outputs)
+        # cat_tables[i] maps a category of cat_features[i] to its column
+        self.cat_features = list(cat_features)
+        self.cat_tables = [dict(table) for table in cat_tables]
+        self.num_features = list(num_features)
+        self.num_columns = np.asarray(num_columns, dtype=np.intp)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.ignore_unknown = ignore_unknown
+
+    @classmethod
+    def from_preprocessor(cls, preprocessor):
+        """Build an encoder from a fitted ColumnTransformer.
+
+        Raises ``TypeError`` if the transformer uses steps or options the
+        compiled encoder cannot reproduce exactly.
+        """
+        # Imported here so serving from a compiled artifact needs no sklearn
+        from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+        if getattr(preprocessor, "sparse_output_", False):
+            raise TypeError("Sparse ColumnTransformer output is not supported")
+
+        n_outputs = 0
+        cat_features, cat_tables = [], []
+        num_features, num_columns, mean, scale = [], [], [], []
+        ignore_unknown = True
+        for name, trans, cols in preprocessor.transformers_:
+            if trans == "drop" or len(cols) == 0:
+                continue
+            out = preprocessor.output_indices_[name]
+            n_outputs = max(n_outputs, out.stop)
+            if isinstance(trans, OneHotEncoder):
+                if trans.drop_idx_ is not None or trans._infrequent_enabled:
+                    raise TypeError("OneHotEncoder drop/infrequent categories "
+                                    "are not supported")
+                ignore_unknown = trans.handle_unknown != "error"
+                col = out.start
+                for feat, categories in zip(cols, trans.categories_):
+                    table = {}
+                    for category in categories:
+                        table[category] = col
+                        col += 1
+                    cat_features.append(feat)
+                    cat_tables.append(table)
+            elif isinstance(trans, StandardScaler):
+                n = len(cols)
+                num_features.extend(cols)
+                num_columns.extend(range(out.start, out.start + n))
+                mean.extend(trans.mean_ if trans.with_mean else np.zeros(n))
+                scale.extend(trans.scale_ if trans.with_std else np.ones(n))
+            else:
+                raise TypeError(f"Unsupported transformer '{name}': {trans!r}")
+
+        return cls(n_outputs, cat_features, cat_tables, num_features,
+                   num_columns, mean, scale, ignore_unknown)
+
+    def _category_column(self, i, value):
+        col = self.cat_tables[i].get(value)
+        if col is None and not self.ignore_unknown:
+            raise ValueError(f"Unknown category {value!r} for feature "
+                             f"'{self.cat_features[i]}'")
+        return col
+
+    def transform_one(self, record, out=None):
+        """Encode a single record into a ``(1, n_outputs)`` float64 row.
+
+        ``out`` may be a preallocated row of that shape to write into.
+        Raises ``KeyError`` for missing features and ``ValueError`` for
+        non-numeric values or unknown categories.
+        """
+        if out is None:
+            out = np.zeros((1, self.n_outputs))
+        else:
+            out.fill(0.0)
+        row = out[0]
+        for i, feat in enumerate(self.cat_features):
+            col = self._category_column(i, record[feat])
+            if col is not None:
+                row[col] = 1.0
+        values = np.array([float(record[feat]) for feat in self.num_features])
+        row[self.num_columns] = (values - self.mean) / self.scale
+        return out
+
+    def transform(self, records):
+        """Encode a list of records into an ``(n, n_outputs)`` matrix."""
+        return self.transform_columns({
+            feat: [r[feat] for r in records]
+            for feat in self.cat_features + self.num_features})
+
+    def transform_columns(self, columns):
+        """Encode ``{feature: values}`` columns into an ``(n, n_outputs)``
+        matrix.
+
+        Values may be lists or NumPy arrays.  Categories are mapped with
+        one dict lookup per value (much cheaper than sorting string arrays)
+        and numeric columns are converted as whole arrays, so no per-row
+        dicts are built.
+        """
+        features = self.cat_features + self.num_features
+        n = len(columns[features[0]]) if features else 0
+        out = np.zeros((n, self.n_outputs))
+        for i, feat in enumerate(self.cat_features):
+            values = columns[feat]
+            get = self.cat_tables[i].get
+            cols = np.fromiter((get(v, -1) for v in values), dtype=np.intp,
+                               count=n)
+            unknown = cols < 0
+            if not self.ignore_unknown and unknown.any():
+                self._category_column(i, values[int(unknown.argmax())])
+            known = np.flatnonzero(~unknown)
+            out[known, cols[known]] = 1.0
+        if self.num_features:
+            values = np.empty((n, len(self.num_features)))
+            for j, feat in enumerate(self.num_features):
+                values[:, j] = np.asarray(columns[feat], dtype=np.float64)
+            out[:, self.num_columns] = (values - self.mean) / self.scale
+        return out
@@ -0,0 +1,174 @@
+# app/forest.py
+"""Array-backed inference engine for fitted RandomForestClassifier models.
+
+All trees are flattened into contiguous node arrays (split feature,
+threshold, interleaved children, normalised leaf class distributions and
+the side a missing value takes).  A
+batch is evaluated for every tree at once by stepping all (tree, row)
+cursors one level per iteration, which replaces sklearn's per-estimator
+Python dispatch with a fixed number of vectorised NumPy gathers.
+"""
+import numpy as np
+
+# Rows evaluated per traversal pass; bounds the (n_trees, rows) work arrays
+CHUNK_ROWS = 256
+
+
+class CompiledForest:
+    """Vectorised drop-in for ``RandomForestClassifier.predict_proba``.
+
+    The node arrays are used as given (no dtype conversion or copy), so they
+    may be read-only memory maps shared between processes.
+    """
+
+    def __init__(self, feature, threshold, children, value, roots,
+                 max_depth, classes, missing_left=None):
+        self.feature = np.asarray(feature)
+        # float32 thresholds, rounded down (see _round_thresholds)
+        self.threshold = np.asarray(threshold)
+        # children[2 * node + go_left] picks the next node in one gather;
+        # leaves point back at themselves.
+        self.children = np.asarray(children)
+        self.value = np.asarray(value)
+        self.roots = np.asarray(roots)
+        self.max_depth = int(max_depth)
+        self.classes_ = np.asarray(classes)
+        self.dtype = self.value.dtype
+        n_nodes = len(self.value)
+        # NaN fails every ``x <= t`` test; nodes flagged here send it left,
+        # as sklearn's tree_.missing_go_to_left does
+        self.missing_left = (np.zeros(n_nodes, dtype=bool)
+                             if missing_left is None
+                             else np.asarray(missing_left))
+        self.is_leaf = self.children[1::2] == np.arange(n_nodes)
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    @classmethod
+    def from_estimator(cls, forest, dtype=np.float64):
+        """Flatten a fitted single-output forest classifier.
+
+        ``dtype`` is the precision of the leaf distributions and of the
+        accumulated probabilities.  Raises ``TypeError`` for estimators the
+        engine cannot reproduce.
+        """
+        if getattr(forest, "n_outputs_", 1) != 1:
+            raise TypeError("Multi-output forests are not supported")
+        if not hasattr(forest, "estimators_"):
+            raise TypeError(f"Not a fitted forest: {forest!r}")
+
+        n_classes = len(forest.classes_)
+        features, thresholds, lefts, rights, values, roots = \
+            [], [], [], [], [], []
+        missing = []
+        offset = 0
+        max_depth = 0
+        for est in forest.estimators_:
+            tree = est.tree_
+            n = tree.node_count
+            ids = np.arange(offset, offset + n)
+            is_leaf = tree.children_left < 0
+            # Leaves loop back to themselves so a fixed number of steps
+            # leaves every cursor parked on its leaf.
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            # Absent before scikit-learn 1.3, which rejected NaN input
+            missing.append(np.asarray(
+                getattr(tree, "missing_go_to_left", np.zeros(n)),
+                dtype=bool) & ~is_leaf)
+            lefts.append(np.where(is_leaf, ids, tree.children_left + offset))
+            rights.append(np.where(is_leaf, ids,
+                                   tree.children_right + offset))
+            # Same normalisation as DecisionTreeClassifier.predict_proba
+            proba = tree.value[:, 0, :n_classes].copy()
+            normalizer = proba.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            proba /= normalizer
+            values.append(proba)
+            roots.append(offset)
+            max_depth = max(max_depth, tree.max_depth)
+            offset += n
+
+        # 2 * node + 1 must still fit the index dtype
+        index_dtype = np.int32 if offset < 2 ** 30 else np.int64
+        children = np.empty(2 * offset, dtype=index_dtype)
+        children[0::2] = np.concatenate(rights)
+        children[1::2] = np.concatenate(lefts)
+        n_features = getattr(forest, "n_features_in_", 0)
+        feature_dtype = np.int16 if n_features < 2 ** 15 else np.int32
+        return cls(np.concatenate(features).astype(feature_dtype),
+                   _round_thresholds(np.concatenate(thresholds)),
+                   children,
+                   np.concatenate(values).astype(dtype),
+                   np.asarray(roots, dtype=index_dtype), max_depth,
+                   forest.classes_, np.concatenate(missing))
+
+    def apply(self, X):
+        """Return the leaf index reached in each tree, shape (n_trees, n)."""
+        # Trees split on float32 features, exactly as sklearn casts them
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows, n_features = X.shape
+        flat_x = X.ravel()
+        node = np.repeat(self.roots, n_rows)
+        # Offset of each cursor's row in the flattened X
+        row_base = np.tile(np.arange(n_rows) * n_features, self.n_estimators)
+        leaves = np.empty_like(node)
+        active = np.arange(node.size)
+        has_nan = np.isnan(X).any()
+        for _ in range(self.max_depth):
+            x = flat_x[row_base + self.feature[node]]
+            go_left = x <= self.threshold[node]
+            if has_nan:
+                go_left |= np.isnan(x) & self.missing_left[node]
+            node = self.children[2 * node + go_left]
+            # Retire cursors that reached a leaf so later levels only
+            # touch the trees that are still descending.
+            done = self.is_leaf[node]
+            if done.any():
+                leaves[active[done]] = node[done]
+                keep = ~done
+                node, row_base, active = node[keep], row_base[keep], \
+                    active[keep]
+                if not node.size:
+                    break
+        leaves[active] = node
+        return leaves.reshape(self.n_estimators, n_rows)
+
+    def predict_proba(self, X):
+        """Mean class distribution over all trees, like sklearn's forest."""
+        X = np.asarray(X)
+        if X.ndim != 2:
+            raise ValueError(f"Expected a 2D array, got shape {X.shape}")
+        out = np.zeros((X.shape[0], len(self.classes_)), dtype=self.dtype)
+        for start in range(0, X.shape[0], CHUNK_ROWS):
+            stop = start + CHUNK_ROWS
+            leaves = self.apply(X[start:stop])
+            acc = out[start:stop]
+            # Accumulate tree by tree to match sklearn's summation order
+            for tree_leaves in leaves:
+                acc += self.value[tree_leaves]
+        out /= self.n_estimators
+        return out
+
+    def predict(self, X):
+        """Class with the highest mean probability for each row."""
+        proba = self.predict_proba(X)
+        return self.classes_.take(proba.argmax(axis=1))
+
+
+def _round_thresholds(threshold):
+    """Cast thresholds to float32 so ``x <= t`` is unchanged for float32 x.
+
+    Rounding a float64 threshold to float32 to nearest can land exactly on
+    the float32 feature value just above the split, flipping its branch.
+    Rounding down to the largest float32 not above ``t`` keeps every float32
+    comparison identical to the float64 one, so the narrow thresholds are
+    lossless for the float32 features sklearn's trees split on.
+    """
+    threshold = np.asarray(threshold, dtype=np.float64)
+    cast = threshold.astype(np.float32)
+    over = cast.astype(np.float64) > threshold
+    cast[over] = np.nextafter(cast[over], np.float32(-np.inf))
+    return cast
@@ -0,0 +1,366 @@
+# app/loader.py
+"""Model loading for the prediction API.
+
+``load_bundle`` gathers everything needed to serve one model version (the
+metadata, the compiled encoder and forest, and optionally the sklearn
+pipeline) into a ``ModelBundle``, recording how long each phase takes in a
+``StartupTimeline``.  Heavy imports (joblib, sklearn, pandas) only happen on
+the paths that need them, so a bundle served from the memory-mapped
+artifact starts without them.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from app.artifact import ArtifactError, load_artifact, sha256_file
+
+
+class StartupTimeline:
+    """Named, timed start-up phases relative to a common origin."""
+
+    def __init__(self, origin=None):
+        self.origin = time.perf_counter() if origin is None else origin
+        self.phases = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter())
+
+    def record(self, name, start, end):
+        with self._lock:
+            self.phases.append({
+                "phase": name,
+                "start_ms": round((start - self.origin) * 1000.0, 3),
+                "duration_ms": round((end - start) * 1000.0, 3),
+            })
+
+    def mark(self, name):
+        """Record an instantaneous event, e.g. readiness."""
+        now = time.perf_counter()
+        self.record(name, now, now)
+
+    def as_list(self):
+        with self._lock:
+            return list(self.phases)
+
+    def summary(self):
+        return ", ".join(f"{p['phase']} {p['duration_ms']:.1f} ms"
+                         for p in self.as_list() if p["duration_ms"])
+
+
+# The forest compares features as float32, where larger values are infinite
+FLOAT32_MAX = float(np.finfo(np.float32).max)
+
+
+def _to_number(value):
+    """``float(value)``, or None if ``value`` is not a number."""
+    try:
+        return float(value)
+    except OverflowError:
+        # An integer beyond float64
+        return float("inf")
+    except (TypeError, ValueError):
+        return None
+
+
+class ModelBundle:
+    """One loaded model version and the helpers that score with it."""
+
+    def __init__(self, version, digest, metadata, encoder, forest,
+                 pipeline=None, compiled_max_rows=256):
+        self.version = version
+        self.digest = digest
+        self.metadata = metadata
+        self.feature_names = metadata["feature_names"]
+        self.categorical = set(metadata.get("categorical", []))
+        self.encoder = encoder
+        self.forest = forest
+        self.pipeline = pipeline
+        self.compiled_max_rows = compiled_max_rows
+        # Largest magnitude of each numeric feature that stays finite once
+        # standardized and cast to float32; NaN is allowed (missing value)
+        self.limits = dict.fromkeys(self.feature_names, FLOAT32_MAX)
+        if encoder is not None:
+            for feat, mean, scale in zip(encoder.num_features, encoder.mean,
+                                         encoder.scale):
+                self.limits[feat] = FLOAT32_MAX * scale - abs(mean)
+
+    @property
+    def clf(self):
+        return None if self.pipeline is None else self.pipeline.steps[-1][1]
+
+    @property
+    def classes(self):
+        if self.forest is not None:
+            return self.forest.classes_
+        return self.clf.classes_
+
+    def validate_record(self, record):
+        """Return an error message for a malformed record, or None."""
+        if not isinstance(record, dict):
+            return "Record must be a JSON object"
+        missing = [feat for feat in self.feature_names if feat not in record]
+        if missing:
+            return f"Missing features: {missing}"
+        for feat in self.feature_names:
+            value = record[feat]
+            if feat in self.categorical:
+                if not isinstance(value, str):
+                    return f"Feature '{feat}' must be a string"
+            else:
+                number = _to_number(value)
+                if number is None:
+                    return f"Feature '{feat}' must be numeric"
+                if abs(number) > self.limits[feat]:
+                    return f"Feature '{feat}' must be finite"
+        return None
+
+    def validate_columns(self, columns):
+        """Check a column-oriented batch ``{feature: values}``.
+
+        Returns ``(n_rows, errors)`` where ``errors`` maps the index of each
+        malformed row to the message ``validate_record`` gives for it.
+        Raises ``ValueError`` when columns are missing or uneven.
+        """
+        if not isinstance(columns, dict):
+            raise ValueError("Expected an object of feature columns")
+        missing = [feat for feat in self.feature_names
+                   if feat not in columns]
+        if missing:
+            raise ValueError(f"Missing features: {missing}")
+        lengths = {len(columns[feat]) for feat in self.feature_names}
+        if len(lengths) > 1:
+            raise ValueError("Feature columns must all have the same length")
+        errors = {}
+        for feat in self.feature_names:
+            values = columns[feat]
+            if feat in self.categorical:
+                if isinstance(values, np.ndarray) and values.dtype.kind == "U":
+                    continue
+                message = f"Feature '{feat}' must be a string"
+                bad = [i for i, v in enumerate(values)
+                       if not isinstance(v, str)]
+                for i in bad:
+                    errors.setdefault(i, message)
+                continue
+            numeric = f"Feature '{feat}' must be numeric"
+            finite = f"Feature '{feat}' must be finite"
+            limit = self.limits[feat]
+            if isinstance(values, np.ndarray) and values.dtype.kind in "biuf":
+                if values.dtype.kind != "f":
+                    continue
+                # Arrow nulls arrive as NaN
+                for i in np.flatnonzero(np.isnan(values)).tolist():
+                    errors.setdefault(i, numeric)
+                with np.errstate(invalid="ignore"):
+                    too_large = np.abs(values) > limit
+                for i in np.flatnonzero(too_large).tolist():
+                    errors.setdefault(i, finite)
+                continue
+            for i, value in enumerate(values):
+                number = _to_number(value)
+                if number is None:
+                    errors.setdefault(i, numeric)
+                elif abs(number) > limit:
+                    errors.setdefault(i, finite)
+        return (lengths.pop() if lengths else 0), errors
+
+    def encode(self, records):
+        """Turn request records into the classifier's input matrix."""
+        if self.encoder is None:
+            import pandas as pd
+            X = pd.DataFrame(records, columns=self.feature_names)
+            return self.pipeline[:-1].transform(X)
+        if len(records) == 1:
+            return self.encoder.transform_one(records[0])
+        return self.encoder.transform(records)
+
+    def encode_columns(self, columns, rows=None):
+        """Encode ``{feature: values}`` columns, optionally only ``rows``."""
+        if rows is not None:
+            # Lists are picked from as they are: np.asarray would coerce a
+            # mixed column such as [True, "x"] to strings, and "True" does
+            # not convert back to a number
+            columns = {feat: columns[feat][rows]
+                       if isinstance(columns[feat], np.ndarray)
+                       else [columns[feat][i] for i in rows]
+                       for feat in self.feature_names}
+        if self.encoder is None:
+            import pandas as pd
+            X = pd.DataFrame(columns, columns=self.feature_names)
+            return self.pipeline[:-1].transform(X)
+        return self.encoder.transform_columns(columns)
+
+    def score(self, X):
+        """Return (predicted classes, class probabilities) for rows."""
+        # The compiled forest wins on small batches; sklearn's Cython
+        # traversal is faster past a few hundred rows.  Both give identical
+        # float64 results.
+        if self.forest is not None and (
+                X.shape[0] <= self.compiled_max_rows or self.clf is None):
+            proba = self.forest.predict_proba(X)
+        else:
+            proba = self.clf.predict_proba(X)
+        # The class is the argmax of the probabilities, exactly as
+        # Pipeline.predict computes it.
+        return self.classes.take(proba.argmax(axis=1)), proba
+
+    def synthetic_record(self):
+        """A valid record built from the model itself (first category of
+        each categorical feature, training mean of each numeric one)."""
+        record = {}
+        if self.encoder is not None:
+            for feat, table in zip(self.encoder.cat_features,
+                                   self.encoder.cat_tables):
+                record[feat] = next(iter(table))
+            for feat, mean in zip(self.encoder.num_features,
+                                  self.encoder.mean):
+                record[feat] = float(mean)
+        for feat in self.feature_names:
+            record.setdefault(feat, "" if feat in self.categorical else 0.0)
+        return record
+
+    def synthetic_records(self, n):
+        """``n`` valid records that cycle through every category and spread
+        numeric features around their training means."""
+        base = self.synthetic_record()
+        if self.encoder is None:
+            return [dict(base) for _ in range(n)]
+        categories = [(feat, list(table)) for feat, table in
+                      zip(self.encoder.cat_features, self.encoder.cat_tables)]
+        numeric = list(zip(self.encoder.num_features, self.encoder.mean,
+                           self.encoder.scale))
+        offsets = np.linspace(-1.0, 1.0, n) if n > 1 else np.zeros(1)
+        records = []
+        for i in range(n):
+            record = dict(base)
+            for feat, values in categories:
+                record[feat] = values[i % len(values)]
+            for j, (feat, mean, scale) in enumerate(numeric):
+                record[feat] = float(mean + scale * offsets[(i + j) % n])
+            records.append(record)
+        return records
+
+    def load_pipeline(self, model_path, timeline=None):
+        """Load the sklearn pipeline into an artifact-only bundle."""
+        import joblib
+        timeline = timeline or StartupTimeline()
+        with timeline.phase("pickle"):
+            self.pipeline = joblib.load(model_path)
+        return self.pipeline
+
+
+def load_bundle(model_path, meta_path, artifact_path=None,
+                forest_dtype="float64", verify=True, compiled_max_rows=256,
+                defer_pickle=False, timeline=None, log=print):
+    """Load one model version.
+
+    With a valid artifact and ``defer_pickle`` the sklearn pipeline is not
+    loaded at all; call ``bundle.load_pipeline`` later to add it.
+    """
+    from app.encoder import CompiledEncoder
+    from app.forest import CompiledForest
+
+    timeline = timeline or StartupTimeline()
+    with timeline.phase("metadata"):
+        with open(meta_path, "r") as f:
+            metadata = json.load(f)
+    with timeline.phase("model_digest"):
+        digest = sha256_file(model_path)
+
+    encoder = forest = pipeline = None
+    if forest_dtype == "float64" and artifact_path and \
+            os.path.isdir(artifact_path):
+        try:
+            with timeline.phase("artifact"):
+                encoder, forest, _ = load_artifact(
+                    artifact_path, verify=verify, model_digest=digest)
+            log(f"Memory-mapped compiled model from {artifact_path}")
+        except ArtifactError as e:
+            log(f"Ignoring model artifact: {e}")
+
+    if forest is None or not defer_pickle:
+        import joblib
+        with timeline.phase("pickle"):
+            pipeline = joblib.load(model_path)
+
+    if pipeline is not None:
+        with timeline.phase("compile"):
+            if encoder is None:
+                try:
+                    encoder = CompiledEncoder.from_preprocessor(
+                        pipeline.named_steps["preprocessor"])
+                except (KeyError, TypeError) as e:
+                    log(f"Compiled encoder unavailable, using pandas path: "
+                        f"{e}")
+            if forest is None:
+                try:
+                    forest = CompiledForest.from_estimator(
+                        pipeline.steps[-1][1], dtype=forest_dtype)
+                except TypeError as e:
+                    log(f"Compiled forest unavailable, using sklearn: {e}")
+
+    return ModelBundle(digest[:16], digest, metadata, encoder, forest,
+                       pipeline, compiled_max_rows)
+
+
+def first_inference(bundle, timeline=None):
+    """Score one synthetic record to touch every hot path once."""
+    timeline = timeline or StartupTimeline()
+    with timeline.phase("first_inference"):
+        X = bundle.encode([bundle.synthetic_record()])
+        bundle.score(np.asarray(X))
+
+
+def warm_up(bundle, rounds=200, batch_sizes=(8, 64), timeline=None):
+    """Run synthetic predictions over the serving hot paths.
+
+    ``rounds`` varied single records go through the per-request path
+    (``encode`` then ``score``), then each of ``batch_sizes`` - plus one
+    batch past ``compiled_max_rows`` when the sklearn forest is loaded -
+    through the record and columnar encoders.  Returns a report with the
+    single-row latency percentiles in ms, ignoring the first tenth of the
+    rounds, which pay the one-off costs being warmed away.
+    """
+    timeline = timeline or StartupTimeline()
+    with timeline.phase("warmup"):
+        started = time.perf_counter()
+        records = bundle.synthetic_records(max(rounds, 1))
+        latencies = []
+        for record in records[:rounds]:
+            t0 = time.perf_counter()
+            bundle.score(np.asarray(bundle.encode([record])))
+            latencies.append((time.perf_counter() - t0) * 1000.0)
+
+        sizes = list(batch_sizes)
+        if bundle.clf is not None:
+            sizes.append(bundle.compiled_max_rows + 1)
+        batch_ms = {}
+        for size in sizes:
+            batch = bundle.synthetic_records(size)
+            columns = {feat: [r[feat] for r in batch]
+                       for feat in bundle.feature_names}
+            t0 = time.perf_counter()
+            bundle.score(np.asarray(bundle.encode(batch)))
+            bundle.score(np.asarray(bundle.encode_columns(columns)))
+            batch_ms[str(size)] = (time.perf_counter() - t0) * 1000.0
+
+    measured = sorted(latencies[len(latencies) // 10:]) or [0.0]
+    return {
+        "rounds": rounds,
+        "p50_ms": measured[len(measured) // 2],
+        "p95_ms": measured[int(0.95 * (len(measured) - 1))],
+        "max_ms": measured[-1],
+        "first_ms": latencies[0] if latencies else None,
+        "batch_ms": batch_ms,
+        "duration_ms": (time.perf_counter() - started) * 1000.0,
+    }
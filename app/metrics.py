@@ -0,0 +1,129 @@
+# app/metrics.py
+"""Prometheus metrics for the prediction API.
+
+Per-stage latency histograms for ``/predict`` (parse, validate, encode,
+score, serialize), request counts by status, payload sizes, in-flight
+requests and model load time.  Under the pre-fork server every worker
+writes its samples to ``PROMETHEUS_MULTIPROC_DIR`` and ``/metrics``
+aggregates all of them, so the numbers cover the whole pod.
+
+``prometheus_client`` is optional: without it every hook is a no-op and
+``render()`` reports that metrics are unavailable.
+"""
+import os
+import time
+
+try:
+    from prometheus_client import (CONTENT_TYPE_LATEST, CollectorRegistry,
+                                   Counter, Gauge, Histogram,
+                                   generate_latest)
+    from prometheus_client import multiprocess
+except ImportError:  # pragma: no cover - exercised only without the package
+    CollectorRegistry = None
+
+ENABLED = CollectorRegistry is not None
+
+# Stage latencies are mostly microseconds to a few milliseconds
+STAGE_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+                 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576,
+                4194304, 16777216)
+
+
+class StageTimer:
+    """Lap timer splitting one request into named stages.
+
+    ``lap(name)`` charges the time since the previous lap (or creation) to
+    ``name``; the result is an ordered ``{stage: seconds}`` dict.
+    """
+
+    __slots__ = ("stages", "_last")
+
+    def __init__(self):
+        self.stages = {}
+        self._last = time.perf_counter()
+
+    def lap(self, name):
+        now = time.perf_counter()
+        self.stages[name] = self.stages.get(name, 0.0) + (now - self._last)
+        self._last = now
+
+    def skip(self):
+        """Restart the clock without charging the elapsed time."""
+        self._last = time.perf_counter()
+
+
+if ENABLED:
+    STAGE_SECONDS = Histogram(
+        "predict_stage_seconds", "Time spent in each prediction stage",
+        ["endpoint", "stage"], buckets=STAGE_BUCKETS)
+    REQUESTS = Counter(
+        "http_requests_total", "HTTP requests by endpoint and status",
+        ["endpoint", "method", "status"])
+    REQUEST_SECONDS = Histogram(
+        "http_request_duration_seconds", "End-to-end request latency",
+        ["endpoint"], buckets=LATENCY_BUCKETS)
+    REQUEST_BYTES = Histogram(
+        "http_request_size_bytes", "Request body size", ["endpoint"],
+        buckets=SIZE_BUCKETS)
+    RESPONSE_BYTES = Histogram(
+        "http_response_size_bytes", "Response body size", ["endpoint"],
+        buckets=SIZE_BUCKETS)
+    IN_FLIGHT = Gauge(
+        "http_requests_in_flight", "Requests currently being served",
+        ["endpoint"], multiprocess_mode="livesum")
+    MODEL_LOAD_SECONDS = Gauge(
+        "model_load_seconds", "Time taken to load each model version",
+        ["version"], multiprocess_mode="max")
+
+
+def request_started(endpoint):
+    if ENABLED:
+        IN_FLIGHT.labels(endpoint).inc()
+    return time.perf_counter()
+
+
+def request_finished(endpoint, method, status, started, request_bytes,
+                     response_bytes, stages=None):
+    if not ENABLED:
+        return
+    IN_FLIGHT.labels(endpoint).dec()
+    REQUESTS.labels(endpoint, method, str(status)).inc()
+    REQUEST_SECONDS.labels(endpoint).observe(time.perf_counter() - started)
+    if request_bytes is not None:
+        REQUEST_BYTES.labels(endpoint).observe(request_bytes)
+    if response_bytes is not None:
+        RESPONSE_BYTES.labels(endpoint).observe(response_bytes)
+    for stage, seconds in (stages or {}).items():
+        STAGE_SECONDS.labels(endpoint, stage).observe(seconds)
+
+
+def model_loaded(version, seconds):
+    if ENABLED:
+        MODEL_LOAD_SECONDS.labels(version).set(seconds)
+
+
+def multiprocess_dir():
+    return (os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+            or os.environ.get("prometheus_multiproc_dir"))
+
+
+def mark_process_dead(pid):
+    """Drop a dead worker's live gauges from the aggregate."""
+    if ENABLED and multiprocess_dir():
+        multiprocess.mark_process_dead(pid)
+
+
+def render():
+    """Return ``(body, content_type)`` for the /metrics endpoint."""
+    if not ENABLED:
+        return (b"# prometheus_client is not installed\n",
+                "text/plain; charset=utf-8")
+    if multiprocess_dir():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        from prometheus_client import REGISTRY as registry
+    return generate_latest(registry), CONTENT_TYPE_LATEST
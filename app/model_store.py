@@ -0,0 +1,192 @@
+# app/model_store.py
+"""Hot-swappable holder for the active model.
+
+``ModelStore.reload`` loads and warms a new ``ModelBundle`` off the request
+path, validates it against the serving contract (same ``feature_names``)
+and only then swaps it in with a single reference assignment, so a request
+always sees either the old model or the new one in full.  Replaced bundles
+stay in a short history for instant rollback; ``on_retire`` is told when
+a bundle drops out of both, so its resources can be released.
+``ModelWatcher`` polls the model files and triggers a reload once a
+retrain has finished writing them.
+"""
+import os
+import threading
+import time
+
+import numpy as np
+
+from app.loader import first_inference
+
+
+class ModelValidationError(Exception):
+    """Raised when a candidate model does not match the serving contract."""
+
+
+class ModelStore:
+    """Active model plus a bounded history of previous versions."""
+
+    def __init__(self, load_fn, history=3, on_swap=None, on_retire=None,
+                 log=print):
+        self.load_fn = load_fn
+        self.max_history = int(history)
+        self.on_swap = on_swap
+        self.on_retire = on_retire
+        self.log = log
+        self.active = None
+        self.history = []  # most recently replaced first
+        self.reloads = 0
+        self.last_error = None
+        self._lock = threading.Lock()
+
+    def activate(self, bundle):
+        """Make ``bundle`` the active model; return the one it replaced."""
+        with self._lock:
+            previous, retired = self._swap_locked(bundle)
+        self._retire(retired)
+        return previous
+
+    def _swap_locked(self, bundle):
+        """Activate ``bundle``; return ``(previous, retired bundles)``."""
+        before = [self.active] + self.history
+        previous = self.active
+        if self.on_swap is not None:
+            self.on_swap(bundle)
+        self.active = bundle
+        if previous is not None and previous is not bundle:
+            self.history = [b for b in self.history
+                            if b.version != previous.version]
+            self.history.insert(0, previous)
+            del self.history[self.max_history:]
+        self.history = [b for b in self.history
+                        if b.version != bundle.version]
+        kept = [self.active] + self.history
+        retired = [b for b in before
+                   if b is not None and not any(b is k for k in kept)]
+        return previous, retired
+
+    def _retire(self, bundles):
+        # Outside the lock: releasing a bundle may wait for its work
+        if self.on_retire is not None:
+            for bundle in bundles:
+                self.on_retire(bundle)
+
+    def validate(self, bundle):
+        """Check a candidate against the active model and warm it up."""
+        current = self.active
+        if current is not None and \
+                bundle.feature_names != current.feature_names:
+            raise ModelValidationError(
+                f"feature_names changed: {bundle.feature_names} != "
+                f"{current.feature_names}")
+        X = np.asarray(bundle.encode([bundle.synthetic_record()]))
+        _, proba = bundle.score(X)
+        if proba.shape[1] != len(bundle.classes) or \
+                not np.allclose(proba.sum(axis=1), 1.0):
+            raise ModelValidationError("Candidate model returned invalid "
+                                       "probabilities")
+
+    def reload(self):
+        """Load, warm, validate and swap in the model on disk.
+
+        Returns the new active version; the old model keeps serving if
+        anything fails.
+        """
+        started = time.perf_counter()
+        try:
+            bundle = self.load_fn()
+            first_inference(bundle)
+            self.validate(bundle)
+        except Exception as e:
+            self.last_error = str(e)
+            self.log(f"Model reload failed, keeping "
+                     f"{getattr(self.active, 'version', None)}: {e}")
+            raise
+        bundle.load_ms = (time.perf_counter() - started) * 1000.0
+        with self._lock:
+            previous, retired = self._swap_locked(bundle)
+            self.reloads += 1
+            self.last_error = None
+        self._retire(retired)
+        self.log(f"Model reloaded: {getattr(previous, 'version', None)} -> "
+                 f"{bundle.version} in {bundle.load_ms:.0f} ms")
+        return bundle.version
+
+    def rollback(self, version=None):
+        """Swap back to ``version`` (default: the previous model)."""
+        with self._lock:
+            if not self.history:
+                raise LookupError("No previous model version to roll back to")
+            if version is None:
+                target = self.history[0]
+            else:
+                matches = [b for b in self.history if b.version == version]
+                if not matches:
+                    raise LookupError(f"Unknown model version {version}")
+                target = matches[0]
+            _, retired = self._swap_locked(target)
+        self._retire(retired)
+        self.log(f"Rolled back to model {target.version}")
+        return target.version
+
+    def versions(self):
+        active = self.active
+        return {
+            "active": getattr(active, "version", None),
+            "history": [b.version for b in self.history],
+            "reloads": self.reloads,
+            "last_error": self.last_error,
+        }
+
+
+class ModelWatcher:
+    """Poll model files and reload the store after they change."""
+
+    def __init__(self, store, paths, interval=5.0):
+        self.store = store
+        self.paths = list(paths)
+        self.interval = float(interval)
+        self._stop = threading.Event()
+        self._seen = self.signature()
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name="model-watcher")
+
+    def signature(self):
+        sig = []
+        for path in self.paths:
+            try:
+                st = os.stat(path)
+                sig.append((path, st.st_mtime_ns, st.st_size))
+            except OSError:
+                sig.append((path, None, None))
+        return tuple(sig)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def check(self):
+        """Reload if the files changed and have stopped changing.
+
+        Returns True when a reload was attempted.
+        """
+        current = self.signature()
+        if current == self._seen:
+            return False
+        # A retrain writes several files; wait until a full interval
+        # passes without further changes before loading.
+        if self._stop.wait(self.interval) or self.signature() != current:
+            return False
+        self._seen = current
+        try:
+            self.store.reload()
+        except Exception:
+            pass  # already logged; keep serving the old model
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
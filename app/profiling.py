@@ -0,0 +1,172 @@
+# app/profiling.py
+"""Per-request diagnostics: Server-Timing, profiles and a slow-request log.
+
+* ``server_timing`` renders a request's ``StageTimer`` stages as a
+  ``Server-Timing`` header, so browser dev tools and load-test logs show
+  where the time went.
+* ``ProfileStore`` runs cProfile around selected requests and keeps the
+  newest profiles on disk as ``pstats`` files.  The directory is shared by
+  all pre-fork workers, so a profile can be downloaded from any of them.
+* ``SlowRequestLog`` keeps the most recent requests that exceeded a latency
+  threshold, with their stage breakdown and payload shape.  It lives in
+  process memory, so under the pre-fork server each worker has its own.
+"""
+import cProfile
+import io
+import os
+import pstats
+import random
+import threading
+import time
+import uuid
+from collections import deque
+
+
+def server_timing(stages, total=None):
+    """``Server-Timing`` header value for ``{stage: seconds}``."""
+    parts = [f"{name};dur={seconds * 1000.0:.3f}"
+             for name, seconds in stages.items()]
+    if total is not None:
+        parts.append(f"total;dur={total * 1000.0:.3f}")
+    return ", ".join(parts)
+
+
+def payload_shape(data, media):
+    """Summary of a decoded request body for the slow-request log."""
+    shape = {"format": media}
+    if isinstance(data, list):
+        shape["rows"] = len(data)
+    elif isinstance(data, dict):
+        records = data.get("records")
+        if isinstance(records, list):
+            shape["rows"] = len(records)
+        elif data and all(hasattr(v, "__len__") and not isinstance(v, str)
+                          for v in data.values()):
+            # Columnar body: every value is a column
+            shape["rows"] = len(next(iter(data.values())))
+            shape["columns"] = len(data)
+        else:
+            shape["rows"] = 1
+            shape["fields"] = len(data)
+    return shape
+
+
+class ProfileStore:
+    """cProfile selected requests and keep the newest ``max_profiles``.
+
+    Requests are profiled when ``wanted`` says so: always when forced (a
+    trusted header), otherwise with probability ``sample_rate``.  Only one
+    request per process is profiled at a time; others run unprofiled.
+    """
+
+    def __init__(self, directory, max_profiles=50, sample_rate=0.0):
+        self.directory = directory
+        self.max_profiles = max_profiles
+        self.sample_rate = sample_rate
+        self._busy = threading.Lock()
+
+    def wanted(self, forced=False):
+        return forced or (self.sample_rate > 0
+                          and random.random() < self.sample_rate)
+
+    def start(self):
+        """Return a running profiler, or None if one is already active."""
+        if not self._busy.acquire(blocking=False):
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except (ValueError, RuntimeError):
+            # Another profiler (e.g. a debugger) owns the hook, or on 3.11
+            # is being installed or torn down at the same moment
+            self._busy.release()
+            return None
+        return profiler
+
+    def finish(self, profiler, label=""):
+        """Stop ``profiler``, save it and return its profile id."""
+        profiler.disable()
+        self._busy.release()
+        os.makedirs(self.directory, exist_ok=True)
+        profile_id = f"{time.strftime('%Y%m%dT%H%M%S')}-" \
+                     f"{uuid.uuid4().hex[:8]}"
+        path = self._path(profile_id)
+        profiler.dump_stats(path + ".tmp")
+        os.replace(path + ".tmp", path)
+        if label:
+            with open(path[:-len(".prof")] + ".txt", "w") as f:
+                f.write(label + "\n")
+        self._prune()
+        return profile_id
+
+    def _path(self, profile_id):
+        return os.path.join(self.directory, f"{profile_id}.prof")
+
+    def _prune(self):
+        for profile in self.list()[self.max_profiles:]:
+            for suffix in (".prof", ".txt"):
+                try:
+                    os.remove(os.path.join(self.directory,
+                                           profile["id"] + suffix))
+                except OSError:
+                    pass
+
+    def list(self):
+        """Saved profiles, newest first."""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        profiles = []
+        for name in names:
+            if not name.endswith(".prof"):
+                continue
+            profile_id = name[:-len(".prof")]
+            label_path = os.path.join(self.directory, profile_id + ".txt")
+            try:
+                with open(label_path) as f:
+                    label = f.read().strip()
+            except OSError:
+                label = ""
+            profiles.append({"id": profile_id, "request": label})
+        profiles.sort(key=lambda p: p["id"], reverse=True)
+        return profiles
+
+    def path(self, profile_id):
+        """File of a saved profile; raises ``LookupError`` if unknown."""
+        path = self._path(os.path.basename(profile_id))
+        if not os.path.exists(path):
+            raise LookupError(f"Unknown profile '{profile_id}'")
+        return path
+
+    def report(self, profile_id, limit=40, sort="cumulative"):
+        """Text summary of a saved profile, top ``limit`` functions."""
+        out = io.StringIO()
+        stats = pstats.Stats(self.path(profile_id), stream=out)
+        stats.sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+
+class SlowRequestLog:
+    """Bounded log of requests slower than ``threshold_ms``."""
+
+    def __init__(self, threshold_ms=250.0, max_entries=100):
+        self.threshold_ms = threshold_ms
+        self._entries = deque(maxlen=max_entries)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, **details):
+        """Record a request if it was slow; return the entry or None."""
+        duration_ms = seconds * 1000.0
+        if self.threshold_ms is None or duration_ms < self.threshold_ms:
+            return None
+        entry = dict(details, time=time.time(), pid=os.getpid(),
+                     duration_ms=round(duration_ms, 3))
+        with self._lock:
+            self._entries.append(entry)
+        return entry
+
+    def entries(self):
+        """Logged requests, newest first."""
+        with self._lock:
+            return list(reversed(self._entries))
@@ -0,0 +1,218 @@
+# app/registry.py
+"""Named models loaded on demand within a memory budget.
+
+Each model lives in its own directory under the registry root, laid out
+like ``model/`` (``model.pkl``, ``metadata.json`` and optionally
+``artifact/``), so every model carries its own metadata and schema.
+Nothing is loaded at start-up: the first request for a name loads and
+warms that model, and concurrent requests for it wait for the same load.
+Resident models are kept in LRU order; once their estimated size exceeds
+``max_bytes`` the least recently used ones are dropped (a request already
+holding a dropped bundle finishes with it) and reload on their next use.
+"""
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# Model names are directory names; nothing that could walk out of the root
+NAME_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]*$")
+MODEL_FILE = "model.pkl"
+META_FILE = "metadata.json"
+ARTIFACT_DIR = "artifact"
+
+
+class ModelLoadError(Exception):
+    """Raised when a registered model exists but cannot be loaded."""
+
+
+def _array_bytes(obj):
+    return sum(value.nbytes for value in vars(obj).values()
+               if isinstance(value, np.ndarray))
+
+
+def bundle_bytes(bundle, model_path):
+    """Approximate memory held by a loaded bundle.
+
+    Counts the compiled encoder and forest arrays (memory-mapped artifact
+    pages included, as they are resident once scored) and, when the
+    sklearn pipeline is loaded, the size of its pickle.
+    """
+    size = 0
+    for part in (bundle.encoder, bundle.forest):
+        if part is not None:
+            size += _array_bytes(part)
+    if bundle.pipeline is not None:
+        size += os.path.getsize(model_path)
+    return size
+
+
+class _Entry:
+    __slots__ = ("lock", "bundle", "bytes", "loads", "load_ms", "hits",
+                 "misses", "evictions", "last_used", "last_error")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.bundle = None
+        self.bytes = 0
+        self.loads = 0
+        self.load_ms = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.last_used = None
+        self.last_error = None
+
+
+class ModelRegistry:
+    """Lazily loaded named models with LRU eviction by estimated size."""
+
+    def __init__(self, directory, load_fn, max_bytes=512 * 1024 * 1024,
+                 on_load=None, log=print):
+        self.directory = directory
+        # load_fn(model_path, meta_path, artifact_path) -> warm ModelBundle
+        self.load_fn = load_fn
+        self.max_bytes = int(max_bytes)
+        self.on_load = on_load
+        self.log = log
+        self._entries = {}
+        self._resident = OrderedDict()  # name -> _Entry, coldest first
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def paths(self, name):
+        """``(model, metadata, artifact)`` paths of model ``name``."""
+        root = os.path.join(self.directory, name)
+        return (os.path.join(root, MODEL_FILE),
+                os.path.join(root, META_FILE),
+                os.path.join(root, ARTIFACT_DIR))
+
+    def names(self):
+        """Names of the models available on disk."""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name for name in os.listdir(self.directory)
+                      if NAME_PATTERN.match(name)
+                      and os.path.isfile(self.paths(name)[0]))
+
+    def _entry(self, name):
+        if not isinstance(name, str) or not NAME_PATTERN.match(name):
+            raise LookupError(f"Invalid model name {name!r}")
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                if not os.path.isfile(self.paths(name)[0]):
+                    raise LookupError(f"Unknown model {name}")
+                entry = self._entries[name] = _Entry()
+            return entry
+
+    def get(self, name):
+        """The loaded bundle for ``name``, loading it on first use.
+
+        Raises ``LookupError`` for names not in the registry and
+        ``ModelLoadError`` if the model files fail to load.
+        """
+        entry = self._entry(name)
+        with self._lock:
+            bundle = entry.bundle
+            if bundle is not None:
+                entry.hits += 1
+                entry.last_used = time.time()
+                self._resident.move_to_end(name)
+                return bundle
+        # One load per name; other callers for it wait here
+        with entry.lock:
+            with self._lock:
+                if entry.bundle is not None:
+                    entry.hits += 1
+                    entry.last_used = time.time()
+                    self._resident.move_to_end(name)
+                    return entry.bundle
+                entry.misses += 1
+            bundle = self._load(name, entry)
+        return bundle
+
+    def _load(self, name, entry):
+        model_path, meta_path, artifact_path = self.paths(name)
+        started = time.perf_counter()
+        try:
+            bundle = self.load_fn(model_path, meta_path, artifact_path)
+        except Exception as e:
+            entry.last_error = str(e)
+            self.log(f"Loading model {name} failed: {e}")
+            raise ModelLoadError(f"Model {name} failed to load: {e}") from e
+        load_ms = (time.perf_counter() - started) * 1000.0
+        bundle.load_ms = load_ms
+        size = bundle_bytes(bundle, model_path)
+        with self._lock:
+            entry.bundle, entry.bytes = bundle, size
+            entry.loads += 1
+            entry.load_ms = load_ms
+            entry.last_used = time.time()
+            entry.last_error = None
+            self._resident[name] = entry
+            self._bytes += size
+            evicted = self._evict_locked(keep=name)
+        if self.on_load is not None:
+            self.on_load(name, bundle)
+        self.log(f"Loaded model {name} ({bundle.version}) in {load_ms:.0f} ms,"
+                 f" {size / (1 << 20):.1f} MiB"
+                 + (f"; evicted {', '.join(evicted)}" if evicted else ""))
+        return bundle
+
+    def _evict_locked(self, keep=None):
+        evicted = []
+        for name in list(self._resident):
+            if self._bytes <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            self._drop_locked(name)
+            evicted.append(name)
+        return evicted
+
+    def _drop_locked(self, name):
+        entry = self._resident.pop(name)
+        self._bytes -= entry.bytes
+        entry.bundle, entry.bytes = None, 0
+        entry.evictions += 1
+
+    def evict(self, name):
+        """Unload ``name`` now; returns False if it was not resident."""
+        with self._lock:
+            if name not in self._resident:
+                return False
+            self._drop_locked(name)
+            return True
+
+    def stats(self):
+        """Registry totals plus load time, hit rate and size per model."""
+        available = self.names()
+        with self._lock:
+            models = {}
+            for name, entry in sorted(self._entries.items()):
+                requests = entry.hits + entry.misses
+                models[name] = {
+                    "resident": entry.bundle is not None,
+                    "version": getattr(entry.bundle, "version", None),
+                    "bytes": entry.bytes,
+                    "loads": entry.loads,
+                    "load_ms": entry.load_ms,
+                    "hits": entry.hits,
+                    "misses": entry.misses,
+                    "hit_rate": entry.hits / requests if requests else None,
+                    "evictions": entry.evictions,
+                    "last_used": entry.last_used,
+                    "last_error": entry.last_error,
+                }
+            return {
+                "directory": self.directory,
+                "available": available,
+                "resident": list(self._resident),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "models": models,
+            }
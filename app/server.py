@@ -0,0 +1,170 @@
+# app/server.py
+"""Pre-fork production server for the prediction API.
+
+The master process imports ``app.app`` once (model, metadata, compiled
+encoder and forest), freezes the garbage collector so those objects are not
+rewritten by later collections, binds the listening socket and forks the
+workers.  Workers share the model's memory pages copy-on-write, are pinned
+to one CPU each and are restarted by the master if they die.
+
+Usage:
+    WORKERS=4 python -m app.server
+"""
+import gc
+import os
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import time
+
+if __package__ in (None, ""):
+    # Started as ``python app/server.py``: make the ``app`` package importable
+    sys.path.insert(0, os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__))))
+
+HOST = os.environ.get("HOST", "0.0.0.0")
+PORT = int(os.environ.get("PORT", "5000"))
+WORKERS = int(os.environ.get("WORKERS", "0"))
+WORKER_AFFINITY = os.environ.get("WORKER_AFFINITY", "1") == "1"
+BACKLOG = int(os.environ.get("BACKLOG", "2048"))
+# A worker dying sooner than this after start counts as a crash loop
+MIN_WORKER_UPTIME = 1.0
+
+
+def available_cpus():
+    """CPUs this process may run on, in a stable order."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def plan_affinity(n_workers, cpus):
+    """Assign CPUs to worker slots round-robin."""
+    return [cpus[i % len(cpus)] for i in range(n_workers)] if cpus else []
+
+
+def bind_socket(host, port, backlog=BACKLOG):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class PreforkServer:
+    """Master process supervising forked WSGI workers on one socket."""
+
+    def __init__(self, wsgi_app, sock, workers=WORKERS,
+                 affinity=WORKER_AFFINITY, on_fork=None, on_exit=None):
+        self.wsgi_app = wsgi_app
+        # Called in each worker right after fork, e.g. to restart threads
+        self.on_fork = on_fork
+        # Called in the master with the pid of each worker that exits
+        self.on_exit = on_exit
+        self.sock = sock
+        # Default to one worker per CPU this container may actually use
+        self.n_workers = workers or len(available_cpus())
+        self.cpus = plan_affinity(self.n_workers, available_cpus()) \
+            if affinity and hasattr(os, "sched_setaffinity") else []
+        self.children = {}  # pid -> (slot, start time)
+        self.stopping = False
+
+    def spawn(self, slot):
+        pid = os.fork()
+        if pid:
+            self.children[pid] = (slot, time.monotonic())
+            return pid
+        # Worker process
+        try:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            if self.cpus:
+                os.sched_setaffinity(0, {self.cpus[slot]})
+            if self.on_fork is not None:
+                self.on_fork()
+            self.serve()
+        finally:
+            os._exit(0)
+
+    def serve(self):
+        from werkzeug.serving import make_server
+        host, port = self.sock.getsockname()[:2]
+        server = make_server(host, port, self.wsgi_app, threaded=True,
+                             fd=self.sock.fileno())
+        server.serve_forever()
+
+    def stop(self, signum=None, frame=None):
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for slot in range(self.n_workers):
+            self.spawn(slot)
+        print(f"Master {os.getpid()} serving on "
+              f"{self.sock.getsockname()} with {self.n_workers} workers")
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            slot, started = self.children.pop(pid, (None, 0.0))
+            if self.on_exit is not None:
+                self.on_exit(pid)
+            if self.stopping or slot is None:
+                continue
+            print(f"Worker {pid} (slot {slot}) exited with status {status}; "
+                  f"restarting")
+            if time.monotonic() - started < MIN_WORKER_UPTIME:
+                time.sleep(MIN_WORKER_UPTIME)
+            self.spawn(slot)
+
+
+def prepare_metrics_dir():
+    """Point prometheus_client at a fresh multi-process directory.
+
+    Must run before ``prometheus_client`` is imported so every worker
+    writes its samples where ``/metrics`` can aggregate them.
+    """
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if path:
+        # Samples from a previous run would be counted again
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+    else:
+        path = tempfile.mkdtemp(prefix="heart-api-metrics-")
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = path
+    return path
+
+
+def main():
+    prepare_metrics_dir()
+    # Keeps app.app from starting its model watcher here; workers start it
+    # through on_fork instead
+    os.environ["PREFORK_MASTER"] = "1"
+    import app.app as api
+    from app import metrics
+
+    # Workers must inherit a fully loaded model, even with FAST_START
+    api.wait_for_loader()
+    sock = bind_socket(HOST, PORT)
+    # Objects allocated so far (the model above all) move to the permanent
+    # generation, so GC passes in workers do not dirty their shared pages.
+    gc.collect()
+    gc.freeze()
+    PreforkServer(api.app, sock, on_fork=api.start_watcher,
+                  on_exit=metrics.mark_process_dead).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+# app/wire.py
+"""Wire formats for prediction requests and responses.
+
+Besides the default JSON, ``/predict`` and ``/predict/batch`` speak:
+
+* MessagePack (``application/msgpack``): the same documents as JSON in a
+  compact binary encoding.
+* Columnar JSON (``application/vnd.columnar+json``): ``{feature: [values]}``
+  in and ``{"prediction": [...], "probability_<class>": [...], "error":
+  [...]}`` out, so no per-row objects are built on either side.
+* Arrow IPC streams (``application/vnd.apache.arrow.stream``): record
+  batches whose columns map straight into NumPy arrays.  Response batches
+  carry ``n_success``, ``n_errors`` and ``model_version`` as schema
+  metadata.
+
+The request format follows ``Content-Type`` (JSON when absent) and the
+response format follows ``Accept``, defaulting to the request format.
+``msgpack`` and ``pyarrow`` are optional; without them their formats are
+answered with 415 or 406.
+"""
+import json
+
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - exercised only without the package
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - exercised only without the package
+    pa = None
+
+JSON = "application/json"
+COLUMNAR_JSON = "application/vnd.columnar+json"
+MSGPACK = "application/msgpack"
+ARROW = "application/vnd.apache.arrow.stream"
+ALIASES = {
+    "application/x-msgpack": MSGPACK,
+    "application/vnd.msgpack": MSGPACK,
+}
+# Formats whose request bodies decode to {feature: values} columns
+COLUMNAR = (COLUMNAR_JSON, ARROW)
+NAMES = {
+    JSON: "JSON",
+    COLUMNAR_JSON: "JSON",
+    MSGPACK: "MessagePack",
+    ARROW: "Arrow stream",
+}
+
+
+class WireError(ValueError):
+    """A body or header the wire layer cannot handle, with its status."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def available_formats():
+    formats = [JSON, COLUMNAR_JSON]
+    if msgpack is not None:
+        formats.append(MSGPACK)
+    if pa is not None:
+        formats.append(ARROW)
+    return formats
+
+
+def _media_type(value):
+    media = (value or "").split(";", 1)[0].strip().lower()
+    return ALIASES.get(media, media)
+
+
+def request_format(content_type):
+    """Media type of a request body, from its ``Content-Type``."""
+    media = _media_type(content_type) or JSON
+    if media not in available_formats():
+        raise WireError(f"Unsupported Content-Type '{media}'. "
+                        f"Supported: {available_formats()}", 415)
+    return media
+
+
+def response_format(accept, default=JSON):
+    """Pick the response media type from an ``Accept`` header.
+
+    The highest ``q`` wins, ties go to the earlier entry, and wildcards
+    select ``default``.
+    """
+    if not accept:
+        return default
+    ranked = []
+    for position, item in enumerate(accept.split(",")):
+        media, *params = item.split(";")
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            ranked.append((-q, position, _media_type(media)))
+    formats = available_formats()
+    for _, _, media in sorted(ranked):
+        if media in ("*/*", "application/*"):
+            return default
+        if media in formats:
+            return media
+    raise WireError(f"Cannot produce any of '{accept}'. "
+                    f"Available: {formats}", 406)
+
+
+def decode(body, media):
+    """Decode a request body of type ``media``.
+
+    JSON and MessagePack give the usual request documents; the columnar
+    formats give a ``{feature: values}`` dict.
+    """
+    if media == ARROW:
+        return _decode_arrow(body)
+    try:
+        if media == MSGPACK:
+            data = msgpack.unpackb(body, raw=False)
+        else:
+            data = json.loads(body)
+    except (ValueError, TypeError, getattr(msgpack, "UnpackException",
+                                           ValueError)):
+        raise WireError(f"Invalid {NAMES[media]}")
+    if media == COLUMNAR_JSON:
+        if not isinstance(data, dict):
+            raise WireError("Expected an object of feature columns")
+        _check_columns(data)
+    return data
+
+
+def _check_columns(columns):
+    """Reject columnar bodies whose values are not arrays of rows."""
+    scalars = [name for name, values in columns.items()
+               if not isinstance(values, (list, np.ndarray))]
+    if scalars:
+        raise WireError(f"Columns must be lists of values: {scalars}")
+
+
+def _decode_arrow(body):
+    try:
+        table = pa.ipc.open_stream(body).read_all()
+    except pa.ArrowException:
+        raise WireError("Invalid Arrow stream")
+    return {name: table.column(name).to_numpy()
+            for name in table.column_names}
+
+
+def single_record(columns):
+    """The only row of a columnar ``/predict`` body, as a record dict."""
+    lengths = {len(values) for values in columns.values()}
+    if lengths != {1}:
+        raise WireError("/predict expects exactly one row; "
+                        "use /predict/batch for more")
+    return {name: _scalar(values[0]) for name, values in columns.items()}
+
+
+def _scalar(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def encode(payload, media, classes=()):
+    """Serialise a response payload; return ``(body, media type)``.
+
+    ``payload`` is a ``ColumnarResult`` or a JSON document (a prediction,
+    batch result or error).  Errors are never sent as Arrow, so they go
+    out as JSON instead.
+    """
+    is_error = isinstance(payload, dict) and "error" in payload
+    if media in COLUMNAR and not is_error:
+        if not isinstance(payload, ColumnarResult):
+            payload = ColumnarResult.from_payload(payload, classes)
+        if media == ARROW:
+            return payload.to_arrow(), media
+        payload = payload.to_columns()
+    elif isinstance(payload, ColumnarResult):
+        payload = payload.to_payload()
+    elif media == ARROW:
+        media = JSON
+    if media == MSGPACK:
+        return msgpack.packb(payload), media
+    return json.dumps(payload, separators=(",", ":")).encode(), media
+
+
+class ColumnarResult:
+    """Scores for a batch kept as arrays, one entry per input row.
+
+    ``valid`` marks the rows that were scored; ``errors`` maps every other
+    row index to its error message.
+    """
+
+    def __init__(self, classes, predictions, probabilities, valid, errors,
+                 model_version=None):
+        self.classes = [_scalar(c) for c in classes]
+        self.predictions = np.asarray(predictions)
+        self.probabilities = np.asarray(probabilities, dtype=np.float64)
+        self.valid = np.asarray(valid, dtype=bool)
+        self.errors = errors
+        self.model_version = model_version
+
+    @classmethod
+    def from_payload(cls, payload, classes):
+        """Build from a ``/predict`` or ``/predict/batch`` JSON document."""
+        results = payload["results"] if "results" in payload else [payload]
+        n = len(results)
+        predictions = np.zeros(n, dtype=np.int64)
+        probabilities = np.zeros((n, len(classes)))
+        valid = np.zeros(n, dtype=bool)
+        errors = {}
+        for i, result in enumerate(results):
+            if "error" in result:
+                errors[i] = result["error"]
+            else:
+                predictions[i] = result["prediction"]
+                probabilities[i] = result["probabilities"]
+                valid[i] = True
+        return cls(classes, predictions, probabilities, valid, errors,
+                   payload.get("model_version"))
+
+    @property
+    def n_success(self):
+        return int(self.valid.sum())
+
+    @property
+    def n_errors(self):
+        return len(self.valid) - self.n_success
+
+    def probability_columns(self):
+        return [f"probability_{c}" for c in self.classes]
+
+    def to_payload(self):
+        """The equivalent ``/predict/batch`` JSON document."""
+        results = [None] * len(self.valid)
+        for i, error in self.errors.items():
+            results[i] = {"error": error}
+        rows = np.flatnonzero(self.valid)
+        for i, pred, proba in zip(rows.tolist(),
+                                  self.predictions[rows].tolist(),
+                                  self.probabilities[rows].tolist()):
+            results[i] = {"prediction": int(pred), "probabilities": proba}
+        return {
+            "results": results,
+            "n_success": self.n_success,
+            "n_errors": self.n_errors,
+            "model_version": self.model_version
+        }
+
+    def to_columns(self):
+        """Columnar JSON document; rows with errors hold ``None``."""
+        def column(values):
+            values = values.tolist()
+            for i in self.errors:
+                values[i] = None
+            return values
+
+        document = {"prediction": column(self.predictions)}
+        for j, name in enumerate(self.probability_columns()):
+            document[name] = column(self.probabilities[:, j])
+        error = [None] * len(self.valid)
+        for i, message in self.errors.items():
+            error[i] = message
+        document.update({
+            "error": error,
+            "n_success": self.n_success,
+            "n_errors": self.n_errors,
+            "model_version": self.model_version
+        })
+        return document
+
+    def to_arrow(self):
+        """One Arrow IPC stream holding a single record batch."""
+        mask = ~self.valid
+        arrays = [pa.array(self.predictions.astype(np.int64), mask=mask)]
+        arrays.extend(
+            pa.array(np.ascontiguousarray(self.probabilities[:, j]),
+                     mask=mask)
+            for j in range(len(self.classes)))
+        error = [None] * len(self.valid)
+        for i, message in self.errors.items():
+            error[i] = message
+        arrays.append(pa.array(error, type=pa.string()))
+        batch = pa.RecordBatch.from_arrays(
+            arrays, ["prediction"] + self.probability_columns() + ["error"])
+        batch = batch.replace_schema_metadata({
+            "n_success": str(self.n_success),
+            "n_errors": str(self.n_errors),
+            "model_version": str(self.model_version),
+        })
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, batch.schema) as writer:
+            writer.write_batch(batch)
+        return sink.getvalue().to_pybytes()
+
+
+def encode_arrow_request(columns):
+    """Arrow IPC stream for ``{feature: values}`` (for clients and tests)."""
+    table = pa.table({name: pa.array(values)
+                      for name, values in columns.items()})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def decode_arrow_response(body):
+    """Decode an Arrow response into ``(columns, schema metadata)``."""
+    table = pa.ipc.open_stream(body).read_all()
+    metadata = {k.decode(): v.decode()
+                for k, v in (table.schema.metadata or {}).items()}
+    return table.to_pydict(), metadata
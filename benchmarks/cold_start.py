@@ -0,0 +1,141 @@
+# benchmarks/cold_start.py
+"""Measure API cold-start time and track it across commits.
+
+Each run starts ``python app/app.py`` in a fresh process and records, from
+the moment the process is spawned:
+
+* ``bind_ms``    - first successful TCP connect to the port
+* ``ready_ms``   - first ``GET /`` answered with 200
+* ``predict_ms`` - first successful ``POST /predict``
+
+plus the server's own per-phase timeline from ``GET /startup``.  Results
+are printed and, with ``--history``, appended as one JSON line tagged with
+the current git commit so regressions show up over time.
+
+Usage:
+    python benchmarks/cold_start.py --runs 5 --modes default fast \\
+        --history benchmarks/results/cold_start.jsonl
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = {
+    "default": {},
+    "fast": {"FAST_START": "1"},
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def status_of(url, data=None):
+    req = urllib.request.Request(
+        url, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=2) as resp:
+            return resp.status, resp.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+def one_run(mode, payload, timeout=60.0):
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    env = dict(os.environ, PORT=str(port), **MODES[mode])
+    spawned = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "app/app.py"], cwd=ROOT,
+                            env=env, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.DEVNULL)
+    marks = {}
+    try:
+        deadline = spawned + timeout
+        while "predict_ms" not in marks:
+            if time.perf_counter() > deadline or proc.poll() is not None:
+                raise RuntimeError(f"server ({mode}) did not become ready")
+            elapsed = (time.perf_counter() - spawned) * 1000.0
+            try:
+                if "bind_ms" not in marks:
+                    socket.create_connection(("127.0.0.1", port), 1).close()
+                    marks["bind_ms"] = elapsed
+                elif "ready_ms" not in marks:
+                    if status_of(base + "/")[0] == 200:
+                        marks["ready_ms"] = elapsed
+                elif status_of(base + "/predict", payload)[0] == 200:
+                    marks["predict_ms"] = elapsed
+                    continue
+            except OSError:
+                pass
+            time.sleep(0.005)
+        _, body = status_of(base + "/startup")
+        marks["phases"] = json.loads(body)["phases"]
+    finally:
+        proc.terminate()
+        proc.wait()
+    return marks
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+            text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def summarize(runs):
+    summary = {}
+    for key in ("bind_ms", "ready_ms", "predict_ms"):
+        values = [r[key] for r in runs]
+        summary[key] = {"median": statistics.median(values),
+                        "min": min(values), "max": max(values)}
+    phases = {}
+    for r in runs:
+        for p in r["phases"]:
+            phases.setdefault(p["phase"], []).append(p["duration_ms"])
+    summary["phases_median_ms"] = {name: statistics.median(v)
+                                   for name, v in phases.items()}
+    return summary
+
+
+def main(args):
+    with open(os.path.join(ROOT, "test_data_correct.json"), "rb") as f:
+        payload = f.read()
+    record = {"commit": git_commit(), "timestamp": time.time(),
+              "runs": args.runs, "modes": {}}
+    for mode in args.modes:
+        runs = [one_run(mode, payload) for _ in range(args.runs)]
+        summary = record["modes"][mode] = summarize(runs)
+        print(f"{mode:>8}: bind {summary['bind_ms']['median']:7.1f} ms  "
+              f"ready {summary['ready_ms']['median']:7.1f} ms  "
+              f"first predict {summary['predict_ms']['median']:7.1f} ms")
+        print("          " + ", ".join(
+            f"{k} {v:.1f}" for k, v in summary["phases_median_ms"].items()))
+    if args.history:
+        os.makedirs(os.path.dirname(os.path.abspath(args.history)),
+                    exist_ok=True)
+        with open(args.history, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--modes", nargs="+", default=list(MODES),
+                        choices=list(MODES))
+    parser.add_argument("--history",
+                        help="append the result as a JSON line to this file")
+    main(parser.parse_args())
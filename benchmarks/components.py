@@ -0,0 +1,200 @@
+# benchmarks/components.py
+"""Time each stage of the inference pipeline in isolation, without a server.
+
+Components (``--components`` selects a subset):
+
+* ``load_pickle``      - ``joblib.load`` of ``model/model.pkl``
+* ``load_artifact``    - mapping the compiled artifact in ``model/artifact``
+* ``dataframe``        - ``pd.DataFrame(records)`` from request dicts
+* ``transform``        - sklearn ``preprocessor.transform``
+* ``encode_compiled``  - ``CompiledEncoder.transform`` (request dicts)
+* ``encode_columns``   - ``CompiledEncoder.transform_columns`` (arrays)
+* ``predict_proba``    - sklearn forest ``predict_proba`` on encoded rows
+* ``forest_compiled``  - ``CompiledForest.predict_proba``
+* ``flask_predict``    - ``POST /predict`` (one row) or ``/predict/batch``
+  through Flask's test client, as ``tests/test_app.py`` does
+
+Row-dependent components run for every ``--sizes`` batch, built by
+sampling ``datasets/data.csv``.  Each measurement calibrates a loop count
+so one repetition lasts at least ``--min-time`` seconds, runs ``--warmup``
+untimed repetitions, then ``--repeat`` timed ones, and reports the
+min/median/mean/stdev/p95/max time per call and the median per row.
+
+Results are printed as a table and written as JSON (``--output``) or
+appended as one JSON line tagged with the git commit (``--history``).
+
+Usage:
+    python benchmarks/components.py --sizes 1 100 10000 --repeat 7 \\
+        --history benchmarks/results/components.jsonl
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import timeit
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+# Time the scoring path, not the result cache or the file watcher
+os.environ.setdefault("PREDICTION_CACHE_SIZE", "0")
+os.environ.setdefault("MODEL_WATCH_INTERVAL", "0")
+
+from app.artifact import load_artifact  # noqa: E402
+from app.encoder import CompiledEncoder  # noqa: E402
+from app.forest import CompiledForest  # noqa: E402
+from cold_start import git_commit  # noqa: E402
+
+MODEL_PATH = os.path.join("model", "model.pkl")
+ARTIFACT_PATH = os.path.join("model", "artifact")
+SIZES = [1, 10, 100, 1000, 10000, 100000]
+COMPONENTS = ["load_pickle", "load_artifact", "dataframe", "transform",
+              "encode_compiled", "encode_columns", "predict_proba",
+              "forest_compiled", "flask_predict"]
+# Components that do not depend on the batch size
+FIXED = {"load_pickle", "load_artifact"}
+
+
+def measure(fn, repeat, warmup, min_time):
+    """Time ``fn``; return summary statistics in seconds per call."""
+    timer = timeit.Timer(fn)
+    number = 1
+    while True:
+        if timer.timeit(number) >= min_time:
+            break
+        number *= 10 if number < 1000 else 2
+    timer.repeat(warmup, number)
+    times = sorted(t / number for t in timer.repeat(repeat, number))
+    return {
+        "calls_per_repeat": number,
+        "min": times[0],
+        "median": statistics.median(times),
+        "mean": statistics.mean(times),
+        "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "p95": times[int(0.95 * (len(times) - 1))],
+        "max": times[-1],
+    }
+
+
+class Fixtures:
+    """Model, data and client shared by the benchmarks, built once."""
+
+    def __init__(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            self.pipeline = joblib.load(MODEL_PATH)
+        self.preprocessor = self.pipeline.named_steps["preprocessor"]
+        self.clf = self.pipeline.steps[-1][1]
+        self.encoder = CompiledEncoder.from_preprocessor(self.preprocessor)
+        self.forest = CompiledForest.from_estimator(self.clf)
+        df = pd.read_csv(os.path.join("datasets", "data.csv"))
+        self.data = df.drop(columns=["HeartDisease"])
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            import app.app as api
+            api.wait_for_loader()
+            self._client = api.app.test_client()
+        return self._client
+
+    def batch(self, size):
+        """``(records, DataFrame, encoded matrix)`` for ``size`` rows."""
+        frame = self.data.sample(size, replace=True, random_state=size)
+        frame = frame.reset_index(drop=True)
+        return (frame.to_dict(orient="records"), frame,
+                self.preprocessor.transform(frame))
+
+
+def benchmark_fn(name, fx, size):
+    """A zero-argument callable running component ``name``."""
+    if name == "load_pickle":
+        def load():
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                joblib.load(MODEL_PATH)
+        return load
+    if name == "load_artifact":
+        return lambda: load_artifact(ARTIFACT_PATH, verify=False)
+
+    records, frame, X = fx.batch(size)
+    columns = list(frame.columns)
+    if name == "dataframe":
+        return lambda: pd.DataFrame(records, columns=columns)
+    if name == "transform":
+        return lambda: fx.preprocessor.transform(frame)
+    if name == "encode_compiled":
+        return lambda: fx.encoder.transform(records)
+    if name == "encode_columns":
+        arrays = {col: frame[col].to_numpy() for col in columns}
+        return lambda: fx.encoder.transform_columns(arrays)
+    if name == "predict_proba":
+        return lambda: fx.clf.predict_proba(X)
+    if name == "forest_compiled":
+        X = np.ascontiguousarray(X)
+        return lambda: fx.forest.predict_proba(X)
+    if name == "flask_predict":
+        client = fx.client
+        if size == 1:
+            return lambda: client.post("/predict", json=records[0])
+        return lambda: client.post("/predict/batch", json=records)
+    raise ValueError(f"Unknown component {name!r}")
+
+
+def main(args):
+    fx = Fixtures()
+    results = []
+    print(f"{'component':>16} {'rows':>7} {'median':>11} {'p95':>11} "
+          f"{'stdev':>10} {'per row':>10}")
+    for name in args.components:
+        for size in ([None] if name in FIXED else args.sizes):
+            fn = benchmark_fn(name, fx, size or 1)
+            stats = measure(fn, args.repeat, args.warmup, args.min_time)
+            if size:
+                stats["per_row_median"] = stats["median"] / size
+            results.append({"component": name, "rows": size, **stats})
+            per_row = (f"{stats['per_row_median'] * 1e6:8.2f}us"
+                       if size else "")
+            print(f"{name:>16} {size or '-':>7} "
+                  f"{stats['median'] * 1e3:9.3f}ms "
+                  f"{stats['p95'] * 1e3:9.3f}ms "
+                  f"{stats['stdev'] * 1e3:8.3f}ms {per_row:>10}")
+
+    record = {
+        "commit": git_commit(),
+        "timestamp": time.time(),
+        "config": {"repeat": args.repeat, "warmup": args.warmup,
+                   "min_time": args.min_time},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(record, f, indent=2)
+    if args.history:
+        os.makedirs(os.path.dirname(os.path.abspath(args.history)),
+                    exist_ok=True)
+        with open(args.history, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--components", nargs="+", default=COMPONENTS,
+                        choices=COMPONENTS)
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--min-time", type=float, default=0.05,
+                        help="minimum seconds per timed repetition")
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--history",
+                        help="append the results as a JSON line to this file")
+    main(parser.parse_args())
@@ -0,0 +1,313 @@
+# benchmarks/loadtest.py
+"""Load-test a running API and catch latency / throughput regressions.
+
+``run`` replays request bodies sampled from ``datasets/data.csv`` against a
+server in one of two modes:
+
+* ``closed`` - ``--concurrency`` clients each send a request, wait for the
+  answer and immediately send the next; throughput is whatever the server
+  sustains.
+* ``open``   - requests are released on a Poisson schedule at ``--rps``
+  regardless of how fast answers come back (at most ``--concurrency`` in
+  flight).  Latency is measured from each request's scheduled start, so
+  queueing behind a slow server is counted instead of hidden.
+
+It reports throughput, p50/p95/p99/max latency and errors by status, and
+``--save`` writes the result as a JSON baseline tagged with the current git
+commit.  ``--baseline`` (or the ``compare`` command on two saved files)
+flags throughput drops and tail-latency increases beyond the thresholds and
+exits with status 1.
+
+Usage:
+    python benchmarks/loadtest.py run --url http://127.0.0.1:5000 \\
+        --mode open --rps 500 --duration 30 --save baseline.json
+    python benchmarks/loadtest.py run --baseline baseline.json
+    python benchmarks/loadtest.py compare baseline.json current.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+import pandas as pd
+
+from cold_start import git_commit
+from serving import Connection
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Metrics compared against a baseline and the direction that is worse
+CHECKS = {
+    "rps": "lower",
+    "p95_ms": "higher",
+    "p99_ms": "higher",
+}
+
+
+def sample_payloads(n, batch_size, seed):
+    """``n`` JSON request bodies of ``batch_size`` records from the data."""
+    df = pd.read_csv(os.path.join(ROOT, "datasets", "data.csv"))
+    df = df.drop(columns=["HeartDisease"])
+    records = df.to_dict(orient="records")
+    rng = random.Random(seed)
+    payloads = []
+    for _ in range(n):
+        batch = rng.choices(records, k=batch_size)
+        body = batch[0] if batch_size == 1 else batch
+        payloads.append(json.dumps(body).encode())
+    return payloads
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    return sorted_values[int(q * (len(sorted_values) - 1))]
+
+
+class Recorder:
+    """Collects latencies and outcomes between ``start`` and ``stop``."""
+
+    def __init__(self):
+        self.latencies = []
+        self.statuses = Counter()
+        self.recording = False
+        self.started = self.stopped = None
+
+    def start(self):
+        self.latencies.clear()
+        self.statuses.clear()
+        self.recording = True
+        self.started = time.perf_counter()
+
+    def stop(self):
+        self.recording = False
+        self.stopped = time.perf_counter()
+
+    def record(self, status, latency):
+        if not self.recording:
+            return
+        self.statuses[status] += 1
+        if status == 200:
+            self.latencies.append(latency)
+
+    def summary(self):
+        elapsed = self.stopped - self.started
+        latencies = sorted(s * 1000.0 for s in self.latencies)
+        errors = sum(n for status, n in self.statuses.items()
+                     if status != 200)
+        return {
+            "requests": sum(self.statuses.values()),
+            "ok": len(latencies),
+            "errors": errors,
+            "errors_by_status": {str(k): v for k, v in
+                                 sorted(self.statuses.items(),
+                                        key=lambda kv: str(kv[0]))
+                                 if k != 200},
+            "duration_s": elapsed,
+            "rps": len(latencies) / elapsed if elapsed else 0.0,
+            "p50_ms": percentile(latencies, 0.50),
+            "p95_ms": percentile(latencies, 0.95),
+            "p99_ms": percentile(latencies, 0.99),
+            "max_ms": latencies[-1] if latencies else None,
+        }
+
+
+async def send(conn, payload, recorder, scheduled):
+    try:
+        status = await conn.request(payload)
+    except (OSError, asyncio.IncompleteReadError):
+        conn.close()
+        status = "connection_error"
+    recorder.record(status, time.perf_counter() - scheduled)
+
+
+async def closed_loop(connect, payloads, concurrency, deadline, recorder):
+    async def client(seed):
+        rng = random.Random(seed)
+        conn = connect()
+        while time.perf_counter() < deadline:
+            await send(conn, rng.choice(payloads), recorder,
+                       time.perf_counter())
+        conn.close()
+
+    await asyncio.gather(*(client(i) for i in range(concurrency)))
+
+
+async def open_loop(connect, payloads, concurrency, rps, deadline,
+                    recorder):
+    idle = asyncio.Queue()
+    for _ in range(concurrency):
+        idle.put_nowait(connect())
+    rng = random.Random(0)
+    tasks = set()
+
+    async def one(scheduled):
+        conn = await idle.get()
+        try:
+            await send(conn, rng.choice(payloads), recorder, scheduled)
+        finally:
+            idle.put_nowait(conn)
+
+    scheduled = time.perf_counter()
+    while scheduled < deadline:
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        task = asyncio.ensure_future(one(scheduled))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        scheduled += rng.expovariate(rps)
+    if tasks:
+        await asyncio.gather(*tasks)
+    while not idle.empty():
+        idle.get_nowait().close()
+
+
+async def load(args, payloads):
+    url = urlsplit(args.url)
+    host, port = url.hostname or "127.0.0.1", url.port or 80
+
+    def connect():
+        return Connection(port, host=host, path=args.path)
+
+    recorder = Recorder()
+    warmup_end = time.perf_counter() + args.warmup
+    deadline = warmup_end + args.duration
+    loop = asyncio.get_running_loop()
+    loop.call_at(loop.time() + args.warmup, recorder.start)
+    if args.mode == "closed":
+        await closed_loop(connect, payloads, args.concurrency, deadline,
+                          recorder)
+    else:
+        await open_loop(connect, payloads, args.concurrency, args.rps,
+                        deadline, recorder)
+    recorder.stop()
+    return recorder.summary()
+
+
+def compare(baseline, current, rps_threshold, latency_threshold):
+    """Return regression messages for ``current`` against ``baseline``.
+
+    Thresholds are fractions: 0.1 flags a 10% throughput drop and 0.2 a
+    20% increase in p95 or p99 latency.
+    """
+    problems = []
+    for key, worse in CHECKS.items():
+        before, after = baseline["result"][key], current["result"][key]
+        if not before or after is None:
+            continue
+        change = (after - before) / before
+        threshold = rps_threshold if key == "rps" else latency_threshold
+        if (worse == "lower" and change < -threshold) or \
+                (worse == "higher" and change > threshold):
+            problems.append(f"{key} {before:.2f} -> {after:.2f} "
+                            f"({change:+.0%}, threshold "
+                            f"{threshold:.0%})")
+    return problems
+
+
+def print_result(record):
+    r = record["result"]
+    print(f"{record['config']['mode']} loop, {r['requests']} requests in "
+          f"{r['duration_s']:.1f}s: {r['rps']:.1f} req/s ok, "
+          f"{r['errors']} errors {r['errors_by_status'] or ''}")
+    if r["ok"]:
+        print(f"latency ms: p50 {r['p50_ms']:.2f}  p95 {r['p95_ms']:.2f}  "
+              f"p99 {r['p99_ms']:.2f}  max {r['max_ms']:.2f}")
+
+
+def report(baseline, record, args):
+    problems = compare(baseline, record, args.rps_threshold,
+                       args.latency_threshold)
+    label = baseline.get("commit") or "baseline"
+    differs = [k for k in ("path", "mode", "concurrency", "rps",
+                           "batch_size")
+               if baseline["config"].get(k) != record["config"].get(k)]
+    if differs:
+        print(f"warning: {label} used a different {', '.join(differs)}; "
+              f"the comparison may not be meaningful")
+    if problems:
+        print(f"REGRESSION vs {label}:")
+        for problem in problems:
+            print(f"  {problem}")
+        return 1
+    print(f"No regression vs {label}.")
+    return 0
+
+
+def run(args):
+    if args.mode == "open" and not args.rps:
+        sys.exit("--mode open needs --rps")
+    payloads = sample_payloads(args.payloads, args.batch_size, args.seed)
+    result = asyncio.run(load(args, payloads))
+    config = {k: getattr(args, k) for k in
+              ("url", "path", "mode", "concurrency", "rps", "duration",
+               "batch_size")}
+    record = {"commit": git_commit(), "timestamp": time.time(),
+              "config": config, "result": result}
+    print_result(record)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(record, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            return report(json.load(f), record, args)
+    return 0
+
+
+def compare_files(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    print_result(current)
+    return report(baseline, current, args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="load-test a server")
+    run_parser.add_argument("--url", default="http://127.0.0.1:5000")
+    run_parser.add_argument("--path", default="/predict",
+                            choices=["/predict", "/predict/batch"])
+    run_parser.add_argument("--batch-size", type=int, default=1,
+                            help="records per request (/predict/batch)")
+    run_parser.add_argument("--mode", choices=["closed", "open"],
+                            default="closed")
+    run_parser.add_argument("--concurrency", type=int, default=16,
+                            help="clients (closed) or max in flight (open)")
+    run_parser.add_argument("--rps", type=float,
+                            help="target request rate for --mode open")
+    run_parser.add_argument("--duration", type=float, default=10.0)
+    run_parser.add_argument("--warmup", type=float, default=2.0)
+    run_parser.add_argument("--payloads", type=int, default=1000,
+                            help="distinct request bodies to sample")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--save", help="write the result as JSON")
+    run_parser.add_argument("--baseline",
+                            help="compare against this saved result")
+
+    compare_parser = commands.add_parser(
+        "compare", help="compare two saved results")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+
+    for sub in (run_parser, compare_parser):
+        sub.add_argument("--rps-threshold", type=float, default=0.10,
+                         help="allowed fractional throughput drop")
+        sub.add_argument("--latency-threshold", type=float, default=0.20,
+                         help="allowed fractional p95/p99 increase")
+
+    args = parser.parse_args()
+    if args.command == "compare":
+        sys.exit(compare_files(args))
+    if args.path == "/predict" and args.batch_size != 1:
+        parser.error("--batch-size needs --path /predict/batch")
+    sys.exit(run(args))
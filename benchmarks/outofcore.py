@@ -0,0 +1,156 @@
+# benchmarks/outofcore.py
+"""Peak memory and throughput of out-of-core training by dataset size.
+
+For every ``--sizes`` row count, synthetic CSV shards of ``--shard-rows``
+rows are generated once under ``--workdir``, by resampling
+``datasets/data.csv`` rows and jittering their numeric features.  The
+original 918-row file is used as is for its own size.  Each size is then
+trained with ``train.py --shards`` in a fresh process, which reports the
+sampling throughput, fit time, accuracy and the peak resident memory of
+the parent and of its largest worker.
+
+``--in-memory`` also measures ``pd.read_csv`` of all shards at once (what
+``train.py --data`` does), for sizes up to ``--in-memory-max-rows``, to
+show the memory the out-of-core path avoids.  Synthetic rows are jittered
+copies of real ones, so near-duplicates land on both sides of the split and
+the reported accuracy is optimistic; the numbers of interest are memory and
+throughput.
+
+Usage:
+    python benchmarks/outofcore.py --sizes 918 1000000 10000000 \\
+        --workers 8 --in-memory --output outofcore.json
+    python benchmarks/outofcore.py --sizes 100000000 --shard-rows 5000000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA = os.path.join(ROOT, "datasets", "data.csv")
+SIZES = [918, 100_000, 1_000_000, 10_000_000]
+
+IN_MEMORY = """
+import glob, resource, sys, time
+import pandas as pd
+start = time.perf_counter()
+df = pd.concat([pd.read_csv(p) for p in sorted(glob.glob(sys.argv[1]))])
+print(len(df), time.perf_counter() - start,
+      resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+"""
+
+
+def generate(size, workdir, shard_rows, seed=0):
+    """Directory of CSV shards holding ``size`` rows (reused if present)."""
+    source = pd.read_csv(DATA)
+    if size == len(source):
+        return os.path.dirname(DATA), os.path.basename(DATA)
+    directory = os.path.join(workdir, f"rows-{size}")
+    done = os.path.join(directory, "DONE")
+    if os.path.exists(done):
+        return directory, "*.csv"
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    numeric = source.select_dtypes("number").columns.drop("HeartDisease")
+    spread = source[numeric].std() * 0.05
+    written = 0
+    for shard, start in enumerate(range(0, size, shard_rows)):
+        n = min(shard_rows, size - start)
+        rows = source.iloc[rng.integers(0, len(source), n)]
+        rows = rows.reset_index(drop=True)
+        for col in numeric:
+            jitter = rng.normal(0.0, spread[col], n)
+            values = rows[col] + jitter
+            # Keep integer columns integral and Oldpeak at one decimal
+            rows[col] = (values.round().astype(source[col].dtype)
+                         if source[col].dtype.kind == "i"
+                         else values.round(1))
+        rows.to_csv(os.path.join(directory, f"shard-{shard:05d}.csv"),
+                    index=False)
+        written += n
+    with open(done, "w") as f:
+        f.write(str(written))
+    return directory, "*.csv"
+
+
+def measure(pattern, args):
+    with tempfile.TemporaryDirectory() as cwd:
+        report = os.path.join(cwd, "report.json")
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, os.path.join(ROOT, "train.py"),
+             "--shards", pattern, "--sample-rows", str(args.sample_rows),
+             "--chunk-rows", str(args.chunk_rows),
+             "--workers", str(args.workers), "--report", report],
+            cwd=cwd, check=True, stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL)
+        wall = time.perf_counter() - start
+        with open(report) as f:
+            result = json.load(f)
+    result["wall_s"] = wall
+    return result
+
+
+def measure_in_memory(pattern):
+    out = subprocess.run([sys.executable, "-c", IN_MEMORY, pattern],
+                         check=True, capture_output=True, text=True)
+    rows, seconds, peak = out.stdout.split()
+    return {"rows": int(rows), "read_s": float(seconds),
+            "peak_rss_mb": float(peak)}
+
+
+def main(args):
+    os.makedirs(args.workdir, exist_ok=True)
+    results = []
+    print(f"{'rows':>11} {'MiB':>8} {'sample':>8} {'rows/s':>11} "
+          f"{'sample s':>9} {'fit s':>7} {'peak MiB':>9} {'worker':>7} "
+          f"{'acc':>6} {'in-mem MiB':>11}")
+    for size in args.sizes:
+        directory, pattern = generate(size, args.workdir, args.shard_rows)
+        pattern = os.path.join(directory, pattern)
+        result = measure(pattern, args)
+        in_memory = None
+        if args.in_memory and size <= args.in_memory_max_rows:
+            in_memory = measure_in_memory(pattern)
+        result["in_memory"] = in_memory
+        results.append(result)
+        in_mem = (f"{in_memory['peak_rss_mb']:.0f}" if in_memory
+                  else "-")
+        print(f"{result['rows']:11,d} {result['bytes'] / (1 << 20):8.1f} "
+              f"{result['train_rows'] + result['test_rows']:8d} "
+              f"{result['rows_per_s']:11,.0f} {result['sample_s']:9.2f} "
+              f"{result['fit_s']:7.2f} {result['peak_rss_mb']:9.0f} "
+              f"{result['worker_peak_rss_mb']:7.0f} "
+              f"{result['accuracy']:6.3f} "
+              f"{in_mem:>11}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"config": {k: getattr(args, k) for k in
+                                  ("sample_rows", "chunk_rows", "workers",
+                                   "shard_rows")},
+                       "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--shard-rows", type=int, default=1_000_000)
+    parser.add_argument("--sample-rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-rows", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--workdir",
+                        default=os.path.join(tempfile.gettempdir(),
+                                             "outofcore-bench"),
+                        help="where generated shards are kept between runs")
+    parser.add_argument("--in-memory", action="store_true",
+                        help="also measure reading every shard at once")
+    parser.add_argument("--in-memory-max-rows", type=int,
+                        default=10_000_000)
+    parser.add_argument("--output", help="write the results as JSON")
+    main(parser.parse_args())
@@ -0,0 +1,179 @@
+# benchmarks/serving.py
+"""Compare the Flask dev server with the asyncio (ASGI) serving mode.
+
+Each server is started as a subprocess, optionally saddled with a number of
+idle keep-alive connections, then driven by concurrent keep-alive clients
+posting ``test_data_correct.json`` to ``/predict``.
+
+Usage:
+    python benchmarks/serving.py --concurrency 32 --duration 10 --idle 1000
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVERS = {
+    "flask": [sys.executable, "app/app.py"],
+    "asgi": [sys.executable, "-m", "app.asgi"],
+}
+
+
+def start_server(name, port):
+    env = dict(os.environ, PORT=str(port))
+    proc = subprocess.Popen(SERVERS[name], cwd=ROOT, env=env,
+                            stdout=subprocess.DEVNULL,
+                            stderr=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1)
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError(f"{name} server did not start on port {port}")
+
+
+class Connection:
+    """Minimal HTTP/1.1 client that reconnects when the server closes."""
+
+    def __init__(self, port, host="127.0.0.1", path="/predict",
+                 content_type="application/json"):
+        self.port = port
+        self.host = host
+        self.head = (f"POST {path} HTTP/1.1\r\nHost: {host}\r\n"
+                     f"Content-Type: {content_type}\r\n").encode()
+        self.reader = self.writer = None
+
+    async def request(self, payload):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(
+                self.host, self.port)
+        self.writer.write(
+            self.head
+            + f"Content-Length: {len(payload)}\r\n\r\n".encode() + payload)
+        await self.writer.drain()
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        status_line, *lines = head.decode("latin-1").split("\r\n")
+        headers = {}
+        for line in lines:
+            if ":" in line:
+                key, value = line.split(":", 1)
+                headers[key.strip().lower()] = value.strip()
+        if "content-length" in headers:
+            await self.reader.readexactly(int(headers["content-length"]))
+        else:
+            await self.reader.read()
+        if status_line.startswith("HTTP/1.0") or \
+                headers.get("connection", "").lower() == "close":
+            self.close()
+        return int(status_line.split()[1])
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+async def drive(port, payload, concurrency, duration):
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+
+    async def client():
+        nonlocal errors
+        conn = Connection(port)
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                status = await conn.request(payload)
+            except (OSError, asyncio.IncompleteReadError):
+                conn.close()
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors += 1
+        conn.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+async def open_idle(port, count):
+    conns = []
+    for _ in range(count):
+        try:
+            conns.append(await asyncio.open_connection("127.0.0.1", port))
+        except OSError:
+            break
+    return conns
+
+
+async def bench(name, port, args):
+    payload = json.dumps(json.load(open(
+        os.path.join(ROOT, "test_data_correct.json")))).encode()
+    idle = await open_idle(port, args.idle)
+    await drive(port, payload, args.concurrency, 1.0)  # warm-up
+    latencies, errors, elapsed = await drive(port, payload,
+                                             args.concurrency,
+                                             args.duration)
+    for _, writer in idle:
+        writer.close()
+    latencies.sort()
+
+    def pct(q):
+        return latencies[int(q * (len(latencies) - 1))] * 1000.0
+
+    return {
+        "server": name,
+        "concurrency": args.concurrency,
+        "idle_connections": len(idle),
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": pct(0.50) if latencies else None,
+        "p99_ms": pct(0.99) if latencies else None,
+        "mean_ms": (statistics.mean(latencies) * 1000.0
+                    if latencies else None),
+    }
+
+
+def main(args):
+    results = []
+    for i, name in enumerate(args.servers):
+        port = args.port + i
+        proc = start_server(name, port)
+        try:
+            results.append(asyncio.run(bench(name, port, args)))
+        finally:
+            proc.terminate()
+            proc.wait()
+    for r in results:
+        print(f"{r['server']:>6}: {r['rps']:8.1f} req/s  "
+              f"p50 {r['p50_ms']:.2f} ms  p99 {r['p99_ms']:.2f} ms  "
+              f"errors {r['errors']}  idle {r['idle_connections']}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--servers", nargs="+", default=list(SERVERS),
+                        choices=list(SERVERS))
+    parser.add_argument("--port", type=int, default=5100)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--idle", type=int, default=0,
+                        help="idle keep-alive connections held open")
+    parser.add_argument("--output", help="write results as JSON")
+    main(parser.parse_args())
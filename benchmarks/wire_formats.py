@@ -0,0 +1,116 @@
+# benchmarks/wire_formats.py
+"""Compare the prediction wire formats: bytes on the wire and server CPU.
+
+For each format and batch size a request body is built from
+``datasets/data.csv`` and pushed through ``app.handle_prediction`` - the
+same decode / validate / encode / score / serialise path both servers use -
+in-process, so socket and HTTP overhead do not blur the comparison.
+Reported per format:
+
+* ``req B/row`` and ``resp B/row`` - request and response body bytes per row
+* ``CPU us/row`` - server process CPU time per row (median of ``--repeat``)
+* the share of that time spent in parse and serialise
+
+Usage:
+    python benchmarks/wire_formats.py --rows 1 100 1000 --repeat 20
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+# Measure the encode/score path, not the result cache
+os.environ.setdefault("PREDICTION_CACHE_SIZE", "0")
+os.environ.setdefault("MODEL_WATCH_INTERVAL", "0")
+
+import app.app as api  # noqa: E402
+from app import wire  # noqa: E402
+from app.metrics import StageTimer  # noqa: E402
+
+FORMATS = {
+    "json": wire.JSON,
+    "msgpack": wire.MSGPACK,
+    "columnar": wire.COLUMNAR_JSON,
+    "arrow": wire.ARROW,
+}
+
+
+def request_body(media, records):
+    if media in wire.COLUMNAR:
+        columns = {name: [r[name] for r in records] for name in records[0]}
+        if media == wire.ARROW:
+            return wire.encode_arrow_request(columns)
+        return json.dumps(columns).encode()
+    data = records[0] if len(records) == 1 else records
+    if media == wire.MSGPACK:
+        return wire.msgpack.packb(data)
+    return json.dumps(data).encode()
+
+
+def measure(media, records, repeat):
+    batch = len(records) > 1
+    body = request_body(media, records)
+    cpu, parse, serialize = [], [], []
+    for _ in range(repeat):
+        timer = StageTimer()
+        start = time.process_time()
+        out, status, _ = api.handle_prediction(batch, body, media, media,
+                                               timer)
+        cpu.append(time.process_time() - start)
+        parse.append(timer.stages.get("parse", 0.0))
+        serialize.append(timer.stages.get("serialize", 0.0))
+        assert status == 200, out
+    n = len(records)
+    total = sum(timer.stages.values()) or 1.0
+    return {
+        "request_bytes_per_row": len(body) / n,
+        "response_bytes_per_row": len(out) / n,
+        "cpu_us_per_row": statistics.median(cpu) / n * 1e6,
+        "parse_share": statistics.median(parse) / total,
+        "serialize_share": statistics.median(serialize) / total,
+    }
+
+
+def main(args):
+    api.wait_for_loader()
+    df = pd.read_csv(os.path.join(ROOT, "datasets", "data.csv"))
+    df = df.drop(columns=[api.metadata["target"]])
+    formats = [f for f in args.formats
+               if FORMATS[f] in wire.available_formats()]
+    results = {}
+    for rows in args.rows:
+        sample = df.sample(rows, replace=True, random_state=0)
+        records = sample.to_dict(orient="records")
+        print(f"\n{rows} row(s)")
+        print(f"{'format':>10} {'req B/row':>10} {'resp B/row':>11} "
+              f"{'CPU us/row':>11} {'parse':>6} {'serial':>7}")
+        for name in formats:
+            # One warm-up call keeps first-use costs out of the numbers
+            measure(FORMATS[name], records, 1)
+            r = measure(FORMATS[name], records, args.repeat)
+            results.setdefault(str(rows), {})[name] = r
+            print(f"{name:>10} {r['request_bytes_per_row']:10.1f} "
+                  f"{r['response_bytes_per_row']:11.1f} "
+                  f"{r['cpu_us_per_row']:11.1f} "
+                  f"{r['parse_share']:6.0%} {r['serialize_share']:7.0%}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+",
+                        default=[1, 100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--formats", nargs="+", default=list(FORMATS),
+                        choices=list(FORMATS))
+    parser.add_argument("--json", help="also write the results to this file")
+    main(parser.parse_args())
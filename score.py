@@ -0,0 +1,219 @@
+# score.py
+"""Offline batch scoring of CSV extracts shaped like ``datasets/data.csv``.
+
+The model and metadata are loaded once in the parent; workers are forked
+from it and share the fitted pipeline copy-on-write.  Inputs are read in
+``--chunk-rows`` chunks, scored across a process pool and written back in
+input order as CSV or Parquet with one ``probability_<class>`` column per
+class.
+
+Every scored chunk is first written to ``<output>.parts/`` and renamed into
+place, so an interrupted run can be restarted with ``--resume`` and only the
+missing chunks are scored again.  The parts are merged into ``--output``
+and removed once every chunk is done.
+
+Usage:
+    python score.py datasets/data.csv --output predictions.csv \\
+        --workers 8 --chunk-rows 50000 --resume
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+
+import joblib
+import pandas as pd
+
+from app.artifact import sha256_file
+
+MANIFEST = "manifest.json"
+
+# Set in the parent before forking, or by _init_worker under spawn
+_pipeline = None
+
+
+def _init_worker(model_path):
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = joblib.load(model_path)
+
+
+def probability_columns(classes):
+    return [f"probability_{c}" for c in classes]
+
+
+def output_columns(classes, id_column=None):
+    return ([id_column or "row", "prediction"]
+            + probability_columns(classes))
+
+
+def score_chunk(task):
+    """Score one chunk and atomically write it to its part file.
+
+    ``task`` is ``(chunk, first_row, features, id_column, part_path)``;
+    returns the number of rows written.
+    """
+    chunk, first_row, features, id_column, part_path = task
+    proba = _pipeline.predict_proba(chunk[features])
+    classes = _pipeline.classes_
+    out = pd.DataFrame(proba, columns=probability_columns(classes))
+    out.insert(0, "prediction", classes[proba.argmax(axis=1)])
+    if id_column:
+        out.insert(0, id_column, chunk[id_column].to_numpy())
+    else:
+        out.insert(0, "row", range(first_row, first_row + len(chunk)))
+    tmp = part_path + ".tmp"
+    out.to_csv(tmp, index=False, header=False)
+    os.replace(tmp, part_path)
+    return len(out)
+
+
+def read_chunks(inputs, metadata, chunk_rows, id_column=None):
+    """Yield ``(chunk, first_row)`` across all inputs, in order."""
+    features = metadata["feature_names"]
+    usecols = features + ([id_column] if id_column else [])
+    dtype = {c: str for c in metadata.get("categorical", [])}
+    first_row = 0
+    for path in inputs:
+        header = pd.read_csv(path, nrows=0).columns
+        missing = [c for c in usecols if c not in header]
+        if missing:
+            raise SystemExit(f"{path}: missing columns {missing}")
+        for chunk in pd.read_csv(path, usecols=usecols, dtype=dtype,
+                                 chunksize=chunk_rows):
+            yield chunk, first_row
+            first_row += len(chunk)
+
+
+def part_path(parts_dir, index):
+    return os.path.join(parts_dir, f"part-{index:06d}.csv")
+
+
+def prepare_parts(parts_dir, run, resume):
+    """Create ``parts_dir`` for ``run``, reusing it when resuming.
+
+    A leftover directory is only reused when it was written for the same
+    inputs, chunk size and model; otherwise the run starts from scratch.
+    """
+    manifest_path = os.path.join(parts_dir, MANIFEST)
+    if resume and os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            if json.load(f) == run:
+                return True
+        print(f"{parts_dir} was written by a different run; "
+              f"starting over.", file=sys.stderr)
+    shutil.rmtree(parts_dir, ignore_errors=True)
+    os.makedirs(parts_dir)
+    with open(manifest_path, "w") as f:
+        json.dump(run, f, indent=2)
+    return False
+
+
+def merge_parts(parts_dir, n_parts, output, columns, fmt):
+    """Concatenate the part files, in order, into ``output``."""
+    tmp = output + ".tmp"
+    if fmt == "csv":
+        with open(tmp, "wb") as out:
+            out.write((",".join(columns) + "\n").encode())
+            for index in range(n_parts):
+                with open(part_path(parts_dir, index), "rb") as part:
+                    shutil.copyfileobj(part, out)
+    else:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet output requires pyarrow; "
+                             "install it or use --format csv")
+        writer = None
+        for index in range(n_parts):
+            part = pd.read_csv(part_path(parts_dir, index), header=None,
+                               names=columns)
+            table = pa.Table.from_pandas(part, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(tmp, table.schema)
+            writer.write_table(table)
+        if writer is not None:
+            writer.close()
+    os.replace(tmp, output)
+
+
+def main(args):
+    start = time.perf_counter()
+    with open(args.meta) as f:
+        metadata = json.load(f)
+    global _pipeline
+    _pipeline = joblib.load(args.model)
+    classes = [c.item() if hasattr(c, "item") else c
+               for c in _pipeline.classes_]
+    fmt = args.format or (
+        "parquet" if args.output.endswith(".parquet") else "csv")
+    columns = output_columns(classes, args.id_column)
+
+    parts_dir = args.output + ".parts"
+    run = {
+        "inputs": [os.path.abspath(p) for p in args.inputs],
+        "chunk_rows": args.chunk_rows,
+        "id_column": args.id_column,
+        "model_sha256": sha256_file(args.model),
+    }
+    resumed = prepare_parts(parts_dir, run, args.resume)
+
+    methods = multiprocessing.get_all_start_methods()
+    ctx = multiprocessing.get_context(
+        "fork" if "fork" in methods else None)
+    window = 2 * args.workers
+    pending = []
+    n_parts = n_rows = n_scored = 0
+    with ctx.Pool(args.workers, initializer=_init_worker,
+                  initargs=(args.model,)) as pool:
+        for chunk, first_row in read_chunks(args.inputs, metadata,
+                                            args.chunk_rows,
+                                            args.id_column):
+            path = part_path(parts_dir, n_parts)
+            n_parts += 1
+            n_rows += len(chunk)
+            if resumed and os.path.exists(path):
+                continue
+            # Bound the number of chunks held in memory at once
+            while len(pending) >= window:
+                n_scored += pending.pop(0).get()
+            pending.append(pool.apply_async(
+                score_chunk, ((chunk, first_row, metadata["feature_names"],
+                               args.id_column, path),)))
+        for result in pending:
+            n_scored += result.get()
+
+    merge_parts(parts_dir, n_parts, args.output, columns, fmt)
+    shutil.rmtree(parts_dir)
+
+    elapsed = time.perf_counter() - start
+    print(f"Scored {n_scored} of {n_rows} rows "
+          f"({n_rows - n_scored} resumed) in {n_parts} chunks with "
+          f"{args.workers} workers: {elapsed:.2f}s, "
+          f"{n_scored / elapsed if elapsed else 0:,.0f} rows/sec "
+          f"-> {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("inputs", nargs="+", help="CSV files to score")
+    parser.add_argument("--output", required=True,
+                        help="output .csv or .parquet file")
+    parser.add_argument("--format", choices=["csv", "parquet"],
+                        help="default: inferred from --output")
+    parser.add_argument("--model", default="model/model.pkl")
+    parser.add_argument("--meta", default="model/metadata.json")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-rows", type=int, default=50000)
+    parser.add_argument("--id-column",
+                        help="copy this input column to the output "
+                             "instead of a row number")
+    parser.add_argument("--resume", action="store_true",
+                        help="reuse chunks already scored by an "
+                             "interrupted run")
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,80 @@
+import os
+import sys
+import threading
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.admission import AdmissionController  # noqa: E402
+
+
+class TestAdmissionController:
+    """Test cases for bounded admission and the adaptive limit"""
+
+    def test_rejects_when_queue_is_full(self):
+        """Test requests past the limit and queue are rejected at once"""
+        ctl = AdmissionController(max_in_flight=2, max_queue=0)
+        assert ctl.acquire() and ctl.acquire()
+        start = time.perf_counter()
+        assert not ctl.acquire()
+        assert time.perf_counter() - start < 0.05
+        assert ctl.stats()["rejected"] == 1
+
+    def test_queued_request_times_out(self):
+        """Test a queued request gives up after the queue timeout"""
+        ctl = AdmissionController(max_in_flight=1, max_queue=1,
+                                  queue_timeout_ms=20)
+        assert ctl.acquire()
+        assert not ctl.acquire()
+        assert ctl.stats()["timed_out"] == 1
+
+    def test_queued_request_gets_freed_slot(self):
+        """Test a queued request is admitted when a slot frees up"""
+        ctl = AdmissionController(max_in_flight=1, max_queue=1,
+                                  queue_timeout_ms=5000)
+        assert ctl.acquire()
+        result = []
+        waiter = threading.Thread(target=lambda: result.append(
+            ctl.acquire()))
+        waiter.start()
+        while ctl.stats()["queued"] == 0:
+            time.sleep(0.001)
+        ctl.release()
+        waiter.join()
+        assert result == [True]
+        assert ctl.stats()["in_flight"] == 1
+
+    def test_limit_shrinks_when_latency_exceeds_target(self):
+        """Test slow windows cut the limit multiplicatively"""
+        ctl = AdmissionController(max_in_flight=10, target_ms=50,
+                                  window=4, min_limit=2)
+        for _ in range(4):
+            ctl.acquire()
+        for _ in range(4):
+            ctl.release(0.2)
+        assert ctl.limit == 9
+        for _ in range(20):
+            for _ in range(4):
+                ctl.acquire()
+            for _ in range(4):
+                ctl.release(0.2)
+        assert ctl.limit == 2
+
+    def test_limit_grows_when_saturated_and_fast(self):
+        """Test fast windows that hit the limit raise it"""
+        ctl = AdmissionController(max_in_flight=4, target_ms=50, window=4,
+                                  max_limit=6)
+        for _ in range(4):
+            ctl.acquire()
+        for _ in range(4):
+            ctl.release(0.001)
+        assert ctl.limit == 6
+
+    def test_unsaturated_limit_stays(self):
+        """Test fast windows below the limit leave it unchanged"""
+        ctl = AdmissionController(max_in_flight=4, target_ms=50, window=2)
+        for _ in range(2):
+            ctl.acquire()
+            ctl.release(0.001)
+        assert ctl.limit == 4
@@ -55,6 +55,18 @@ class TestHeartDiseaseAPI:
         assert "error" in data
         assert "Missing features" in data["error"]
     
+    def test_predict_endpoint_wrong_types(self):
+        """Test /predict rejects values /predict/batch rejects"""
+        with open("test_data_correct.json") as f:
+            sample = json.load(f)
+        for feat, value in (("Sex", 1), ("Cholesterol", "high")):
+            record = dict(sample, **{feat: value})
+            response = self.client.post("/predict", json=record)
+            assert response.status_code == 400
+            batch = self.client.post("/predict/batch", json=[record])
+            assert response.get_json()["error"] == \
+                batch.get_json()["results"][0]["error"]
+
     def test_predict_endpoint_invalid_json(self):
         """Test prediction endpoint with invalid JSON"""
         response = self.client.post("/predict", 
@@ -103,6 +115,351 @@ class TestHeartDiseaseAPI:
             assert 0 <= prob <= 1
 
 
+class TestBatchPredictAPI:
+    """Test cases for the vectorized /predict/batch endpoint"""
+
+    def setup_method(self):
+        """Set up test client and a valid sample record"""
+        self.client = app.test_client()
+        with open("test_data_correct.json") as f:
+            self.sample = json.load(f)
+
+    def test_batch_matches_single_predictions(self):
+        """Test batch results equal one-by-one /predict results"""
+        records = [dict(self.sample, Age=age) for age in (30, 50, 70)]
+        response = self.client.post("/predict/batch",
+                                    json={"records": records})
+        assert response.status_code == 200
+
+        data = json.loads(response.data)
+        assert data["n_success"] == 3
+        assert data["n_errors"] == 0
+        for record, result in zip(records, data["results"]):
+            single = json.loads(self.client.post("/predict", json=record).data)
+            assert result["prediction"] == single["prediction"]
+            assert result["probabilities"] == single["probabilities"]
+
+    def test_missing_value_independent_of_batch_size(self):
+        """Test a NaN feature scores the same on the compiled and sklearn
+        paths, i.e. alone and in a large batch"""
+        record = dict(self.sample, Age=float("nan"))
+        single = json.loads(self.client.post("/predict", json=record).data)
+        batch = json.loads(self.client.post(
+            "/predict/batch", json=[record] * 300).data)
+        assert batch["results"][0]["probabilities"] == \
+            single["probabilities"]
+
+    def test_infinite_value_is_row_error(self):
+        """Test an infinite or overflowing value fails only its own row,
+        on the sklearn path (large batch) as on the compiled one"""
+        for bad in ("inf", 1e300, 10 ** 400):
+            records = [self.sample] * 299 + [dict(self.sample, Age=bad)]
+            for batch in (records, records[-3:]):
+                response = self.client.post("/predict/batch", json=batch)
+                assert response.status_code == 200
+                data = json.loads(response.data)
+                assert data["n_errors"] == 1
+                assert data["results"][-1] == {
+                    "error": "Feature 'Age' must be finite"}
+            response = self.client.post("/predict",
+                                        json=dict(self.sample, Age=bad))
+            assert response.status_code == 400
+
+    def test_batch_reports_per_row_errors(self):
+        """Test invalid rows are reported without failing the batch"""
+        records = [
+            self.sample,
+            {"Age": 40},
+            dict(self.sample, Cholesterol="high"),
+            "not a record",
+        ]
+        response = self.client.post("/predict/batch", json=records)
+        assert response.status_code == 200
+
+        data = json.loads(response.data)
+        assert data["n_success"] == 1
+        assert data["n_errors"] == 3
+        assert "prediction" in data["results"][0]
+        assert "Missing features" in data["results"][1]["error"]
+        assert "Cholesterol" in data["results"][2]["error"]
+        assert "error" in data["results"][3]
+
+    def test_batch_empty_list(self):
+        """Test batch endpoint rejects an empty list"""
+        response = self.client.post("/predict/batch", json={"records": []})
+        assert response.status_code == 400
+
+
+class TestWireFormats:
+    """Test cases for content negotiation on the prediction endpoints"""
+
+    def setup_method(self):
+        """Set up test client, a valid record and its JSON batch result"""
+        self.client = app.test_client()
+        with open("test_data_correct.json") as f:
+            self.sample = json.load(f)
+        self.records = [dict(self.sample, Age=age) for age in (30, 50, 70)]
+        self.expected = self.client.post("/predict/batch",
+                                         json=self.records).get_json()
+
+    def columns(self, records):
+        return {name: [r[name] for r in records] for name in self.sample}
+
+    def test_msgpack_roundtrip(self):
+        """Test MessagePack requests get MessagePack responses"""
+        import msgpack
+        response = self.client.post(
+            "/predict/batch", data=msgpack.packb(self.records),
+            content_type="application/msgpack")
+        assert response.status_code == 200
+        assert response.mimetype == "application/msgpack"
+        assert msgpack.unpackb(response.data) == self.expected
+
+    def test_columnar_json_batch(self):
+        """Test columnar JSON gives per-column results equal to JSON"""
+        response = self.client.post(
+            "/predict/batch", data=json.dumps(self.columns(self.records)),
+            content_type="application/vnd.columnar+json")
+        assert response.status_code == 200
+        data = response.get_json(force=True)
+        results = self.expected["results"]
+        assert data["prediction"] == [r["prediction"] for r in results]
+        assert data["probability_1"] == [r["probabilities"][1]
+                                         for r in results]
+        assert data["n_success"] == 3
+
+    def test_columnar_request_row_response(self):
+        """Test Accept selects the JSON document for a columnar request"""
+        columns = self.columns(self.records)
+        columns["Cholesterol"][1] = "high"
+        response = self.client.post(
+            "/predict/batch", data=json.dumps(columns),
+            content_type="application/vnd.columnar+json",
+            headers={"Accept": "application/json"})
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data["results"][0] == self.expected["results"][0]
+        assert data["results"][1] == {
+            "error": "Feature 'Cholesterol' must be numeric"}
+        assert data["n_errors"] == 1
+
+    def test_columnar_mixed_type_column(self):
+        """Test rows that pass validation in a mixed-type column encode"""
+        columns = self.columns(self.records)
+        columns["FastingBS"] = [True, "x", "1"]
+        response = self.client.post(
+            "/predict/batch", data=json.dumps(columns),
+            content_type="application/vnd.columnar+json",
+            headers={"Accept": "application/json"})
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data["n_success"] == 2
+        assert data["results"][1] == {
+            "error": "Feature 'FastingBS' must be numeric"}
+        expected = self.client.post("/predict/batch", json=[
+            dict(self.records[0], FastingBS=1),
+            dict(self.records[2], FastingBS=1)]).get_json()["results"]
+        assert [data["results"][0], data["results"][2]] == expected
+
+    def test_columnar_missing_column(self):
+        """Test a columnar batch without a feature column is rejected"""
+        columns = self.columns(self.records)
+        del columns["Age"]
+        response = self.client.post(
+            "/predict/batch", data=json.dumps(columns),
+            content_type="application/vnd.columnar+json")
+        assert response.status_code == 400
+        assert "Missing features" in response.get_json()["error"]
+
+    def test_columnar_scalar_values(self):
+        """Test columns holding scalars instead of lists get 400"""
+        for path in ("/predict", "/predict/batch"):
+            response = self.client.post(
+                path, data=json.dumps(self.sample),
+                content_type="application/vnd.columnar+json")
+            assert response.status_code == 400
+            assert "must be lists" in response.get_json(force=True)["error"]
+
+    def test_arrow_batch(self):
+        """Test Arrow requests and responses carry the same scores"""
+        from app import wire
+        columns = self.columns(self.records)
+        columns["Cholesterol"][1] = None
+        response = self.client.post(
+            "/predict/batch", data=wire.encode_arrow_request(columns),
+            content_type=wire.ARROW)
+        assert response.status_code == 200
+        out, meta = wire.decode_arrow_response(response.data)
+        assert out["probability_0"][0] == \
+            self.expected["results"][0]["probabilities"][0]
+        assert out["prediction"][1] is None
+        assert "Cholesterol" in out["error"][1]
+        assert meta["n_errors"] == "1"
+
+    def test_non_finite_columns(self):
+        """Test columnar and Arrow bodies reject infinite values per row"""
+        from app import wire
+        columns = self.columns(self.records)
+        columns["Cholesterol"][1] = float("inf")
+        response = self.client.post(
+            "/predict/batch", data=wire.encode_arrow_request(columns),
+            content_type=wire.ARROW)
+        out, meta = wire.decode_arrow_response(response.data)
+        assert out["error"][1] == "Feature 'Cholesterol' must be finite"
+        assert meta["n_errors"] == "1"
+
+        columns["Cholesterol"][1] = "-inf"
+        response = self.client.post(
+            "/predict/batch", data=json.dumps(columns),
+            content_type="application/vnd.columnar+json",
+            headers={"Accept": "application/json"})
+        data = response.get_json()
+        assert data["results"][1] == {
+            "error": "Feature 'Cholesterol' must be finite"}
+        assert data["results"][2] == self.expected["results"][2]
+
+    def test_single_predict_accepts_one_row(self):
+        """Test /predict takes a one-row columnar body"""
+        response = self.client.post(
+            "/predict", data=json.dumps(self.columns([self.sample])),
+            content_type="application/vnd.columnar+json",
+            headers={"Accept": "application/json"})
+        single = self.client.post("/predict", json=self.sample).get_json()
+        assert response.get_json() == single
+
+    def test_unsupported_formats(self):
+        """Test unknown Content-Type and Accept get 415 and 406"""
+        response = self.client.post("/predict", data=b"x",
+                                    content_type="text/csv")
+        assert response.status_code == 415
+        response = self.client.post("/predict", json=self.sample,
+                                    headers={"Accept": "text/csv"})
+        assert response.status_code == 406
+
+
+class TestRequestDiagnostics:
+    """Test cases for Server-Timing, request profiling and the slow log"""
+
+    def setup_method(self):
+        """Set up test client and a valid sample record"""
+        self.client = app.test_client()
+        with open("test_data_correct.json") as f:
+            self.sample = json.load(f)
+
+    def test_server_timing_header(self):
+        """Test prediction responses report their stage timings"""
+        response = self.client.post("/predict", json=self.sample)
+        timing = response.headers["Server-Timing"]
+        for stage in ("parse", "validate", "encode", "score", "serialize",
+                      "total"):
+            assert f"{stage};dur=" in timing
+
+    def test_profile_on_request(self, monkeypatch, tmp_path):
+        """Test X-Profile saves a profile that can be downloaded"""
+        import app.app as api
+        from app.profiling import ProfileStore
+        monkeypatch.setattr(api, "ADMIN_TOKEN", "secret")
+        monkeypatch.setattr(api, "profiles", ProfileStore(str(tmp_path)))
+        admin = {"X-Admin-Token": "secret"}
+        response = self.client.post("/predict", json=self.sample,
+                                    headers=dict(admin, **{"X-Profile": "1"}))
+        profile_id = response.headers["X-Profile-Id"]
+
+        listing = self.client.get("/admin/profiles", headers=admin)
+        assert listing.get_json()["profiles"][0]["id"] == profile_id
+        report = self.client.get(f"/admin/profiles/{profile_id}"
+                                 "?format=text", headers=admin)
+        assert b"predict_one" in report.data
+        assert self.client.get("/admin/profiles/nope",
+                               headers=admin).status_code == 404
+
+    def test_profile_header_needs_admin_token(self, monkeypatch, tmp_path):
+        """Test X-Profile is ignored without the admin token"""
+        import app.app as api
+        from app.profiling import ProfileStore
+        monkeypatch.setattr(api, "ADMIN_TOKEN", "secret")
+        monkeypatch.setattr(api, "profiles", ProfileStore(str(tmp_path)))
+        response = self.client.post("/predict", json=self.sample,
+                                    headers={"X-Profile": "1"})
+        assert "X-Profile-Id" not in response.headers
+
+    def test_slow_request_log(self, monkeypatch):
+        """Test slow requests are logged with stages and payload shape"""
+        import app.app as api
+        from app.profiling import SlowRequestLog
+        monkeypatch.setattr(api, "ADMIN_TOKEN", "secret")
+        monkeypatch.setattr(api, "slow_log", SlowRequestLog(threshold_ms=0))
+        self.client.post("/predict/batch", json=[self.sample] * 3)
+        entry = self.client.get(
+            "/admin/slow-requests",
+            headers={"X-Admin-Token": "secret"}).get_json()["requests"][-1]
+        assert entry["path"] == "/predict/batch"
+        assert entry["payload"]["rows"] == 3
+        assert "score" in entry["stages_ms"]
+
+
+class TestStreamPredictAPI:
+    """Test cases for the NDJSON /predict/stream endpoint"""
+
+    def setup_method(self):
+        """Set up test client and a valid sample record"""
+        self.client = app.test_client()
+        with open("test_data_correct.json") as f:
+            self.sample = json.load(f)
+
+    def post_lines(self, lines):
+        body = "\n".join(lines) + "\n"
+        response = self.client.post("/predict/stream", data=body,
+                                    content_type="application/x-ndjson")
+        assert response.status_code == 200
+        return [json.loads(line) for line in
+                response.get_data(as_text=True).splitlines()]
+
+    def test_stream_scores_in_input_order(self, monkeypatch):
+        """Test results keep input order across several chunks"""
+        import app.app as api
+        monkeypatch.setattr(api, "STREAM_CHUNK_ROWS", 2)
+        records = [dict(self.sample, Age=age) for age in range(30, 35)]
+        out = self.post_lines([json.dumps(r) for r in records])
+        assert [r["index"] for r in out[:-1]] == list(range(5))
+        single = json.loads(self.client.post("/predict",
+                                             json=records[3]).data)
+        assert out[3]["probabilities"] == single["probabilities"]
+        assert out[-1]["summary"]["n_success"] == 5
+
+    def test_stream_survives_scoring_errors(self, monkeypatch):
+        """Test a row that fails to score fails only its own line and the
+        stream still ends with its summary"""
+        import app.app as api
+        current = api.store.active
+        encode = current.encode
+
+        def failing_encode(records):
+            if any(r["Age"] == 99 for r in records):
+                raise ValueError("cannot encode")
+            return encode(records)
+
+        monkeypatch.setattr(current, "encode", failing_encode)
+        records = [dict(self.sample, Age=age) for age in (40, 99, 50)]
+        out = self.post_lines([json.dumps(r) for r in records])
+        assert "prediction" in out[0] and "prediction" in out[2]
+        assert out[1] == {"index": 1,
+                          "error": "Prediction failed: cannot encode"}
+        assert out[-1]["summary"]["n_success"] == 2
+        assert out[-1]["summary"]["n_errors"] == 1
+
+    def test_stream_reports_bad_lines(self):
+        """Test bad lines get per-line errors and blank lines are skipped"""
+        out = self.post_lines([json.dumps(self.sample), "", "{not json",
+                               json.dumps({"Age": 40})])
+        assert "prediction" in out[0]
+        assert out[1] == {"index": 1, "error": "Invalid JSON"}
+        assert "Missing features" in out[2]["error"]
+        assert out[-1]["summary"] == {"n_success": 1, "n_errors": 2,
+                                      "model_version": out[-1]["summary"]
+                                      ["model_version"]}
+
+
 def test_app_imports():
     """Test that the app can be imported without errors"""
     from app.app import app, feature_names
@@ -110,6 +467,139 @@ def test_app_imports():
     assert feature_names is not None
 
 
+def test_startup_timeline_endpoint():
+    """Test /startup reports readiness and the load phases"""
+    response = app.test_client().get("/startup")
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data["ready"] is True
+    phases = [p["phase"] for p in data["phases"]]
+    assert "imports" in phases
+    assert "first_inference" in phases
+
+
+def test_ready_after_warm_up():
+    """Test /ready succeeds once the model is warm and within budget"""
+    response = app.test_client().get("/ready")
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data["ready"] is True
+    assert data["warmup"]["p95_ms"] <= data["budget_ms"]
+
+
+def test_not_ready_over_latency_budget(monkeypatch):
+    """Test /ready fails while warm-up latency is over budget"""
+    import app.app as api
+    monkeypatch.setattr(api, "READY_LATENCY_BUDGET_MS", 0.0)
+    response = app.test_client().get("/ready")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert "budget" in json.loads(response.data)["reason"]
+    api.rewarm_thread.join()
+
+
+def test_overload_rejects_predictions_not_health_checks(monkeypatch):
+    """Test a full server sheds /predict but still answers probes"""
+    import app.app as api
+    from app.admission import AdmissionController
+    admission = AdmissionController(max_in_flight=1, max_queue=0)
+    monkeypatch.setattr(api, "admission", admission)
+    client = app.test_client()
+    with open("test_data_correct.json") as f:
+        sample = json.load(f)
+
+    admission.acquire()
+    response = client.post("/predict", json=sample)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert client.get("/").status_code == 200
+    assert client.get("/ready").status_code == 200
+
+    admission.release()
+    assert client.post("/predict", json=sample).status_code == 200
+    stats = json.loads(client.get("/stats/admission").data)
+    assert stats["rejected"] == 1
+    assert stats["in_flight"] == 0
+
+
+def test_only_single_predictions_steer_admission(monkeypatch):
+    """Test batch and stream durations stay out of the latency window"""
+    import app.app as api
+    from app.admission import AdmissionController
+    admission = AdmissionController(max_in_flight=4, target_ms=1000.0,
+                                    window=1000)
+    monkeypatch.setattr(api, "admission", admission)
+    client = app.test_client()
+    with open("test_data_correct.json") as f:
+        sample = json.load(f)
+
+    client.post("/predict/batch", json=[sample] * 3)
+    client.post("/predict/stream", data=json.dumps(sample) + "\n")
+    assert admission._samples == []
+    client.post("/predict", json=sample)
+    assert len(admission._samples) == 1
+    assert admission.stats()["in_flight"] == 0
+
+
+def test_admin_reload_reports_version(monkeypatch):
+    """Test an admin reload keeps serving and reports the version"""
+    import app.app as api
+    monkeypatch.setattr(api, "ADMIN_TOKEN", "secret")
+    admin = {"X-Admin-Token": "secret"}
+    client = app.test_client()
+    response = client.post("/admin/reload", headers=admin)
+    assert response.status_code == 200
+    version = json.loads(response.data)["model_version"]
+
+    with open("test_data_correct.json") as f:
+        sample = json.load(f)
+    data = json.loads(client.post("/predict", json=sample).data)
+    assert data["model_version"] == version
+    models = json.loads(client.get("/admin/models", headers=admin).data)
+    assert models["active"] == version
+
+
+def test_admin_endpoints_fail_closed(monkeypatch):
+    """Test admin calls are refused without a configured, matching token"""
+    import app.app as api
+    client = app.test_client()
+    monkeypatch.setattr(api, "ADMIN_TOKEN", None)
+    for method, path in (("POST", "/admin/reload"),
+                         ("POST", "/admin/rollback"),
+                         ("GET", "/admin/models"),
+                         ("GET", "/admin/profiles"),
+                         ("GET", "/admin/slow-requests")):
+        assert client.open(path, method=method).status_code == 404
+    monkeypatch.setattr(api, "ADMIN_TOKEN", "secret")
+    response = client.post("/admin/reload",
+                           headers={"X-Admin-Token": "wrong"})
+    assert response.status_code == 403
+
+
+def test_reloads_close_retired_batchers(monkeypatch):
+    """Test hot reloads do not leak micro-batcher threads or models"""
+    import threading
+    import app.app as api
+    monkeypatch.setattr(api, "MICRO_BATCH", True)
+    monkeypatch.setattr(api, "ADMIN_TOKEN", "secret")
+    client = app.test_client()
+    with open("test_data_correct.json") as f:
+        sample = json.load(f)
+
+    def batchers():
+        return [t for t in threading.enumerate()
+                if t.name == "micro-batcher"]
+
+    before = len(batchers())
+    for _ in range(5):
+        assert client.post("/admin/reload", headers={
+            "X-Admin-Token": "secret"}).status_code == 200
+        assert client.post("/predict", json=sample).status_code == 200
+    kept = [api.store.active] + api.store.history
+    assert len(batchers()) - before <= len(kept)
+    assert api.store.active.batcher is not None
+
+
 def test_model_files_exist():
     """Test that required model files exist"""
     model_path = os.path.join("model", "model.pkl")
@@ -0,0 +1,57 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import joblib
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.artifact import (ArtifactError, check_parity,  # noqa: E402
+                          export_artifact, load_artifact)
+
+
+@pytest.fixture(scope="module")
+def pipeline():
+    return joblib.load(os.path.join("model", "model.pkl"))
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    df = pd.read_csv(os.path.join("datasets", "data.csv"))
+    return df.drop(columns=["HeartDisease"])
+
+
+class TestModelArtifact:
+    """Test cases for the memory-mappable compiled model artifact"""
+
+    def test_roundtrip_parity(self, pipeline, dataset, tmp_path):
+        """Test the artifact reproduces the pickle's probabilities"""
+        export_artifact(pipeline, tmp_path, model_digest="abc")
+        assert check_parity(pipeline, tmp_path, dataset) == 0.0
+
+    def test_arrays_are_read_only_maps(self, pipeline, tmp_path):
+        """Test loaded node arrays are read-only and narrow"""
+        export_artifact(pipeline, tmp_path)
+        _, forest, _ = load_artifact(tmp_path)
+        assert not forest.value.flags.writeable
+        assert forest.feature.dtype == np.int16
+        assert forest.threshold.dtype == np.float32
+
+    def test_corrupt_block_is_rejected(self, pipeline, tmp_path):
+        """Test a checksum mismatch raises ArtifactError"""
+        export_artifact(pipeline, tmp_path)
+        path = os.path.join(tmp_path, "threshold.npy")
+        with open(path, "r+b") as f:
+            f.seek(-4, os.SEEK_END)
+            f.write(b"\x00\x00\x80\x7f")
+        with pytest.raises(ArtifactError, match="Checksum"):
+            load_artifact(tmp_path)
+
+    def test_stale_artifact_is_rejected(self, pipeline, tmp_path):
+        """Test an artifact built from another pickle is rejected"""
+        export_artifact(pipeline, tmp_path, model_digest="old")
+        with pytest.raises(ArtifactError, match="different model"):
+            load_artifact(tmp_path, model_digest="new")
@@ -0,0 +1,195 @@
+import asyncio
+import json
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.asgi import PredictionASGI  # noqa: E402
+
+
+def call(app, method, path, body=b"", parts=2, sent=None, headers=()):
+    """Drive one HTTP request through the ASGI app; return (status, body)"""
+    scope = {"type": "http", "method": method, "path": path,
+             "headers": [(k.encode(), v.encode()) for k, v in headers]}
+    # Deliver the body in several pieces, as a slow client would
+    size = max(1, -(-len(body) // parts))
+    pieces = [body[i:i + size] for i in range(0, len(body), size)] or [b""]
+    messages = [{"type": "http.request", "body": piece, "more_body": True}
+                for piece in pieces]
+    messages[-1]["more_body"] = False
+    sent = [] if sent is None else sent
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    status = sent[0]["status"]
+    return status, b"".join(m.get("body", b"") for m in sent[1:])
+
+
+class TestASGIServing:
+    """Test cases for the asyncio serving mode"""
+
+    def setup_method(self):
+        """Create a fresh ASGI app and load the sample record"""
+        self.app = PredictionASGI(threads=2)
+        with open("test_data_correct.json") as f:
+            self.sample = json.load(f)
+
+    def test_root_endpoint(self):
+        """Test the root endpoint returns the same text as Flask"""
+        status, body = call(self.app, "GET", "/")
+        assert status == 200
+        assert b"running" in body
+
+    def test_ready_endpoint(self):
+        """Test /ready reports the warmed-up model"""
+        status, body = call(self.app, "GET", "/ready")
+        assert status == 200
+        assert json.loads(body)["ready"] is True
+
+    def test_predict_matches_flask(self):
+        """Test /predict returns the Flask app's response"""
+        from app.app import app as flask_app
+        payload = json.dumps(self.sample).encode()
+        status, body = call(self.app, "POST", "/predict", payload)
+        expected = flask_app.test_client().post("/predict", json=self.sample)
+        assert status == 200
+        assert json.loads(body) == expected.get_json()
+
+    def test_batch_arrow_negotiation(self):
+        """Test Arrow in, MessagePack out via Content-Type and Accept"""
+        import msgpack
+        from app import wire
+        records = [dict(self.sample, Age=age) for age in (30, 70)]
+        columns = {name: [r[name] for r in records] for name in self.sample}
+        sent = []
+        status, body = call(
+            self.app, "POST", "/predict/batch",
+            wire.encode_arrow_request(columns), sent=sent,
+            headers=[("Content-Type", wire.ARROW),
+                     ("Accept", "application/msgpack")])
+        assert status == 200
+        assert (b"content-type", b"application/msgpack") in \
+            sent[0]["headers"]
+        from app.app import app as flask_app
+        expected = flask_app.test_client().post("/predict/batch",
+                                                json=records)
+        assert msgpack.unpackb(body) == expected.get_json()
+
+    def test_server_timing_header(self):
+        """Test prediction responses carry a Server-Timing header"""
+        sent = []
+        call(self.app, "POST", "/predict", json.dumps(self.sample).encode(),
+             sent=sent)
+        timing = dict(sent[0]["headers"])[b"server-timing"]
+        assert b"score;dur=" in timing and b"total;dur=" in timing
+
+    def test_server_timing_on_every_response(self):
+        """Test non-prediction responses carry Server-Timing as well"""
+        requests = [("GET", "/", b""), ("GET", "/ready", b""),
+                    ("GET", "/metrics", b""), ("GET", "/nope", b""),
+                    ("GET", "/predict", b""),
+                    ("POST", "/predict/stream",
+                     json.dumps(self.sample).encode())]
+        for method, path, body in requests:
+            sent = []
+            call(self.app, method, path, body, sent=sent)
+            headers = dict(sent[0]["headers"])
+            assert headers[b"server-timing"].startswith(b"total;dur="), path
+
+    def test_predict_missing_features(self):
+        """Test missing features are rejected with 400"""
+        status, body = call(self.app, "POST", "/predict", b'{"Age": 40}')
+        assert status == 400
+        assert "Missing features" in json.loads(body)["error"]
+
+    def test_predict_invalid_json(self):
+        """Test invalid JSON is rejected with 400"""
+        status, _ = call(self.app, "POST", "/predict", b"invalid json")
+        assert status == 400
+
+    def test_predict_wrong_method(self):
+        """Test GET /predict is rejected with 405"""
+        status, _ = call(self.app, "GET", "/predict")
+        assert status == 405
+
+    def test_stream_scores_chunks_as_they_arrive(self, monkeypatch):
+        """Test NDJSON split mid-line is scored and streamed in chunks"""
+        import app.app as api
+        monkeypatch.setattr(api, "STREAM_CHUNK_ROWS", 2)
+        lines = [json.dumps(dict(self.sample, Age=age)) for age in range(5)]
+        body = ("\n".join(lines) + "\n").encode()
+        sent = []
+        status, out = call(self.app, "POST", "/predict/stream", body,
+                           parts=7, sent=sent)
+        assert status == 200
+        results = [json.loads(line) for line in out.splitlines()]
+        assert [r["index"] for r in results[:-1]] == list(range(5))
+        assert results[-1]["summary"]["n_success"] == 5
+        # Three result chunks plus the summary
+        assert len(sent) == 1 + 4
+
+    def test_stream_line_too_long(self, monkeypatch):
+        """Test an oversized line is reported and skipped"""
+        import app.app as api
+        monkeypatch.setattr(api, "STREAM_MAX_LINE_BYTES", 300)
+        body = ("x" * 1000 + "\n" + json.dumps(self.sample) + "\n").encode()
+        status, out = call(self.app, "POST", "/predict/stream", body,
+                           parts=10)
+        results = [json.loads(line) for line in out.splitlines()]
+        assert results[0] == {"index": 0, "error": "Line too long"}
+        assert "prediction" in results[1]
+
+    def test_stream_survives_scoring_errors(self, monkeypatch):
+        """Test a chunk that fails to score still ends with a summary"""
+        import app.app as api
+
+        def failing_score(X):
+            raise ValueError("cannot score")
+
+        monkeypatch.setattr(api.store.active, "score", failing_score)
+        body = (json.dumps(self.sample) + "\n") * 3
+        status, out = call(self.app, "POST", "/predict/stream",
+                           body.encode())
+        results = [json.loads(line) for line in out.splitlines()]
+        assert status == 200
+        assert [r["error"] for r in results[:-1]] == \
+            ["Prediction failed: cannot score"] * 3
+        assert results[-1]["summary"]["n_errors"] == 3
+
+    def test_body_too_large(self):
+        """Test bodies over the limit are rejected with 413"""
+        app = PredictionASGI(threads=1, max_body_bytes=10)
+        payload = json.dumps(self.sample).encode()
+        status, _ = call(app, "POST", "/predict", payload)
+        assert status == 413
+
+    def test_registry_model_routes(self, monkeypatch, tmp_path):
+        """Test /models/<name>/... and X-Model select registry models"""
+        import shutil
+        import app.app as api
+        from app.registry import ModelRegistry
+        shutil.copytree("model", tmp_path / "a")
+        registry = ModelRegistry(str(tmp_path), api._load_registered,
+                                 log=lambda msg: None)
+        monkeypatch.setattr(api, "registry", registry)
+        payload = json.dumps(self.sample).encode()
+
+        status, body = call(self.app, "POST", "/models/a/predict", payload)
+        assert status == 200
+        assert json.loads(body)["model_version"] == registry.get("a").version
+        status, body = call(self.app, "POST", "/predict/stream", payload,
+                            headers=[("X-Model", "a")])
+        assert json.loads(body.splitlines()[-1])["summary"]["n_success"] == 1
+        status, _ = call(self.app, "POST", "/models/b/predict/batch",
+                         payload)
+        assert status == 404
+        status, _ = call(self.app, "GET", "/models/a/metrics")
+        assert status == 404
+        assert registry.stats()["models"]["a"]["hits"] == 2
@@ -0,0 +1,71 @@
+import os
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.batcher import BatcherClosed, MicroBatcher  # noqa: E402
+
+
+def row_sum(X):
+    """Toy score function returning (row sums, rows)"""
+    return X.sum(axis=1), X
+
+
+class TestMicroBatcher:
+    """Test cases for the dynamic micro-batching scheduler"""
+
+    def test_single_request(self):
+        """Test a lone request is scored after the wait expires"""
+        batcher = MicroBatcher(row_sum, max_batch_size=8, max_wait_ms=1)
+        total, row = batcher.predict(np.array([1.0, 2.0]), timeout=5)
+        assert total == 3.0
+        np.testing.assert_array_equal(row, [1.0, 2.0])
+        batcher.close()
+
+    def test_concurrent_requests_are_batched(self):
+        """Test concurrent callers share batches and get their own row"""
+        batcher = MicroBatcher(row_sum, max_batch_size=16, max_wait_ms=50)
+        results = {}
+
+        def call(i):
+            results[i] = batcher.predict(np.array([float(i), 1.0]),
+                                         timeout=5)[0]
+
+        threads = [threading.Thread(target=call, args=(i,))
+                   for i in range(32)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        batcher.close()
+
+        assert results == {i: i + 1.0 for i in range(32)}
+        stats = batcher.stats()
+        assert stats["requests"] == 32
+        assert stats["batches"] < 32
+        assert max(stats["batch_sizes"]) <= 16
+        assert sum(stats["queue_delay_ms"]["buckets"].values()) == 32
+
+    def test_errors_propagate_to_callers(self):
+        """Test a failing score function raises in the caller"""
+        def fail(X):
+            raise ValueError("boom")
+
+        batcher = MicroBatcher(fail, max_batch_size=4, max_wait_ms=1)
+        with pytest.raises(ValueError, match="boom"):
+            batcher.predict(np.array([1.0]), timeout=5)
+        batcher.close()
+
+    def test_closed_batcher_rejects_rows(self):
+        """Test submits after close fail fast instead of hanging"""
+        batcher = MicroBatcher(row_sum, max_batch_size=4, max_wait_ms=1)
+        batcher.close()
+        batcher.close()
+        assert not batcher._worker.is_alive()
+        with pytest.raises(BatcherClosed):
+            batcher.predict(np.array([1.0]), timeout=5)
@@ -0,0 +1,98 @@
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.cache import PredictionCache  # noqa: E402
+
+
+def result(value):
+    return (value, np.array([value, 1.0 - value]))
+
+
+class TestPredictionCache:
+    """Test cases for the version-aware LRU prediction cache"""
+
+    def test_hit_after_miss(self):
+        """Test the second lookup of a row is served from the cache"""
+        cache = PredictionCache(model_version="v1")
+        calls = []
+        row = np.array([1.0, 2.0])
+        for _ in range(3):
+            cache.get_or_compute(row, lambda: calls.append(1) or result(0))
+        assert len(calls) == 1
+        stats = cache.stats()
+        assert stats["misses"] == 1
+        assert stats["hits"] == 2
+
+    def test_lru_eviction_by_entries(self):
+        """Test the least recently used entry is evicted first"""
+        cache = PredictionCache(max_entries=2)
+        a, b, c = np.array([1.0]), np.array([2.0]), np.array([3.0])
+        cache.get_or_compute(a, lambda: result(1))
+        cache.get_or_compute(b, lambda: result(2))
+        cache.get_or_compute(a, lambda: result(1))
+        cache.get_or_compute(c, lambda: result(3))
+        assert cache.stats()["evictions"] == 1
+        # b was least recently used, so a is still cached
+        cache.get_or_compute(a, pytest.fail)
+
+    def test_eviction_by_bytes(self):
+        """Test the byte bound keeps the cache under max_bytes"""
+        cache = PredictionCache(max_entries=1000, max_bytes=1000)
+        for i in range(20):
+            cache.get_or_compute(np.array([float(i)]), lambda: result(0))
+        stats = cache.stats()
+        assert stats["bytes"] <= 1000
+        assert stats["evictions"] > 0
+
+    def test_model_version_change_clears(self):
+        """Test switching model version drops all entries"""
+        cache = PredictionCache(model_version="v1")
+        cache.get_or_compute(np.array([1.0]), lambda: result(1))
+        cache.set_model_version("v2")
+        assert cache.stats()["entries"] == 0
+        value = cache.get_or_compute(np.array([1.0]), lambda: result(0))
+        assert value[0] == 0
+
+    def test_other_versions_bypass(self):
+        """Test a result from a replaced model is neither served nor
+        stored under the current version"""
+        cache = PredictionCache(model_version="v1")
+        cache.get_or_compute(np.array([1.0]), lambda: result(1), "v1")
+        # A request still holding the old model after a swap to v2
+        cache.set_model_version("v2")
+        value = cache.get_or_compute(np.array([1.0]), lambda: result(1),
+                                     "v1")
+        assert value[0] == 1
+        assert cache.stats()["entries"] == 0
+        value = cache.get_or_compute(np.array([1.0]), lambda: result(2),
+                                     "v2")
+        assert value[0] == 2
+        assert cache.stats()["entries"] == 1
+
+    def test_inflight_requests_are_coalesced(self):
+        """Test identical concurrent requests compute only once"""
+        cache = PredictionCache()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            time.sleep(0.1)
+            return result(1)
+
+        threads = [threading.Thread(target=cache.get_or_compute,
+                                    args=(np.array([5.0]), slow))
+                   for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(calls) == 1
+        assert cache.stats()["coalesced"] == 7
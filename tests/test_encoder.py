@@ -0,0 +1,70 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import joblib
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.encoder import CompiledEncoder  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def preprocessor():
+    model = joblib.load(os.path.join("model", "model.pkl"))
+    return model.named_steps["preprocessor"]
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    df = pd.read_csv(os.path.join("datasets", "data.csv"))
+    return df.drop(columns=["HeartDisease"])
+
+
+class TestCompiledEncoder:
+    """Parity tests between CompiledEncoder and the fitted sklearn transform"""
+
+    def test_transform_one_matches_sklearn_on_dataset(self, preprocessor,
+                                                      dataset):
+        """Test every row of datasets/data.csv encodes identically"""
+        encoder = CompiledEncoder.from_preprocessor(preprocessor)
+        expected = preprocessor.transform(dataset)
+        records = dataset.to_dict(orient="records")
+        out = np.empty((1, encoder.n_outputs))
+        for i, record in enumerate(records):
+            row = encoder.transform_one(record, out=out)
+            np.testing.assert_array_equal(row[0], expected[i])
+
+    def test_transform_matches_sklearn_on_dataset(self, preprocessor,
+                                                  dataset):
+        """Test batch encoding of the whole dataset is identical"""
+        encoder = CompiledEncoder.from_preprocessor(preprocessor)
+        records = dataset.to_dict(orient="records")
+        np.testing.assert_array_equal(encoder.transform(records),
+                                      preprocessor.transform(dataset))
+
+    def test_transform_columns_matches_sklearn_on_dataset(self, preprocessor,
+                                                          dataset):
+        """Test column-wise encoding of the whole dataset is identical"""
+        encoder = CompiledEncoder.from_preprocessor(preprocessor)
+        columns = {name: dataset[name].to_numpy() for name in dataset}
+        np.testing.assert_array_equal(encoder.transform_columns(columns),
+                                      preprocessor.transform(dataset))
+
+    def test_unknown_category_is_ignored(self, preprocessor, dataset):
+        """Test unknown categories encode to zeros like handle_unknown"""
+        encoder = CompiledEncoder.from_preprocessor(preprocessor)
+        record = dict(dataset.iloc[0], ChestPainType="XYZ")
+        expected = preprocessor.transform(pd.DataFrame([record]))
+        np.testing.assert_array_equal(encoder.transform_one(record),
+                                      expected)
+
+    def test_non_numeric_value_raises(self, preprocessor, dataset):
+        """Test non-numeric numerical features raise ValueError"""
+        encoder = CompiledEncoder.from_preprocessor(preprocessor)
+        record = dict(dataset.iloc[0], Age="old")
+        with pytest.raises(ValueError):
+            encoder.transform_one(record)
@@ -0,0 +1,74 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import joblib
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.forest import CompiledForest  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def pipeline():
+    return joblib.load(os.path.join("model", "model.pkl"))
+
+
+@pytest.fixture(scope="module")
+def encoded(pipeline):
+    df = pd.read_csv(os.path.join("datasets", "data.csv"))
+    return pipeline[:-1].transform(df.drop(columns=["HeartDisease"]))
+
+
+class TestCompiledForest:
+    """Parity tests between CompiledForest and the sklearn forest"""
+
+    def test_predict_proba_bit_identical(self, pipeline, encoded):
+        """Test float64 probabilities equal sklearn's exactly"""
+        clf = pipeline[-1]
+        forest = CompiledForest.from_estimator(clf)
+        np.testing.assert_array_equal(forest.predict_proba(encoded),
+                                      clf.predict_proba(encoded))
+        np.testing.assert_array_equal(forest.predict(encoded),
+                                      clf.predict(encoded))
+
+    def test_missing_values_match_sklearn(self, pipeline, encoded):
+        """Test NaN features take the same branch as in sklearn"""
+        clf = pipeline[-1]
+        forest = CompiledForest.from_estimator(clf)
+        X = encoded[:200].copy()
+        rng = np.random.default_rng(0)
+        X[rng.random(X.shape) < 0.2] = np.nan
+        np.testing.assert_array_equal(forest.predict_proba(X),
+                                      clf.predict_proba(X))
+        np.testing.assert_array_equal(
+            forest.apply(X) - forest.roots[:, np.newaxis], clf.apply(X).T)
+
+    def test_apply_matches_sklearn_leaves(self, pipeline, encoded):
+        """Test every tree reaches the same leaf as sklearn"""
+        clf = pipeline[-1]
+        forest = CompiledForest.from_estimator(clf)
+        leaves = forest.apply(encoded) - forest.roots[:, np.newaxis]
+        np.testing.assert_array_equal(leaves, clf.apply(encoded).T)
+
+    def test_float32_mode_within_tolerance(self, pipeline, encoded):
+        """Test float32 mode reaches the same leaves with close proba"""
+        clf = pipeline[-1]
+        forest64 = CompiledForest.from_estimator(clf)
+        forest32 = CompiledForest.from_estimator(clf, dtype=np.float32)
+        assert forest32.value.dtype == np.float32
+        np.testing.assert_array_equal(forest32.apply(encoded),
+                                      forest64.apply(encoded))
+        np.testing.assert_allclose(forest32.predict_proba(encoded),
+                                   clf.predict_proba(encoded), atol=1e-6)
+
+    def test_single_row(self, pipeline, encoded):
+        """Test a single row gives a (1, n_classes) result"""
+        clf = pipeline[-1]
+        forest = CompiledForest.from_estimator(clf)
+        proba = forest.predict_proba(encoded[:1])
+        assert proba.shape == (1, len(clf.classes_))
+        np.testing.assert_array_equal(proba, clf.predict_proba(encoded[:1]))
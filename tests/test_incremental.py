@@ -0,0 +1,164 @@
+import argparse
+import copy
+import json
+import os
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import train  # noqa: E402
+from training import incremental  # noqa: E402
+
+DATA = os.path.abspath(os.path.join("datasets", "data.csv"))
+
+
+@pytest.fixture(scope="module")
+def metadata():
+    with open(os.path.join("model", "metadata.json")) as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope="module")
+def df():
+    return pd.read_csv(DATA)
+
+
+def fit_forest(df, metadata, n_estimators=10):
+    pipeline = Pipeline(steps=[
+        ("preprocessor", train.make_preprocessor(metadata["categorical"],
+                                                 metadata["numerical"])),
+        ("clf", RandomForestClassifier(n_estimators=n_estimators,
+                                       random_state=42))])
+    return pipeline.fit(df[metadata["feature_names"]],
+                        df[metadata["target"]])
+
+
+class TestIncremental:
+    """Test cases for growing a forest with new rows"""
+
+    def test_check_rows_accepts_valid_rows(self, df, metadata):
+        """Test rows shaped like the training data pass"""
+        incremental.check_rows(df.head(50), metadata, np.array([0, 1]))
+
+    def test_check_rows_reports_bad_lines(self, df, metadata):
+        """Test bad values and labels are reported by CSV line"""
+        bad = df.head(10).astype(object)
+        bad.loc[1, "Age"] = "old"
+        bad.loc[4, "HeartDisease"] = 3
+        with pytest.raises(ValueError) as e:
+            incremental.check_rows(bad, metadata, np.array([0, 1]))
+        message = str(e.value)
+        assert "2 invalid rows" in message
+        assert "line 3: Feature 'Age' must be numeric" in message
+        assert "line 6: Unknown HeartDisease 3" in message
+
+        with pytest.raises(ValueError, match="Missing columns"):
+            incremental.check_rows(df.drop(columns=["ST_Slope"]), metadata,
+                                   np.array([0, 1]))
+
+    def test_grow_adds_trees_and_drops_oldest(self, df, metadata):
+        """Test new trees are appended and the oldest trimmed"""
+        pipeline = fit_forest(df[:500], metadata)
+        old = list(pipeline.steps[-1][1].estimators_)
+        new = df[500:700]
+        stats = incremental.grow_forest(
+            pipeline, new[metadata["feature_names"]], new["HeartDisease"],
+            add_trees=5, max_trees=12)
+
+        clf = pipeline.steps[-1][1]
+        assert stats["added"] == 5 and stats["dropped"] == 3
+        assert stats["n_estimators"] == clf.n_estimators == 12
+        assert clf.estimators_[:7] == old[3:]
+        assert list(clf.classes_) == [0, 1]
+        proba = pipeline.predict_proba(df[metadata["feature_names"]][:20])
+        assert np.allclose(proba.sum(axis=1), 1.0)
+
+    def test_grow_refuses_missing_class(self, df, metadata):
+        """Test an update without every class is rejected"""
+        pipeline = fit_forest(df[:300], metadata)
+        only_ones = df[df["HeartDisease"] == 1].head(50)
+        before = copy.deepcopy(pipeline.steps[-1][1].estimators_)
+        with pytest.raises(ValueError, match=r"class\(es\) \[0\]"):
+            incremental.grow_forest(
+                pipeline, only_ones[metadata["feature_names"]],
+                only_ones["HeartDisease"], add_trees=5)
+        assert len(pipeline.steps[-1][1].estimators_) == len(before)
+
+    def test_grow_refuses_non_forest(self, df, metadata):
+        """Test models without warm-startable trees are rejected"""
+        pipeline = Pipeline(steps=[
+            ("preprocessor", train.make_preprocessor(
+                metadata["categorical"], metadata["numerical"])),
+            ("clf", LogisticRegression(max_iter=1000))]).fit(
+                df[metadata["feature_names"]], df["HeartDisease"])
+        with pytest.raises(TypeError):
+            incremental.grow_forest(pipeline, df[metadata["feature_names"]],
+                                    df["HeartDisease"], add_trees=5)
+
+    def test_train_incremental_mode(self, df, tmp_path, monkeypatch,
+                                    capsys):
+        """Test train.py --incremental grows the saved model"""
+        monkeypatch.chdir(tmp_path)
+        df[:600].to_csv("history.csv", index=False)
+        df[600:].to_csv("new.csv", index=False)
+        args = argparse.Namespace(
+            data="history.csv", test_size=0.2, select=False, search=False,
+            incremental=None, shards=None, cache_dir=None, cache_max_mb=100,
+            no_cache=True, report=None)
+        train.main(args)
+        args.incremental = ["new.csv"]
+        args.add_trees, args.keep_trees, args.recent_rows = 20, None, 100
+        args.compare, args.holdout = True, 0.2
+        capsys.readouterr()
+        train.main(args)
+
+        out = capsys.readouterr().out
+        assert "Added 20 trees" in out and "120 trees now" in out
+        assert "incremental" in out and "full" in out
+        clf = joblib.load(os.path.join("model", "model.pkl")).steps[-1][1]
+        assert len(clf.estimators_) == 120 and not clf.warm_start
+
+    def test_updates_use_recent_buffer(self, df, tmp_path, monkeypatch,
+                                       capsys):
+        """Test updates read the bounded buffer, not the history CSV, and
+        append their rows to it"""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(incremental, "RECENT_MAX_ROWS", 500)
+        df[:600].to_csv("history.csv", index=False)
+        args = argparse.Namespace(
+            data="history.csv", test_size=0.2, select=False, search=False,
+            incremental=None, shards=None, cache_dir=None, cache_max_mb=100,
+            no_cache=True, report=None)
+        train.main(args)
+        recent = pd.read_csv(os.path.join("model", "recent.csv"))
+        assert len(recent) == 480
+
+        os.remove("history.csv")
+        args.add_trees, args.keep_trees, args.recent_rows = 10, None, 100
+        args.compare = False
+        for i, rows in enumerate((df[600:700], df[700:800])):
+            rows.to_csv(f"new-{i}.csv", index=False)
+            args.incremental = [f"new-{i}.csv"]
+            train.main(args)
+        recent = pd.read_csv(os.path.join("model", "recent.csv"))
+        assert len(recent) == 500
+        pd.testing.assert_frame_equal(recent.tail(200).reset_index(
+            drop=True), df[600:800].reset_index(drop=True))
+        assert "(100 new, 100 recent)" in capsys.readouterr().out
+
+    def test_read_tail(self, df, tmp_path):
+        """Test the chunked tail equals the file's last rows"""
+        path = tmp_path / "data.csv"
+        df.to_csv(path, index=False)
+        tail = incremental.read_tail(str(path), 50, chunk_rows=100)
+        pd.testing.assert_frame_equal(tail,
+                                      df.tail(50).reset_index(drop=True))
@@ -0,0 +1,74 @@
+import os
+import sys
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.loader import (StartupTimeline, first_inference,  # noqa: E402
+                        load_bundle, warm_up)
+
+MODEL_PATH = os.path.join("model", "model.pkl")
+META_PATH = os.path.join("model", "metadata.json")
+ARTIFACT_PATH = os.path.join("model", "artifact")
+
+
+class TestModelLoading:
+    """Test cases for bundle loading and the startup timeline"""
+
+    def test_deferred_pickle_serves_from_artifact(self):
+        """Test an artifact-only bundle scores without the pickle"""
+        timeline = StartupTimeline()
+        bundle = load_bundle(MODEL_PATH, META_PATH, ARTIFACT_PATH,
+                             defer_pickle=True, timeline=timeline,
+                             log=lambda msg: None)
+        assert bundle.pipeline is None
+        phases = [p["phase"] for p in timeline.as_list()]
+        assert "artifact" in phases
+        assert "pickle" not in phases
+
+        # Large batches fall back to the compiled forest too
+        X = np.repeat(bundle.encode([bundle.synthetic_record()]), 300,
+                      axis=0)
+        preds, proba = bundle.score(X)
+        assert preds.shape == (300,)
+        assert np.allclose(proba.sum(axis=1), 1.0)
+
+    def test_load_pipeline_later_matches(self):
+        """Test adding the pickle later gives identical probabilities"""
+        bundle = load_bundle(MODEL_PATH, META_PATH, ARTIFACT_PATH,
+                             defer_pickle=True, log=lambda msg: None)
+        X = bundle.encode([bundle.synthetic_record()])
+        _, before = bundle.score(X)
+        bundle.load_pipeline(MODEL_PATH)
+        np.testing.assert_array_equal(bundle.clf.predict_proba(X), before)
+
+    def test_timeline_records_first_inference(self):
+        """Test every startup phase is recorded with a duration"""
+        timeline = StartupTimeline()
+        bundle = load_bundle(MODEL_PATH, META_PATH, None, timeline=timeline,
+                             log=lambda msg: None)
+        first_inference(bundle, timeline)
+        phases = {p["phase"]: p for p in timeline.as_list()}
+        for name in ("metadata", "pickle", "compile", "first_inference"):
+            assert phases[name]["duration_ms"] >= 0
+
+    def test_synthetic_records_are_valid_and_varied(self):
+        """Test warm-up records pass validation and cover every category"""
+        bundle = load_bundle(MODEL_PATH, META_PATH, ARTIFACT_PATH,
+                             log=lambda msg: None)
+        records = bundle.synthetic_records(10)
+        assert all(bundle.validate_record(r) is None for r in records)
+        assert len({r["ChestPainType"] for r in records}) == 4
+        assert len({r["Age"] for r in records}) > 1
+
+    def test_warm_up_reports_latency(self):
+        """Test warm-up times single rows and every batch path"""
+        timeline = StartupTimeline()
+        bundle = load_bundle(MODEL_PATH, META_PATH, ARTIFACT_PATH,
+                             log=lambda msg: None)
+        report = warm_up(bundle, rounds=20, timeline=timeline)
+        assert 0 < report["p50_ms"] <= report["p95_ms"] <= report["max_ms"]
+        assert set(report["batch_ms"]) == {"8", "64", "257"}
+        assert "warmup" in [p["phase"] for p in timeline.as_list()]
@@ -0,0 +1,47 @@
+import json
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.app import app  # noqa: E402
+from app.metrics import StageTimer  # noqa: E402
+
+
+def test_stage_timer_laps():
+    """Test laps are charged in order and accumulate per stage"""
+    timer = StageTimer()
+    timer.lap("parse")
+    timer.lap("score")
+    timer.lap("parse")
+    assert list(timer.stages) == ["parse", "score"]
+    assert all(seconds >= 0 for seconds in timer.stages.values())
+
+
+class TestMetricsEndpoint:
+    """Test cases for the Prometheus /metrics endpoint"""
+
+    def setup_method(self):
+        """Set up test client and a valid sample record"""
+        self.client = app.test_client()
+        with open("test_data_correct.json") as f:
+            self.sample = json.load(f)
+
+    def test_predict_stages_are_exported(self):
+        """Test every /predict stage shows up as a histogram series"""
+        self.client.post("/predict", json=self.sample)
+        text = self.client.get("/metrics").get_data(as_text=True)
+        for stage in ("parse", "validate", "encode", "score", "serialize"):
+            assert (f'predict_stage_seconds_count{{endpoint="/predict",'
+                    f'stage="{stage}"}}') in text
+
+    def test_status_codes_and_sizes_are_counted(self):
+        """Test request counts by status and payload sizes are exported"""
+        self.client.post("/predict", json={"Age": 40})
+        text = self.client.get("/metrics").get_data(as_text=True)
+        assert ('http_requests_total{endpoint="/predict",method="POST",'
+                'status="400"}') in text
+        assert 'http_request_size_bytes_count{endpoint="/predict"}' in text
+        assert "http_requests_in_flight" in text
+        assert "model_load_seconds" in text
@@ -0,0 +1,101 @@
+import json
+import os
+import shutil
+import sys
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.loader import load_bundle  # noqa: E402
+from app.model_store import (ModelStore, ModelValidationError,  # noqa: E402
+                             ModelWatcher)
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    """A private copy of the model files that tests may rewrite"""
+    for name in ("model.pkl", "metadata.json"):
+        shutil.copy(os.path.join("model", name), tmp_path / name)
+    return tmp_path
+
+
+def make_store(model_dir):
+    def load():
+        return load_bundle(str(model_dir / "model.pkl"),
+                           str(model_dir / "metadata.json"),
+                           log=lambda msg: None)
+    store = ModelStore(load, history=2, log=lambda msg: None)
+    store.activate(load())
+    return store
+
+
+def retrain(model_dir):
+    """Simulate a retrain by changing the pickle's bytes and digest"""
+    with open(model_dir / "model.pkl", "ab") as f:
+        f.write(b"\0")
+
+
+class TestModelStore:
+    """Test cases for hot reload, validation and rollback"""
+
+    def test_reload_swaps_and_keeps_history(self, model_dir):
+        """Test a reload activates the new version and keeps the old one"""
+        store = make_store(model_dir)
+        old = store.active
+        retrain(model_dir)
+        version = store.reload()
+        assert store.active.version == version != old.version
+        assert store.history == [old]
+
+    def test_rollback_restores_previous(self, model_dir):
+        """Test rollback swaps the previous bundle back in"""
+        store = make_store(model_dir)
+        old = store.active
+        retrain(model_dir)
+        store.reload()
+        assert store.rollback() == old.version
+        assert store.active is old
+
+    def test_retired_bundles_are_released(self, model_dir):
+        """Test bundles leaving the active slot and history are retired"""
+        retired = []
+        store = make_store(model_dir)
+        store.on_retire = retired.append
+        store.max_history = 1
+        first = store.active
+        retrain(model_dir)
+        store.reload()
+        assert retired == []
+        second = store.active
+        retrain(model_dir)
+        store.reload()
+        assert retired == [first]
+        store.rollback()
+        assert retired == [first]
+        assert store.active is second
+
+    def test_invalid_model_keeps_old(self, model_dir):
+        """Test a model with different feature_names is rejected"""
+        store = make_store(model_dir)
+        old = store.active
+        meta_path = model_dir / "metadata.json"
+        meta = json.loads(meta_path.read_text())
+        meta["feature_names"] = meta["feature_names"][:-1]
+        meta_path.write_text(json.dumps(meta))
+        with pytest.raises(ModelValidationError):
+            store.reload()
+        assert store.active is old
+        assert store.versions()["last_error"]
+
+    def test_watcher_reloads_changed_files(self, model_dir):
+        """Test the watcher reloads once the files stop changing"""
+        store = make_store(model_dir)
+        old = store.active
+        watcher = ModelWatcher(store, [model_dir / "model.pkl"],
+                               interval=0.01)
+        assert watcher.check() is False
+        retrain(model_dir)
+        assert watcher.check() is True
+        assert store.active.version != old.version
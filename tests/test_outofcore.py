@@ -0,0 +1,101 @@
+import argparse
+import os
+import sys
+
+import joblib
+import pandas as pd
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import train  # noqa: E402
+from training import outofcore  # noqa: E402
+
+DATA = os.path.abspath(os.path.join("datasets", "data.csv"))
+TARGET = "HeartDisease"
+
+
+@pytest.fixture
+def shards(tmp_path):
+    df = pd.read_csv(DATA)
+    for i, start in enumerate(range(0, len(df), 300)):
+        df.iloc[start:start + 300].to_csv(tmp_path / f"part-{i}.csv",
+                                          index=False)
+    return df, [str(tmp_path / "part-*.csv")]
+
+
+def row_set(frame, df):
+    """Rows of ``frame`` comparable with those of ``df`` (numerics read as
+    float32 compare as float32)."""
+    numeric = df.select_dtypes("number").columns.drop(TARGET)
+    frame = frame[df.columns].astype({col: "float32" for col in numeric})
+    return sorted(map(tuple, frame.astype(str).to_numpy()))
+
+
+class TestOutOfCore:
+    """Test cases for stratified sampling from CSV shards"""
+
+    def test_full_sample_covers_every_row_once(self, shards):
+        """Test a sample as large as the data is a train/test partition"""
+        df, patterns = shards
+        files = outofcore.expand_shards(patterns)
+        assert len(files) == 4
+        train_df, test_df, info = outofcore.stratified_sample(
+            files, TARGET, sample_rows=10_000, chunk_rows=100)
+
+        assert info["rows"] == len(df) == len(train_df) + len(test_df)
+        assert info["features"] == [c for c in df.columns if c != TARGET]
+        assert row_set(pd.concat([train_df, test_df]), df) == \
+            row_set(df, df)
+        assert 0.1 < len(test_df) / len(df) < 0.3
+
+    def test_sample_is_stratified_and_compact(self, shards):
+        """Test class shares follow the data and dtypes stay compact"""
+        df, patterns = shards
+        train_df, test_df, info = outofcore.stratified_sample(
+            outofcore.expand_shards(patterns), TARGET, sample_rows=200,
+            test_size=0.25, chunk_rows=100)
+
+        assert len(train_df) == 150 and len(test_df) == 50
+        share = (df[TARGET] == 1).mean()
+        assert abs(train_df[TARGET].eq(1).sum() - 150 * share) <= 1
+        assert abs(test_df[TARGET].eq(1).sum() - 50 * share) <= 1
+        for col in info["categorical"]:
+            assert isinstance(train_df[col].dtype, pd.CategoricalDtype)
+        for col in info["numerical"]:
+            assert train_df[col].dtype == "float32"
+
+    def test_sample_independent_of_workers(self, shards):
+        """Test merging per-shard samples gives the same rows in parallel"""
+        _, patterns = shards
+        files = outofcore.expand_shards(patterns)
+        one = outofcore.stratified_sample(files, TARGET, 100, workers=1,
+                                          chunk_rows=100)
+        two = outofcore.stratified_sample(files, TARGET, 100, workers=2,
+                                          chunk_rows=100)
+        pd.testing.assert_frame_equal(one[0], two[0])
+        pd.testing.assert_frame_equal(one[1], two[1])
+
+    def test_no_matching_shards(self, tmp_path):
+        """Test an empty glob is an error, not an empty model"""
+        with pytest.raises(FileNotFoundError):
+            outofcore.expand_shards([str(tmp_path / "*.csv")])
+
+    def test_train_shards_mode(self, shards, tmp_path, monkeypatch, capsys):
+        """Test train.py --shards saves a model with the usual schema"""
+        _, patterns = shards
+        monkeypatch.chdir(tmp_path)
+        args = argparse.Namespace(
+            shards=patterns, sample_rows=500, chunk_rows=100, workers=2,
+            test_size=0.2, report=str(tmp_path / "report.json"),
+            incremental=None)
+        train.main(args)
+
+        out = capsys.readouterr().out
+        assert "from 918 rows in 4 shards" in out
+        assert "max |proba diff| vs pickle: 0)" in out
+        pipeline = joblib.load(os.path.join("model", "model.pkl"))
+        assert list(pipeline.feature_names_in_) == \
+            [c for c in pd.read_csv(DATA, nrows=1).columns if c != TARGET]
+        assert os.path.exists(tmp_path / "report.json")
@@ -0,0 +1,97 @@
+import os
+import pstats
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.profiling import (ProfileStore, SlowRequestLog,  # noqa: E402
+                           payload_shape, server_timing)
+
+
+class TestServerTiming:
+    """Test cases for the Server-Timing header and payload summaries"""
+
+    def test_header_lists_stages_and_total(self):
+        """Test stages are rendered in order, in milliseconds"""
+        header = server_timing({"parse": 0.0012, "score": 0.003}, 0.005)
+        assert header == "parse;dur=1.200, score;dur=3.000, total;dur=5.000"
+
+    def test_payload_shape(self):
+        """Test row counts for record, batch and columnar bodies"""
+        assert payload_shape({"Age": 1, "Sex": "M"}, "json")["rows"] == 1
+        assert payload_shape([{}, {}], "json")["rows"] == 2
+        assert payload_shape({"records": [{}] * 3}, "json")["rows"] == 3
+        shape = payload_shape({"Age": [1, 2], "Sex": ["M", "F"]}, "arrow")
+        assert shape == {"format": "arrow", "rows": 2, "columns": 2}
+
+
+class TestSlowRequestLog:
+    """Test cases for the bounded slow-request log"""
+
+    def test_only_slow_requests_are_kept(self):
+        """Test requests under the threshold are ignored"""
+        log = SlowRequestLog(threshold_ms=100)
+        assert log.observe(0.05, path="/predict") is None
+        entry = log.observe(0.2, path="/predict/batch")
+        assert entry["duration_ms"] == 200.0
+        assert [e["path"] for e in log.entries()] == ["/predict/batch"]
+
+    def test_log_is_bounded(self):
+        """Test the oldest entries are dropped first"""
+        log = SlowRequestLog(threshold_ms=0, max_entries=3)
+        for i in range(5):
+            log.observe(0.001, n=i)
+        assert [e["n"] for e in log.entries()] == [4, 3, 2]
+
+
+class TestProfileStore:
+    """Test cases for saving and pruning request profiles"""
+
+    def test_profile_roundtrip(self, tmp_path):
+        """Test a saved profile loads with pstats and is listed"""
+        store = ProfileStore(str(tmp_path))
+        profiler = store.start()
+        sum(range(1000))
+        profile_id = store.finish(profiler, "POST /predict")
+        pstats.Stats(store.path(profile_id))
+        assert store.list() == [{"id": profile_id,
+                                 "request": "POST /predict"}]
+        assert "function calls" in store.report(profile_id)
+
+    def test_one_profile_at_a_time(self, tmp_path):
+        """Test a second concurrent profile is refused"""
+        store = ProfileStore(str(tmp_path))
+        profiler = store.start()
+        assert store.start() is None
+        store.finish(profiler)
+        profiler = store.start()
+        assert profiler is not None
+        store.finish(profiler)
+
+    def test_profiler_hook_unavailable(self, tmp_path, monkeypatch):
+        """Test a profiler that cannot be enabled is skipped, not fatal"""
+        class Busy:
+            def enable(self):
+                raise RuntimeError("Cannot install a profile function")
+
+        store = ProfileStore(str(tmp_path))
+        monkeypatch.setattr("cProfile.Profile", Busy)
+        assert store.start() is None
+        monkeypatch.undo()
+        profiler = store.start()
+        assert profiler is not None
+        store.finish(profiler)
+
+    def test_old_profiles_are_pruned(self, tmp_path):
+        """Test only the newest max_profiles are kept"""
+        store = ProfileStore(str(tmp_path), max_profiles=2)
+        for _ in range(4):
+            store.finish(store.start())
+        assert len(store.list()) == 2
+
+    def test_sampling(self):
+        """Test forced requests are always profiled, others by rate"""
+        assert ProfileStore("x", sample_rate=0.0).wanted(forced=True)
+        assert not ProfileStore("x", sample_rate=0.0).wanted()
+        assert ProfileStore("x", sample_rate=1.0).wanted()
@@ -0,0 +1,197 @@
+import json
+import os
+import shutil
+import sys
+import threading
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import app.app as api  # noqa: E402
+from app.loader import first_inference, load_bundle  # noqa: E402
+from app.registry import ModelLoadError, ModelRegistry  # noqa: E402
+
+
+@pytest.fixture
+def models(tmp_path):
+    """A registry root with two copies of the model: ``a`` keeps its
+    artifact, ``b`` is a "retrain" whose pickle no longer matches it"""
+    for name in ("a", "b"):
+        shutil.copytree("model", tmp_path / name)
+    with open(tmp_path / "b" / "model.pkl", "ab") as f:
+        f.write(b"\0")
+    return tmp_path
+
+
+def make_registry(directory, max_bytes=1 << 30, loads=None):
+    def load(model_path, meta_path, artifact_path):
+        if loads is not None:
+            loads.append(os.path.basename(os.path.dirname(model_path)))
+        bundle = load_bundle(model_path, meta_path, artifact_path,
+                             defer_pickle=True, log=lambda msg: None)
+        first_inference(bundle)
+        return bundle
+    return ModelRegistry(str(directory), load, max_bytes=max_bytes,
+                         log=lambda msg: None)
+
+
+@pytest.fixture
+def sample():
+    with open("test_data_correct.json") as f:
+        return json.load(f)
+
+
+class TestModelRegistry:
+    """Test cases for lazy loading and memory-bounded eviction"""
+
+    def test_loads_lazily_once(self, models):
+        """Test a model loads on first use and is reused afterwards"""
+        loads = []
+        registry = make_registry(models, loads=loads)
+        assert registry.names() == ["a", "b"]
+        assert registry.stats()["resident"] == []
+
+        first = registry.get("a")
+        assert registry.get("a") is first
+        assert loads == ["a"]
+        stats = registry.stats()["models"]["a"]
+        assert stats["loads"] == 1 and stats["hits"] == 1
+        assert stats["misses"] == 1 and stats["hit_rate"] == 0.5
+        assert stats["load_ms"] > 0 and stats["bytes"] > 0
+        assert stats["version"] == first.version
+
+    def test_each_model_has_its_own_files(self, models):
+        """Test models are loaded from their own directories"""
+        registry = make_registry(models)
+        a, b = registry.get("a"), registry.get("b")
+        assert a.version != b.version
+        # ``b`` cannot use the stale artifact, so it carries its pickle
+        assert a.pipeline is None and b.pipeline is not None
+        stats = registry.stats()["models"]
+        assert stats["b"]["bytes"] > stats["a"]["bytes"]
+
+    def test_evicts_least_recently_used(self, models):
+        """Test the coldest model is dropped past the memory cap"""
+        for name in ("c", "d"):
+            shutil.copytree(models / "a", models / name)
+        loads = []
+        registry = make_registry(models, loads=loads)
+        registry.get("a")
+        registry.max_bytes = 2 * registry.stats()["models"]["a"]["bytes"]
+        registry.get("c")
+        registry.get("a")  # ``c`` is now the coldest
+        registry.get("d")
+
+        stats = registry.stats()
+        assert stats["resident"] == ["a", "d"]
+        assert stats["bytes"] <= registry.max_bytes
+        assert stats["models"]["c"]["evictions"] == 1
+        assert not stats["models"]["c"]["resident"]
+        registry.get("c")
+        assert loads == ["a", "c", "d", "c"]
+        assert registry.stats()["resident"] == ["d", "c"]
+
+    def test_keeps_model_larger_than_cap(self, models):
+        """Test a model over the cap still serves, alone"""
+        registry = make_registry(models, max_bytes=1)
+        registry.get("a")
+        registry.get("b")
+        stats = registry.stats()
+        assert stats["resident"] == ["b"]
+        assert stats["models"]["a"]["evictions"] == 1
+
+    def test_unknown_and_invalid_names(self, models):
+        """Test names outside the registry are lookup errors"""
+        registry = make_registry(models)
+        for name in ("missing", "../a", ".", ""):
+            with pytest.raises(LookupError):
+                registry.get(name)
+        assert registry.stats()["models"] == {}
+
+    def test_load_failure(self, models):
+        """Test a broken model reports its error and can be retried"""
+        with open(models / "a" / "metadata.json", "w") as f:
+            f.write("{")
+        registry = make_registry(models)
+        with pytest.raises(ModelLoadError):
+            registry.get("a")
+        assert registry.stats()["models"]["a"]["last_error"]
+        shutil.copy(os.path.join("model", "metadata.json"),
+                    models / "a" / "metadata.json")
+        assert registry.get("a").version
+
+    def test_concurrent_first_use_loads_once(self, models):
+        """Test simultaneous cold requests share one load"""
+        loads = []
+        registry = make_registry(models, loads=loads)
+        results = []
+        threads = [threading.Thread(
+            target=lambda: results.append(registry.get("a")))
+            for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert loads == ["a"]
+        assert all(bundle is results[0] for bundle in results)
+
+
+class TestRegistryAPI:
+    """Test cases for selecting registry models over HTTP"""
+
+    @pytest.fixture(autouse=True)
+    def registry(self, models, monkeypatch):
+        registry = make_registry(models)
+        monkeypatch.setattr(api, "registry", registry)
+        self.client = api.app.test_client()
+        return registry
+
+    def test_route_and_header_select_model(self, sample, registry):
+        """Test /models/<name>/predict and X-Model pick the model"""
+        by_route = self.client.post("/models/b/predict", json=sample)
+        by_header = self.client.post("/predict", json=sample,
+                                     headers={"X-Model": "b"})
+        default = self.client.post("/predict", json=sample)
+        assert by_route.status_code == by_header.status_code == 200
+        version = registry.get("b").version
+        assert by_route.get_json()["model_version"] == version
+        assert by_header.get_json()["model_version"] == version
+        assert default.get_json()["model_version"] == \
+            api.store.active.version
+        assert by_route.get_json()["probabilities"] == \
+            default.get_json()["probabilities"]
+
+    def test_batch_and_stream_routes(self, sample, registry):
+        """Test batch and streaming requests use the named model"""
+        response = self.client.post("/models/a/predict/batch",
+                                    json=[sample, {"Age": 1}])
+        data = response.get_json()
+        assert data["n_success"] == 1 and data["n_errors"] == 1
+        assert data["model_version"] == registry.get("a").version
+
+        body = (json.dumps(sample) + "\n") * 3
+        response = self.client.post("/models/a/predict/stream", data=body)
+        summary = json.loads(response.data.splitlines()[-1])["summary"]
+        assert summary["n_success"] == 3
+        assert summary["model_version"] == registry.get("a").version
+
+    def test_unknown_model_is_404(self, sample):
+        """Test an unknown model name is not found"""
+        response = self.client.post("/models/nope/predict", json=sample)
+        assert response.status_code == 404
+        response = self.client.post("/predict", json=sample,
+                                    headers={"X-Model": "../model"})
+        assert response.status_code == 404
+
+    def test_stats_endpoint(self, sample):
+        """Test /stats/models reports per-model load time and hit rate"""
+        for _ in range(3):
+            self.client.post("/models/a/predict", json=sample)
+        stats = self.client.get("/stats/models").get_json()
+        assert stats["available"] == ["a", "b"]
+        assert stats["resident"] == ["a"]
+        model = stats["models"]["a"]
+        assert model["hits"] == 2 and model["misses"] == 1
+        assert model["load_ms"] > 0 and model["bytes"] > 0
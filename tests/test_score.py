@@ -0,0 +1,107 @@
+import argparse
+import os
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import score  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def pipeline():
+    return joblib.load(os.path.join("model", "model.pkl"))
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    df = pd.read_csv(os.path.join("datasets", "data.csv")).head(120)
+    df["PatientId"] = [f"p{i}" for i in range(len(df))]
+    paths = [str(tmp_path / "a.csv"), str(tmp_path / "b.csv")]
+    df.iloc[:70].to_csv(paths[0], index=False)
+    df.iloc[70:].to_csv(paths[1], index=False)
+    return df, paths
+
+
+def run_args(paths, output, **overrides):
+    args = dict(inputs=paths, output=output, format=None,
+                model=os.path.join("model", "model.pkl"),
+                meta=os.path.join("model", "metadata.json"),
+                workers=2, chunk_rows=25, id_column=None, resume=False)
+    args.update(overrides)
+    return argparse.Namespace(**args)
+
+
+class TestBatchScoring:
+    """Test cases for the offline batch-scoring CLI"""
+
+    def test_matches_pipeline_in_input_order(self, pipeline, inputs,
+                                             tmp_path):
+        """Test output rows follow input order and match the pipeline"""
+        df, paths = inputs
+        output = str(tmp_path / "out.csv")
+        score.main(run_args(paths, output))
+
+        out = pd.read_csv(output)
+        expected = pipeline.predict_proba(df.drop(
+            columns=["HeartDisease", "PatientId"]))
+        assert list(out["row"]) == list(range(len(df)))
+        assert np.allclose(out[["probability_0", "probability_1"]],
+                           expected)
+        assert list(out["prediction"]) == list(expected.argmax(axis=1))
+        assert not os.path.exists(output + ".parts")
+
+    def test_id_column_passthrough(self, inputs, tmp_path):
+        """Test --id-column replaces the row number"""
+        df, paths = inputs
+        output = str(tmp_path / "out.csv")
+        score.main(run_args(paths, output, id_column="PatientId"))
+
+        out = pd.read_csv(output)
+        assert list(out.columns[:2]) == ["PatientId", "prediction"]
+        assert list(out["PatientId"]) == list(df["PatientId"])
+
+    def test_resume_skips_finished_chunks(self, inputs, tmp_path):
+        """Test --resume keeps parts already written by the same run"""
+        df, paths = inputs
+        output = str(tmp_path / "out.csv")
+        args = run_args(paths, output, resume=True)
+        run = {
+            "inputs": [os.path.abspath(p) for p in paths],
+            "chunk_rows": args.chunk_rows,
+            "id_column": None,
+            "model_sha256": score.sha256_file(args.model),
+        }
+        parts_dir = output + ".parts"
+        score.prepare_parts(parts_dir, run, resume=False)
+        # A marker part proves chunk 0 is reused rather than re-scored
+        with open(score.part_path(parts_dir, 0), "w") as f:
+            f.write("".join(f"{i},1,0.0,1.0\n" for i in range(25)))
+
+        score.main(args)
+
+        out = pd.read_csv(output)
+        assert len(out) == len(df)
+        assert (out["probability_1"][:25] == 1.0).all()
+
+    def test_resume_discards_parts_from_other_run(self, inputs, tmp_path):
+        """Test a stale parts directory is not reused"""
+        _, paths = inputs
+        parts_dir = str(tmp_path / "out.csv.parts")
+        score.prepare_parts(parts_dir, {"chunk_rows": 1}, resume=False)
+        assert not score.prepare_parts(parts_dir, {"chunk_rows": 2},
+                                       resume=True)
+        assert score.prepare_parts(parts_dir, {"chunk_rows": 2},
+                                   resume=True)
+
+    def test_missing_columns_rejected(self, tmp_path):
+        """Test inputs lacking model features fail fast"""
+        path = str(tmp_path / "bad.csv")
+        pd.DataFrame({"Age": [40]}).to_csv(path, index=False)
+        with pytest.raises(SystemExit):
+            score.main(run_args([path], str(tmp_path / "out.csv")))
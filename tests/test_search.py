@@ -0,0 +1,64 @@
+import os
+import sys
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from training import search  # noqa: E402
+
+
+def toy_data(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 4))
+    y = (X[:, 0] + 0.5 * X[:, 1] + rng.normal(scale=0.5, size=n) > 0)
+    y = y.astype(int)
+    return X[:150], y[:150], X[150:], y[150:]
+
+
+class TestSearch:
+    """Test cases for the successive-halving hyperparameter search"""
+
+    def test_sample_configs_distinct_and_seeded(self):
+        """Test sampled configurations are unique and reproducible"""
+        configs = search.sample_configs(10, seed=3)
+        assert len({tuple(sorted(map(str, c.items())))
+                    for c in configs}) == 10
+        assert configs == search.sample_configs(10, seed=3)
+        assert set(configs[0]) == set(search.SPACE)
+
+    def test_halving_drops_configs_and_grows_trees(self):
+        """Test each rung keeps 1/eta of the configs with eta x trees"""
+        configs = search.sample_configs(8, seed=1)
+        best, trials, summary = search.successive_halving(
+            toy_data(), configs, workers=2, min_trees=2, max_trees=16,
+            eta=2, log=lambda *a: None)
+
+        per_rung = {}
+        for t in trials:
+            per_rung.setdefault(t["rung"], set()).add(t["n_estimators"])
+        counts = [sum(t["rung"] == r for t in trials) for r in per_rung]
+        assert counts == [8, 4, 2, 1]
+        assert [per_rung[r] for r in sorted(per_rung)] == \
+            [{2}, {4}, {8}, {16}]
+        # Survivors come from the better half of the previous rung
+        rung2 = {t["trial"] for t in trials if t["rung"] == 2}
+        rung1 = sorted((t for t in trials if t["rung"] == 1),
+                       key=lambda t: t["roc_auc"], reverse=True)
+        assert rung2 == {t["trial"] for t in rung1[:2]}
+        assert best["rung"] == 3 and best["n_estimators"] == 16
+        assert summary["trials"] == len(trials) == 15
+
+    def test_trials_report_time_and_cpu(self):
+        """Test every trial records wall time, CPU time and efficiency"""
+        _, trials, summary = search.successive_halving(
+            toy_data(), search.sample_configs(3), workers=1, min_trees=3,
+            max_trees=3, log=lambda *a: None)
+        assert len(trials) == 3
+        for t in trials:
+            assert t["wall_s"] > 0 and t["cpu_s"] >= 0
+            assert 0.0 <= t["cpu_efficiency"] <= 1.5
+            assert 0.0 <= t["roc_auc"] <= 1.0
+        assert summary["pool_efficiency"] > 0
+        assert "trial" in search.report(trials)
@@ -0,0 +1,151 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import train  # noqa: E402
+from app.loader import load_bundle  # noqa: E402
+from training import selection  # noqa: E402
+
+FAST = {"single_calls": 20, "batch_rows": 50, "batch_repeat": 2,
+        "warmup": 2}
+
+
+@pytest.fixture(scope="module")
+def data():
+    df = pd.read_csv(os.path.join("datasets", "data.csv"))
+    X = df.drop(columns=[train.TARGET])
+    y = df[train.TARGET]
+    cat_cols = X.select_dtypes(include=["object"]).columns.tolist()
+    num_cols = X.select_dtypes(exclude=["object"]).columns.tolist()
+    return (X, y, train.make_preprocessor(cat_cols, num_cols),
+            train.model_metadata(X, cat_cols, num_cols))
+
+
+def result(name, accuracy, latency):
+    return {"name": name, "accuracy": accuracy, "single_p95_ms": latency}
+
+
+class TestSelection:
+    """Test cases for latency-aware model selection"""
+
+    def test_pareto_front_drops_dominated_candidates(self):
+        """Test only candidates not beaten on latency and accuracy stay"""
+        results = [result("slow_best", 0.90, 2.0),
+                   result("dominated", 0.80, 1.5),
+                   result("fast", 0.85, 0.5),
+                   result("fastest", 0.70, 0.1)]
+        front = selection.pareto_front(results)
+        assert [r["name"] for r in front] == ["fastest", "fast",
+                                              "slow_best"]
+
+    def test_select_respects_latency_budget(self):
+        """Test the most accurate candidate within budget is chosen"""
+        results = [result("slow_best", 0.90, 2.0),
+                   result("fast", 0.85, 0.5),
+                   result("faster_tie", 0.85, 0.3)]
+        assert selection.select(results)["name"] == "slow_best"
+        assert selection.select(results, 1.0)["name"] == "faster_tie"
+        assert selection.select(results, 0.1) is None
+
+    def test_distilled_student_follows_teacher(self, data):
+        """Test a student fitted on soft labels tracks the teacher"""
+        X, y, preprocessor, _ = data
+        teacher = Pipeline(steps=[
+            ("preprocessor", preprocessor),
+            ("clf", RandomForestClassifier(n_estimators=30,
+                                           random_state=0))]).fit(X, y)
+        student = Pipeline(steps=[
+            ("preprocessor", train.make_preprocessor(
+                preprocessor.transformers[0][2],
+                preprocessor.transformers[1][2])),
+            ("clf", RandomForestClassifier(n_estimators=5, max_depth=5,
+                                           random_state=0))])
+        X_transfer = selection.transfer_set(X, 2000)
+        assert len(X_transfer) == len(X) + 2000
+        selection.distill(teacher, student, X_transfer)
+
+        assert list(student.classes_) == list(teacher.classes_)
+        agreement = np.mean(student.predict(X) == teacher.predict(X))
+        assert agreement > 0.85
+
+    def test_run_candidates_measures_serving_path(self, data):
+        """Test every candidate is scored, timed and sized"""
+        X, y, preprocessor, metadata = data
+        candidates = [("forest", {"n_estimators": 5, "max_depth": 4}),
+                      ("logistic_regression", {"C": 1.0}),
+                      ("student", {"n_estimators": 3, "max_depth": 3})]
+        results = selection.run_candidates(
+            preprocessor, metadata, X[:600], y[:600], X[600:], y[600:],
+            candidates=candidates, n_synthetic=200, latency_options=FAST,
+            log=lambda *a: None)
+
+        assert [r["kind"] for r in results] == ["forest",
+                                                "logistic_regression",
+                                                "student"]
+        assert [r["compiled"] for r in results] == [True, False, True]
+        for r in results:
+            assert 0.5 < r["accuracy"] <= 1.0
+            assert r["size_bytes"] > 0
+            assert 0 < r["single_p50_ms"] <= r["single_p95_ms"]
+            assert r["batch_us_per_row"] > 0
+        assert "pipeline" not in selection.summary(results)[0]
+
+    def test_selected_model_refit_on_training_split(self, data,
+                                                    monkeypatch):
+        """Test the exported model learns from all training rows, not
+        just the part left after the validation split"""
+        import argparse
+        X, y, preprocessor, metadata = data
+        monkeypatch.setattr(selection, "measure_latency",
+                            lambda bundle, records: {
+                                "single_p50_ms": 0.1, "single_p95_ms": 0.1,
+                                "batch_us_per_row": 1.0})
+        chosen = {}
+        select = selection.select
+
+        def record(results, budget_ms=None):
+            chosen.update(select(results, budget_ms))
+            return chosen
+
+        monkeypatch.setattr(selection, "select", record)
+        args = argparse.Namespace(val_size=0.2, latency_budget_ms=None,
+                                  report=None)
+        pipeline = train.select_model(args, preprocessor, metadata, X, y)
+
+        assert pipeline is not chosen["pipeline"]
+        expected = selection.fit_candidate(
+            preprocessor, chosen["kind"], chosen["params"], X, y)
+        np.testing.assert_array_equal(pipeline.predict_proba(X),
+                                      expected.predict_proba(X))
+        assert not np.array_equal(pipeline.predict_proba(X),
+                                  chosen["pipeline"].predict_proba(X))
+
+    def test_save_non_forest_drops_stale_artifact(self, data, tmp_path):
+        """Test a linear model is exported without a compiled artifact"""
+        X, y, preprocessor, metadata = data
+        model_dir = str(tmp_path)
+        os.makedirs(os.path.join(model_dir, "artifact"))
+        pipeline = Pipeline(steps=[
+            ("preprocessor", preprocessor),
+            ("clf", LogisticRegression(max_iter=1000))]).fit(X, y)
+
+        train.save_model(pipeline, metadata, X[:50], model_dir)
+
+        assert not os.path.exists(os.path.join(model_dir, "artifact"))
+        bundle = load_bundle(os.path.join(model_dir, "model.pkl"),
+                             os.path.join(model_dir, "metadata.json"),
+                             os.path.join(model_dir, "artifact"),
+                             log=lambda *a: None)
+        assert bundle.forest is None
+        _, proba = bundle.score(np.asarray(bundle.encode(
+            X[:3].to_dict(orient="records"))))
+        assert np.allclose(proba, pipeline.predict_proba(X[:3]))
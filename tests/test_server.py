@@ -0,0 +1,114 @@
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.server import plan_affinity  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def children_of(pid):
+    path = f"/proc/{pid}/task/{pid}/children"
+    with open(path) as f:
+        return [int(p) for p in f.read().split()]
+
+
+def threads_of(pid):
+    """Interpreter threads of ``pid``; native helper threads (e.g.
+    jemalloc's) name themselves and are not counted"""
+    def comm(tid):
+        with open(f"/proc/{pid}/task/{tid}/comm") as f:
+            return f.read()
+    main = comm(pid)
+    return sum(comm(tid) == main for tid in os.listdir(f"/proc/{pid}/task"))
+
+
+def wait_for(predicate, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if predicate():
+                return True
+        except OSError:
+            pass
+        time.sleep(0.1)
+    return False
+
+
+def test_plan_affinity_round_robin():
+    """Test workers are spread over the available CPUs"""
+    assert plan_affinity(5, [0, 2, 4]) == [0, 2, 4, 0, 2]
+    assert plan_affinity(2, []) == []
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"),
+                    reason="uses fork and /proc")
+class TestPreforkServer:
+    """Integration tests for the pre-fork master/worker server"""
+
+    def setup_method(self):
+        """Start a two-worker server on a free port"""
+        self.port = free_port()
+        env = dict(os.environ, PORT=str(self.port), HOST="127.0.0.1",
+                   WORKERS="2")
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "app.server"], cwd=ROOT, env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        assert wait_for(lambda: len(children_of(self.proc.pid)) == 2)
+        assert wait_for(lambda: urllib.request.urlopen(
+            f"http://127.0.0.1:{self.port}/", timeout=1).status == 200)
+
+    def teardown_method(self):
+        self.proc.send_signal(signal.SIGTERM)
+        self.proc.wait(timeout=10)
+
+    def predict(self):
+        with open(os.path.join(ROOT, "test_data_correct.json")) as f:
+            body = f.read().encode()
+        req = urllib.request.Request(
+            f"http://127.0.0.1:{self.port}/predict", data=body,
+            headers={"Content-Type": "application/json"})
+        return json.load(urllib.request.urlopen(req, timeout=5))
+
+    def test_workers_serve_predictions(self):
+        """Test forked workers answer /predict"""
+        assert self.predict()["prediction"] in [0, 1]
+
+    def test_metrics_aggregate_all_workers(self):
+        """Test /metrics counts requests served by every worker"""
+        for _ in range(6):
+            self.predict()
+        text = urllib.request.urlopen(
+            f"http://127.0.0.1:{self.port}/metrics", timeout=5).read()
+        assert (b'http_requests_total{endpoint="/predict",method="POST",'
+                b'status="200"} 6.0') in text
+
+    def test_watcher_runs_in_workers_only(self):
+        """Test the master forks with no threads; workers run the watcher"""
+        assert threads_of(self.proc.pid) == 1
+        for worker in children_of(self.proc.pid):
+            assert threads_of(worker) > 1
+
+    def test_dead_worker_is_restarted(self):
+        """Test the master replaces a killed worker"""
+        victim = children_of(self.proc.pid)[0]
+        os.kill(victim, signal.SIGKILL)
+        assert wait_for(lambda: victim not in children_of(self.proc.pid)
+                        and len(children_of(self.proc.pid)) == 2)
+        assert "prediction" in self.predict()
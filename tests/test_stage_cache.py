@@ -0,0 +1,109 @@
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import train  # noqa: E402
+from training.cache import StageCache  # noqa: E402
+
+DATA = os.path.abspath(os.path.join("datasets", "data.csv"))
+
+
+def double(x):
+    return [2 * v for v in x]
+
+
+def triple(x):
+    return [3 * v for v in x]
+
+
+class TestStageCache:
+    """Test cases for the content-addressed training stage cache"""
+
+    def setup_method(self):
+        self.calls = 0
+
+    def counted(self, x):
+        self.calls += 1
+        return double(x)
+
+    def test_second_run_hits(self, tmp_path):
+        """Test an unchanged stage is loaded instead of recomputed"""
+        cache = StageCache(str(tmp_path))
+        first, key = cache.run("double", self.counted, ([1, 2],),
+                               params={"n": 2}, code=(double,))
+        second, key2 = cache.run("double", self.counted, ([1, 2],),
+                                 params={"n": 2}, code=(double,))
+        assert first == second == [2, 4]
+        assert key == key2 and self.calls == 1
+        assert [e["hit"] for e in cache.events] == [False, True]
+        assert "1/2 stages from cache" in cache.report()
+
+    def test_key_changes_with_params_upstream_and_code(self, tmp_path):
+        """Test params, upstream keys and source code all invalidate"""
+        cache = StageCache(str(tmp_path))
+        base = cache.key("s", (double,), {"n": 1}, ["a"])
+        assert cache.key("s", (double,), {"n": 1}, ["a"]) == base
+        assert cache.key("s", (double,), {"n": 2}, ["a"]) != base
+        assert cache.key("s", (double,), {"n": 1}, ["b"]) != base
+        assert cache.key("s", (triple,), {"n": 1}, ["a"]) != base
+        assert cache.key("t", (double,), {"n": 1}, ["a"]) != base
+
+    def test_dataframes_stored_as_parquet(self, tmp_path):
+        """Test DataFrames round-trip through the columnar format"""
+        cache = StageCache(str(tmp_path))
+        df = pd.DataFrame({"a": [1, 2], "b": ["x", "y"]})
+        cache.run("frame", lambda: df, code=(double,))
+        loaded, _ = cache.run("frame", lambda: None, code=(double,))
+        pd.testing.assert_frame_equal(loaded, df)
+        files = [f for _, _, path in cache.entries()
+                 for f in os.listdir(path)]
+        assert "value.parquet" in files
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        """Test the oldest unused entries go once over max_bytes"""
+        cache = StageCache(str(tmp_path), max_bytes=10 ** 9)
+        for n in range(3):
+            cache.run(f"s{n}", double, (list(range(1000)),), code=(double,))
+            time.sleep(0.01)
+        # Touch s0 so s1 becomes the least recently used
+        cache.run("s0", double, (list(range(1000)),), code=(double,))
+        size = cache.entries()[0][1]
+        cache.max_bytes = 2 * size
+        assert cache.evict() == 1
+        remaining = {os.path.basename(p).split("-")[0]
+                     for _, _, p in cache.entries()}
+        assert remaining == {"s0", "s2"}
+
+    def test_disabled_cache_always_computes(self):
+        """Test a cache without a directory runs every stage"""
+        cache = StageCache(None)
+        for _ in range(2):
+            value, _ = cache.run("double", self.counted, ([1],),
+                                 code=(double,))
+        assert value == [2] and self.calls == 2
+        assert cache.entries() == []
+
+    def test_train_rerun_uses_cache(self, tmp_path, monkeypatch, capsys):
+        """Test a second train.py run takes every stage from the cache"""
+        monkeypatch.chdir(tmp_path)
+        args = argparse.Namespace(
+            data=DATA, test_size=0.2, select=False, search=False,
+            cache_dir=str(tmp_path / "cache"), cache_max_mb=100,
+            no_cache=False, report=None, incremental=None, shards=None)
+        train.main(args)
+        first = capsys.readouterr().out
+        train.main(args)
+        second = capsys.readouterr().out
+
+        assert "0/5 stages from cache" in first
+        assert "5/5 stages from cache" in second
+        accuracy = [line for line in first.splitlines()
+                    if line.startswith("Accuracy")]
+        assert accuracy and accuracy[0] in second
+        assert os.path.exists(tmp_path / "model" / "model.pkl")
@@ -0,0 +1,84 @@
+import os
+import sys
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import wire  # noqa: E402
+
+
+class TestNegotiation:
+    """Test cases for Content-Type and Accept handling"""
+
+    def test_request_format_defaults_to_json(self):
+        """Test a missing Content-Type means JSON"""
+        assert wire.request_format(None) == wire.JSON
+        assert wire.request_format("application/json; charset=utf-8") == \
+            wire.JSON
+
+    def test_request_format_aliases(self):
+        """Test MessagePack aliases map to one media type"""
+        assert wire.request_format("application/x-msgpack") == wire.MSGPACK
+
+    def test_request_format_unsupported(self):
+        """Test unknown request types raise a 415 WireError"""
+        with pytest.raises(wire.WireError) as exc:
+            wire.request_format("text/csv")
+        assert exc.value.status == 415
+
+    def test_response_format_follows_quality(self):
+        """Test the highest q wins and wildcards mean the default"""
+        accept = "application/json;q=0.5, application/msgpack"
+        assert wire.response_format(accept) == wire.MSGPACK
+        assert wire.response_format("*/*", wire.ARROW) == wire.ARROW
+        assert wire.response_format(None, wire.MSGPACK) == wire.MSGPACK
+
+    def test_response_format_not_acceptable(self):
+        """Test Accept without a supported type raises a 406 WireError"""
+        with pytest.raises(wire.WireError) as exc:
+            wire.response_format("text/csv, application/json;q=0")
+        assert exc.value.status == 406
+
+
+class TestColumnarResult:
+    """Test cases for converting batch results between layouts"""
+
+    def setup_method(self):
+        """Build a two-row result with one error"""
+        self.payload = {
+            "results": [{"prediction": 1, "probabilities": [0.25, 0.75]},
+                        {"error": "Missing features: ['Age']"}],
+            "n_success": 1,
+            "n_errors": 1,
+            "model_version": "abc"
+        }
+
+    def test_payload_roundtrip(self):
+        """Test a batch document survives conversion to arrays and back"""
+        result = wire.ColumnarResult.from_payload(self.payload, [0, 1])
+        assert result.to_payload() == self.payload
+
+    def test_columns_hold_none_for_errors(self):
+        """Test columnar output marks failed rows with None"""
+        columns = wire.ColumnarResult.from_payload(
+            self.payload, [0, 1]).to_columns()
+        assert columns["prediction"] == [1, None]
+        assert columns["probability_1"] == [0.75, None]
+        assert columns["error"] == [None, "Missing features: ['Age']"]
+
+    def test_arrow_response(self):
+        """Test Arrow output keeps nulls and summary metadata"""
+        body, media = wire.encode(self.payload, wire.ARROW, [0, 1])
+        assert media == wire.ARROW
+        columns, meta = wire.decode_arrow_response(body)
+        assert columns["probability_0"] == [0.25, None]
+        assert meta == {"n_success": "1", "n_errors": "1",
+                        "model_version": "abc"}
+
+    def test_errors_are_never_arrow(self):
+        """Test error documents fall back to JSON"""
+        body, media = wire.encode({"error": "bad"}, wire.ARROW)
+        assert media == wire.JSON
+        assert body == b'{"error":"bad"}'
@@ -1,9 +1,14 @@
 # train.py
 import argparse
+import copy
 import os
 import json
+import shutil
+import sys
+import time
 import pandas as pd
 import joblib
+from sklearn.base import clone
 from sklearn.model_selection import train_test_split
 from sklearn.compose import ColumnTransformer
 from sklearn.preprocessing import OneHotEncoder, StandardScaler
@@ -11,55 +16,445 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.pipeline import Pipeline
 from sklearn.metrics import classification_report, accuracy_score
 
+from app.artifact import export_artifact, check_parity, sha256_file
+from app.forest import CompiledForest
 
-def main(args):
-    df = pd.read_csv(args.data)
-    target = "HeartDisease"
-    X = df.drop(columns=[target])
-    y = df[target]
+MODEL_DIR = "model"
+TARGET = "HeartDisease"
+SEARCH_OPTIONS = ("val_size", "trials", "seed", "workers", "min_trees",
+                  "max_trees", "eta")
 
-    # Identify categorical and numeric columns
-    cat_cols = X.select_dtypes(include=["object"]).columns.tolist()
-    num_cols = X.select_dtypes(exclude=["object"]).columns.tolist()
 
-    preprocessor = ColumnTransformer(
+def make_preprocessor(cat_cols, num_cols):
+    return ColumnTransformer(
         transformers=[
             ("cat", OneHotEncoder(handle_unknown="ignore"), cat_cols),
             ("num", StandardScaler(), num_cols)
         ]
     )
 
-    pipeline = Pipeline(steps=[
-        ("preprocessor", preprocessor),
-        ("clf", RandomForestClassifier(n_estimators=100, random_state=42))
-    ])
 
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=args.test_size, random_state=42, stratify=y
+def model_metadata(X, cat_cols, num_cols, target=TARGET):
+    return {
+        "feature_names": list(X.columns),
+        "categorical": cat_cols,
+        "numerical": num_cols,
+        "target": target
+    }
+
+
+def save_model(pipeline, metadata, X_test, model_dir=MODEL_DIR):
+    """Write ``model.pkl``, ``metadata.json`` and, for forests, the
+    compiled artifact checked against ``X_test``."""
+    os.makedirs(model_dir, exist_ok=True)
+    model_path = os.path.join(model_dir, "model.pkl")
+    artifact_dir = os.path.join(model_dir, "artifact")
+    joblib.dump(pipeline, model_path)
+    with open(os.path.join(model_dir, "metadata.json"), "w") as f:
+        json.dump(metadata, f, indent=2)
+
+    print("Saved model and metadata.")
+
+    try:
+        CompiledForest.from_estimator(pipeline.steps[-1][1])
+    except TypeError:
+        # Not a forest: the API serves it through sklearn, and an artifact
+        # left over from an earlier forest would only be rejected as stale
+        shutil.rmtree(artifact_dir, ignore_errors=True)
+        print("No compiled artifact for this model type.")
+        return
+    export_artifact(pipeline, artifact_dir, sha256_file(model_path))
+    max_diff = check_parity(pipeline, artifact_dir, X_test)
+    print(f"Saved compiled artifact (max |proba diff| vs pickle: "
+          f"{max_diff:.3g}).")
+
+
+def select_model(args, preprocessor, metadata, X_train, y_train):
+    """Compare candidate models on a validation split of the training
+    data and return the one chosen for ``--latency-budget-ms``, refitted
+    on all of ``X_train``."""
+    from training import selection
+
+    X_fit, X_val, y_fit, y_val = train_test_split(
+        X_train, y_train, test_size=args.val_size, random_state=42,
+        stratify=y_train
     )
+    print(f"Evaluating {len(selection.CANDIDATES)} candidates "
+          f"({len(X_fit)} training, {len(X_val)} validation rows)...")
+    results = selection.run_candidates(preprocessor, metadata, X_fit, y_fit,
+                                       X_val, y_val)
+    front = selection.pareto_front(results)
+    chosen = selection.select(results, args.latency_budget_ms)
+    print(selection.report(results, front, chosen))
+    print("  * Pareto front (latency vs accuracy), > selected")
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump({
+                "latency_budget_ms": args.latency_budget_ms,
+                "selected": chosen["name"] if chosen else None,
+                "pareto_front": [r["name"] for r in front],
+                "candidates": selection.summary(results),
+            }, f, indent=2)
+    if chosen is None:
+        sys.exit(f"No candidate has a single-row p95 latency within "
+                 f"{args.latency_budget_ms}ms; nothing exported.")
+    # Validation rows only served to compare candidates; the exported
+    # model learns from the whole training split, like --search's refit
+    print(f"Selected {chosen['name']}; refitting on all "
+          f"{len(X_train)} training rows")
+    return selection.fit_candidate(preprocessor, chosen["kind"],
+                                   chosen["params"], X_train, y_train)
+
+
+def search_forest(preprocessor, X_train, y_train, options):
+    """Successive-halving search over forest hyperparameters.
 
+    Returns the best configuration refitted on all of ``X_train`` and the
+    search record (``best``, ``summary`` and every trial).
+    """
+    from training import search
+
+    X_fit, X_val, y_fit, y_val = train_test_split(
+        X_train, y_train, test_size=options["val_size"], random_state=42,
+        stratify=y_train
+    )
+    # Encode once; every trial reuses the same matrices
+    encoder = clone(preprocessor).fit(X_fit)
+    data = (encoder.transform(X_fit), y_fit.to_numpy(),
+            encoder.transform(X_val), y_val.to_numpy())
+    configs = search.sample_configs(options["trials"], seed=options["seed"])
+    workers = options["workers"]
+    print(f"Searching {len(configs)} configurations on {workers} "
+          f"workers ({options['min_trees']}-{options['max_trees']} trees, "
+          f"eta={options['eta']})...")
+    best, trials, summary = search.successive_halving(
+        data, configs, workers, options["min_trees"], options["max_trees"],
+        options["eta"])
+
+    clf = RandomForestClassifier(n_estimators=best["n_estimators"],
+                                 random_state=42, n_jobs=workers,
+                                 **best["params"])
+    pipeline = Pipeline(steps=[("preprocessor", clone(preprocessor)),
+                               ("clf", clf)])
     pipeline.fit(X_train, y_train)
+    # Serve single-threaded: joblib dispatch costs more than it saves on
+    # request-sized batches
+    clf.set_params(n_jobs=None)
+    return pipeline, {"best": best, "summary": summary, "trials": trials}
+
+
+def print_search(record, report_path=None):
+    from training import search
+
+    best, summary = record["best"], record["summary"]
+    print(search.report(record["trials"]))
+    print(f"{summary['trials']} trials in {summary['wall_s']:.2f}s wall, "
+          f"{summary['cpu_s']:.2f}s CPU "
+          f"({summary['pool_efficiency']:.0%} of {summary['workers']} "
+          f"workers)")
+    if report_path:
+        with open(report_path, "w") as f:
+            json.dump(record, f, indent=2)
+    print(f"Best: {best['n_estimators']} trees, {best['params']} "
+          f"(validation AUC {best['roc_auc']:.4f})")
+
+
+def ingest(path):
+    return pd.read_csv(path)
+
+
+def split(df, target, test_size):
+    X = df.drop(columns=[target])
+    y = df[target]
+    return train_test_split(
+        X, y, test_size=test_size, random_state=42, stratify=y
+    )
+
+
+def fit_preprocessor(X_train, cat_cols, num_cols):
+    return make_preprocessor(cat_cols, num_cols).fit(X_train)
+
+
+def fit_forest(preprocessor, X_train, y_train):
+    """The default model: a 100-tree forest on the fitted preprocessor."""
+    clf = RandomForestClassifier(n_estimators=100, random_state=42)
+    clf.fit(preprocessor.transform(X_train), y_train)
+    return Pipeline(steps=[("preprocessor", preprocessor), ("clf", clf)])
+
+
+def evaluate(pipeline, X_test, y_test):
     preds = pipeline.predict(X_test)
+    return {"accuracy": accuracy_score(y_test, preds),
+            "report": classification_report(y_test, preds)}
 
-    print("Accuracy:", accuracy_score(y_test, preds))
-    print(classification_report(y_test, preds))
 
-    os.makedirs("model", exist_ok=True)
-    joblib.dump(pipeline, "model/model.pkl")
-    with open("model/metadata.json", "w") as f:
-        json.dump({
-            "feature_names": list(X.columns),
-            "categorical": cat_cols,
-            "numerical": num_cols,
-            "target": target
-        }, f, indent=2)
+def update_model(args):
+    """Grow the saved forest with the labelled rows in ``--incremental``.
 
-    print("Saved model and metadata.")
+    The last ``--recent-rows`` rows of the model's recent-rows buffer are
+    mixed into the update so every class is represented; the new rows are
+    then appended to the buffer.  Only ``--compare`` reads the full
+    ``--data`` history, to retrain from scratch.
+    """
+    from training import incremental
+
+    model_path = os.path.join(MODEL_DIR, "model.pkl")
+    with open(os.path.join(MODEL_DIR, "metadata.json")) as f:
+        metadata = json.load(f)
+    target, features = metadata["target"], metadata["feature_names"]
+    pipeline = joblib.load(model_path)
+    new = pd.concat([pd.read_csv(path) for path in args.incremental],
+                    ignore_index=True)
+    try:
+        incremental.check_rows(new, metadata, pipeline.classes_)
+    except ValueError as e:
+        sys.exit(f"Rejected {', '.join(args.incremental)}: {e}")
+
+    holdout = None
+    if args.compare:
+        new, holdout = train_test_split(new, test_size=args.holdout,
+                                        random_state=42)
+    buffer = incremental.load_recent(MODEL_DIR, fallback=args.data)
+    recent = buffer.tail(args.recent_rows)
+    rows = pd.concat([recent, new], ignore_index=True)
+
+    previous = copy.deepcopy(pipeline) if args.compare else None
+    try:
+        stats = incremental.grow_forest(pipeline, rows[features],
+                                        rows[target], args.add_trees,
+                                        args.keep_trees)
+    except (TypeError, ValueError) as e:
+        sys.exit(str(e))
+    print(f"Added {stats['added']} trees fitted on {stats['rows']} rows "
+          f"({len(new)} new, {len(recent)} recent) in "
+          f"{stats['fit_s']:.2f}s; dropped {stats['dropped']} oldest, "
+          f"{stats['n_estimators']} trees now.")
+
+    if args.compare:
+        history = pd.read_csv(args.data)
+        X_hist_train, X_hist_test, _, y_hist_test = split(
+            history, target, args.test_size)
+        history_train = history.loc[sorted(X_hist_train.index)]
+        start = time.perf_counter()
+        full_rows = pd.concat([history_train, new], ignore_index=True)
+        cat_cols, num_cols = metadata["categorical"], metadata["numerical"]
+        full = Pipeline(steps=[
+            ("preprocessor", make_preprocessor(cat_cols, num_cols)),
+            ("clf", RandomForestClassifier(
+                n_estimators=stats["n_estimators"], random_state=42))
+        ]).fit(full_rows[features], full_rows[target])
+        full_s = time.perf_counter() - start
+        print(f"  {'model':<12} {'fit rows':>8} {'fit s':>7} "
+              f"{'acc new':>8} {'acc history':>11}")
+        for name, model, n_rows, seconds in (
+                ("previous", previous, 0, 0.0),
+                ("incremental", pipeline, stats["rows"], stats["fit_s"]),
+                ("full", full, len(full_rows), full_s)):
+            new_acc = accuracy_score(holdout[target],
+                                     model.predict(holdout[features]))
+            hist_acc = accuracy_score(y_hist_test,
+                                      model.predict(X_hist_test))
+            print(f"  {name:<12} {n_rows:8d} {seconds:7.2f} "
+                  f"{new_acc:8.4f} {hist_acc:11.4f}")
+
+    save_model(pipeline, metadata, rows[features])
+    incremental.save_recent(pd.concat([buffer, new], ignore_index=True),
+                            MODEL_DIR)
+
+
+def save_recent(rows, model_dir=MODEL_DIR):
+    """Seed the recent-rows buffer used by ``--incremental``."""
+    from training import incremental
+    incremental.save_recent(rows, model_dir)
+
+
+def train_shards(args):
+    """Train the default forest on a stratified sample of CSV shards,
+    without loading the full dataset."""
+    from training import outofcore
+
+    start = time.perf_counter()
+    files = outofcore.expand_shards(args.shards)
+    train_df, test_df, info = outofcore.stratified_sample(
+        files, TARGET, args.sample_rows, args.test_size, args.chunk_rows,
+        args.workers)
+    sample_s = time.perf_counter() - start
+    features = info["features"]
+    # Read as float32 to stay compact, but fit on float64 like the API
+    # scales requests; float32-scaled features could land on the other
+    # side of a split than the served ones
+    upcast = {col: "float64" for col in info["numerical"]}
+    train_df, test_df = train_df.astype(upcast), test_df.astype(upcast)
+    print(f"Sampled {len(train_df)} training and {len(test_df)} test rows "
+          f"from {info['rows']} rows in {len(files)} shards "
+          f"({outofcore.file_bytes(files) / (1 << 20):.1f} MiB) in "
+          f"{sample_s:.2f}s: {info['rows'] / sample_s:,.0f} rows/s; "
+          f"classes {info['classes']}")
+
+    start = time.perf_counter()
+    clf = RandomForestClassifier(n_estimators=100, random_state=42,
+                                 n_jobs=args.workers)
+    pipeline = Pipeline(steps=[
+        ("preprocessor", make_preprocessor(info["categorical"],
+                                           info["numerical"])),
+        ("clf", clf)
+    ]).fit(train_df[features], train_df[TARGET])
+    clf.set_params(n_jobs=None)
+    fit_s = time.perf_counter() - start
+
+    scores = evaluate(pipeline, test_df[features], test_df[TARGET])
+    print("Accuracy:", scores["accuracy"])
+    print(scores["report"])
+    metadata = {"feature_names": features,
+                "categorical": info["categorical"],
+                "numerical": info["numerical"], "target": TARGET}
+    save_model(pipeline, metadata, test_df[features])
+    save_recent(train_df)
+
+    peak, worker_peak = outofcore.peak_rss_mb()
+    if peak is not None:
+        print(f"Fit {fit_s:.2f}s; peak memory {peak:.0f} MiB "
+              f"(largest worker {worker_peak:.0f} MiB)")
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump({
+                "rows": info["rows"], "shards": len(files),
+                "bytes": outofcore.file_bytes(files),
+                "train_rows": len(train_df), "test_rows": len(test_df),
+                "sample_s": sample_s, "fit_s": fit_s,
+                "rows_per_s": info["rows"] / sample_s,
+                "accuracy": scores["accuracy"],
+                "peak_rss_mb": peak, "worker_peak_rss_mb": worker_peak,
+            }, f, indent=2)
+
+
+def main(args):
+    from training import search
+    from training.cache import StageCache
+
+    if args.incremental:
+        return update_model(args)
+    if args.shards:
+        return train_shards(args)
+
+    cache = StageCache(None if args.no_cache else args.cache_dir,
+                       int(args.cache_max_mb * (1 << 20)))
+    target = TARGET
+
+    df, data_key = cache.run(
+        "ingest", ingest, (args.data,),
+        params={"data_sha256": sha256_file(args.data)})
+    X = df.drop(columns=[target])
+
+    # Identify categorical and numeric columns
+    cat_cols = X.select_dtypes(include=["object"]).columns.tolist()
+    num_cols = X.select_dtypes(exclude=["object"]).columns.tolist()
+    metadata = model_metadata(X, cat_cols, num_cols, target)
+
+    (X_train, X_test, y_train, y_test), split_key = cache.run(
+        "split", split, (df, target, args.test_size),
+        params={"target": target, "test_size": args.test_size},
+        upstream=[data_key])
+
+    if args.select:
+        # Not cached: the comparison times candidates on this machine
+        pipeline = select_model(args, make_preprocessor(cat_cols, num_cols),
+                                metadata, X_train, y_train)
+        model_key = joblib.hash(pipeline)
+    elif args.search:
+        options = {k: getattr(args, k) for k in SEARCH_OPTIONS}
+        (pipeline, record), model_key = cache.run(
+            "search", search_forest,
+            (make_preprocessor(cat_cols, num_cols), X_train, y_train,
+             options),
+            # The pool size changes timings, not the result
+            params={k: v for k, v in options.items() if k != "workers"},
+            upstream=[split_key],
+            code=(search_forest, make_preprocessor, search))
+        print_search(record, args.report)
+    else:
+        preprocessor, prep_key = cache.run(
+            "preprocess", fit_preprocessor, (X_train, cat_cols, num_cols),
+            params={"categorical": cat_cols, "numerical": num_cols},
+            upstream=[split_key], code=(fit_preprocessor, make_preprocessor))
+        pipeline, model_key = cache.run(
+            "model", fit_forest, (preprocessor, X_train, y_train),
+            upstream=[prep_key, split_key])
+
+    scores, _ = cache.run("evaluate", evaluate, (pipeline, X_test, y_test),
+                          upstream=[model_key, split_key])
+    print("Accuracy:", scores["accuracy"])
+    print(scores["report"])
+
+    save_model(pipeline, metadata, X_test)
+    # Training rows in file order, so the buffer's tail is the most recent
+    save_recent(pd.concat([X_train, y_train], axis=1).sort_index())
+    if cache.directory is not None:
+        print(cache.report())
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--data", default="datasets/data.csv")
     parser.add_argument("--test-size", type=float, default=0.2)
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--select", action="store_true",
+                      help="benchmark candidate models and export the "
+                           "most accurate one within the latency budget")
+    mode.add_argument("--search", action="store_true",
+                      help="search forest hyperparameters with successive "
+                           "halving and export the best configuration")
+    mode.add_argument("--incremental", nargs="+", metavar="CSV",
+                      help="grow the saved forest with these new labelled "
+                           "rows instead of retraining")
+    mode.add_argument("--shards", nargs="+", metavar="GLOB",
+                      help="train out of core on a stratified sample of "
+                           "these CSV shards")
+    parser.add_argument("--latency-budget-ms", type=float,
+                        help="max single-row p95 serving latency "
+                             "(--select)")
+    parser.add_argument("--val-size", type=float, default=0.2,
+                        help="share of the training data used to compare "
+                             "candidates (--select, --search)")
+    parser.add_argument("--report",
+                        help="write the candidate comparison, search "
+                             "trials or sampling report as JSON (--select, "
+                             "--search, --shards)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="worker processes (--search, --shards)")
+    parser.add_argument("--trials", type=int, default=27,
+                        help="configurations to start from (--search)")
+    parser.add_argument("--min-trees", type=int, default=10,
+                        help="trees per trial in the first rung (--search)")
+    parser.add_argument("--max-trees", type=int, default=270,
+                        help="trees per trial in the last rung (--search)")
+    parser.add_argument("--eta", type=int, default=3,
+                        help="keep 1/eta of the configurations per rung "
+                             "and multiply their trees by eta (--search)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed for sampling configurations (--search)")
+    parser.add_argument("--add-trees", type=int, default=20,
+                        help="trees fitted on the new rows (--incremental)")
+    parser.add_argument("--keep-trees", type=int,
+                        help="drop the oldest trees beyond this "
+                             "(--incremental)")
+    parser.add_argument("--recent-rows", type=int, default=200,
+                        help="latest history rows mixed into the update "
+                             "(--incremental)")
+    parser.add_argument("--compare", action="store_true",
+                        help="also retrain from scratch and compare "
+                             "accuracy on held-out new rows (--incremental)")
+    parser.add_argument("--holdout", type=float, default=0.2,
+                        help="share of the new rows held out by --compare")
+    parser.add_argument("--sample-rows", type=int, default=1_000_000,
+                        help="training plus test rows to sample (--shards)")
+    parser.add_argument("--chunk-rows", type=int, default=100_000,
+                        help="rows read per chunk (--shards)")
+    parser.add_argument("--cache-dir", default=".train_cache",
+                        help="where fitted stages are cached between runs")
+    parser.add_argument("--cache-max-mb", type=float, default=1024,
+                        help="evict least recently used stages past this")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="recompute every stage")
     args = parser.parse_args()
     main(args)
@@ -0,0 +1,2 @@
+# training/__init__.py
+"""Helpers for ``train.py``: building, comparing and exporting models."""
@@ -0,0 +1,179 @@
+# training/cache.py
+"""Content-addressed cache for training stages.
+
+A stage's key hashes its name, the source code that computes it, the
+library versions its output depends on, its parameters and the keys of
+the stages it consumes.  A changed input therefore invalidates that stage
+and everything downstream of it, while unchanged stages load from disk.
+
+Each entry is a directory ``<stage>-<key>`` holding the value and a
+``meta.json`` with the time the stage took to compute.  DataFrames are
+stored as Parquet when pyarrow is installed; everything else with joblib.
+Entries are written to a temporary directory and renamed into place, and
+reading one refreshes its ``meta.json`` mtime, so eviction past
+``max_bytes`` drops the least recently used entries first.
+"""
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+
+try:
+    import pyarrow  # noqa: F401
+except ImportError:  # pragma: no cover - optional dependency
+    pyarrow = None
+
+META = "meta.json"
+VERSIONS = {"python": sys.version.split()[0], "numpy": np.__version__,
+            "pandas": pd.__version__, "sklearn": sklearn.__version__}
+
+
+def source_digest(obj):
+    """Hash of the source of a function, class or module."""
+    return hashlib.sha256(inspect.getsource(obj).encode()).hexdigest()
+
+
+class StageCache:
+    """On-disk stage results keyed by content hashes, bounded in size."""
+
+    def __init__(self, directory, max_bytes=1 << 30):
+        # None disables caching: every stage is computed
+        self.directory = directory
+        self.max_bytes = max_bytes
+        # One entry per stage run: stage, key, hit, seconds, saved_s
+        self.events = []
+
+    def key(self, stage, code, params=None, upstream=()):
+        """Key for ``stage`` computed by ``code`` (objects whose source
+        counts) from ``params`` and the keys in ``upstream``."""
+        spec = {
+            "stage": stage,
+            "code": [source_digest(obj) for obj in code],
+            "versions": VERSIONS,
+            "params": params or {},
+            "upstream": list(upstream),
+        }
+        blob = json.dumps(spec, sort_keys=True, default=str)
+        return hashlib.sha256(blob.encode()).hexdigest()
+
+    def _entry(self, stage, key):
+        return os.path.join(self.directory, f"{stage}-{key[:32]}")
+
+    def run(self, stage, fn, args=(), params=None, upstream=(), code=None):
+        """Return ``(fn(*args), key)``, loading the value when cached.
+
+        ``params`` and ``upstream`` must determine the result; ``args`` is
+        how it is computed.  ``code`` defaults to ``fn`` itself.
+        """
+        key = self.key(stage, code or (fn,), params, upstream)
+        if self.directory is None:
+            return fn(*args), key
+        entry = self._entry(stage, key)
+        start = time.perf_counter()
+        try:
+            value, meta = self._load(entry)
+        except (OSError, ValueError, EOFError):
+            value = meta = None
+        if meta is not None:
+            seconds = time.perf_counter() - start
+            os.utime(os.path.join(entry, META))
+            self.events.append({
+                "stage": stage, "key": key, "hit": True, "seconds": seconds,
+                "saved_s": max(0.0, meta["compute_s"] - seconds)})
+            return value, key
+
+        value = fn(*args)
+        seconds = time.perf_counter() - start
+        self._store(entry, stage, key, value, seconds)
+        self.events.append({"stage": stage, "key": key, "hit": False,
+                            "seconds": seconds, "saved_s": 0.0})
+        self.evict()
+        return value, key
+
+    def _load(self, entry):
+        with open(os.path.join(entry, META)) as f:
+            meta = json.load(f)
+        path = os.path.join(entry, meta["file"])
+        if meta["file"].endswith(".parquet"):
+            return pd.read_parquet(path), meta
+        return joblib.load(path), meta
+
+    def _store(self, entry, stage, key, value, seconds):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix=".tmp-", dir=self.directory)
+        try:
+            if isinstance(value, pd.DataFrame) and pyarrow is not None:
+                name = "value.parquet"
+                value.to_parquet(os.path.join(tmp, name))
+            else:
+                name = "value.joblib"
+                joblib.dump(value, os.path.join(tmp, name))
+            size = sum(os.path.getsize(os.path.join(tmp, f))
+                       for f in os.listdir(tmp))
+            with open(os.path.join(tmp, META), "w") as f:
+                json.dump({"stage": stage, "key": key, "file": name,
+                           "compute_s": seconds, "bytes": size,
+                           "created": time.time()}, f, indent=2)
+            shutil.rmtree(entry, ignore_errors=True)
+            os.replace(tmp, entry)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+    def entries(self):
+        """Cached entries as ``(last used, bytes, path)``, oldest first."""
+        if self.directory is None:
+            return []
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        entries = []
+        for name in names:
+            meta_path = os.path.join(self.directory, name, META)
+            try:
+                with open(meta_path) as f:
+                    size = json.load(f)["bytes"]
+                entries.append((os.path.getmtime(meta_path), size,
+                                os.path.join(self.directory, name)))
+            except (OSError, ValueError, KeyError):
+                continue
+        entries.sort()
+        return entries
+
+    def evict(self):
+        """Drop least recently used entries until under ``max_bytes``;
+        return the number removed."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            removed += 1
+        return removed
+
+    def report(self):
+        """Printable hit/miss summary of the stages run so far."""
+        lines = [f"Stage cache ({self.directory}):"]
+        for e in self.events:
+            outcome = "hit " if e["hit"] else "miss"
+            saved = f"  saved {e['saved_s']:.3f}s" if e["hit"] else ""
+            lines.append(f"  {e['stage']:<12} {outcome} "
+                         f"{e['seconds']:8.3f}s{saved}")
+        hits = sum(e["hit"] for e in self.events)
+        saved = sum(e["saved_s"] for e in self.events)
+        lines.append(f"  {hits}/{len(self.events)} stages from cache, "
+                     f"{saved:.3f}s saved")
+        return "\n".join(lines)
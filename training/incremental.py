@@ -0,0 +1,126 @@
+# training/incremental.py
+"""Grow a fitted forest with new labelled rows instead of retraining.
+
+New rows are checked against ``metadata.json`` with the same per-row
+validation the API applies to requests, and their labels against the
+forest's classes.  ``grow_forest`` then fits ``add_trees`` extra trees on
+the new rows (plus whatever recent history the caller mixes in) with
+``warm_start``, so the cost depends on those rows only, never on the full
+history.  The preprocessor is reused as fitted: categories first seen in
+the new rows are ignored by the one-hot encoder until the next full
+retrain.  With ``max_trees`` the oldest trees are dropped so the forest,
+and the serving latency, stay the same size.
+
+The recent history mixed into an update comes from ``recent.csv`` next to
+the model: the tail of the training rows of the last full training, with
+every update's new rows appended and the oldest dropped past
+``RECENT_MAX_ROWS``.  Updates therefore never re-read the full history.
+"""
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.loader import ModelBundle
+
+# Row errors listed before the rest are summarised
+MAX_REPORTED = 5
+RECENT_FILE = "recent.csv"
+# Labelled rows kept in the recent-rows buffer
+RECENT_MAX_ROWS = 5000
+
+
+def check_rows(df, metadata, classes):
+    """Raise ``ValueError`` unless ``df`` matches the model's schema.
+
+    Every feature in ``metadata`` and the target column must be present;
+    rows must pass the API's validation and be labelled with one of
+    ``classes``.  Row numbers in the message are CSV line numbers.
+    """
+    target = metadata["target"]
+    missing = [c for c in metadata["feature_names"] + [target]
+               if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {missing}")
+    schema = ModelBundle("", "", metadata, None, None)
+    _, errors = schema.validate_columns(
+        {feat: df[feat].to_numpy() for feat in metadata["feature_names"]})
+    labels = df[target].to_numpy()
+    for i in np.flatnonzero(~np.isin(labels, classes)):
+        errors.setdefault(int(i), f"Unknown {target} {labels[i]}")
+    if errors:
+        rows = sorted(errors)
+        lines = [f"line {i + 2}: {errors[i]}" for i in rows[:MAX_REPORTED]]
+        if len(rows) > MAX_REPORTED:
+            lines.append(f"... and {len(rows) - MAX_REPORTED} more")
+        raise ValueError(f"{len(rows)} invalid rows:\n  "
+                         + "\n  ".join(lines))
+
+
+def grow_forest(pipeline, X, y, add_trees, max_trees=None):
+    """Add ``add_trees`` trees fitted on ``X`` / ``y`` to the pipeline's
+    forest, in place; keep at most the newest ``max_trees``.
+
+    Returns ``{"added", "dropped", "n_estimators", "rows", "fit_s"}``.
+    """
+    clf = pipeline.steps[-1][1]
+    if not hasattr(clf, "estimators_") or not hasattr(clf, "warm_start"):
+        raise TypeError(f"Cannot grow {type(clf).__name__}; only fitted "
+                        f"forests support incremental training")
+    # A warm-started fit recomputes classes_ from y, which would silently
+    # renumber the classes of every existing tree
+    missing = sorted(set(clf.classes_.tolist()) - set(np.unique(y).tolist()))
+    if missing:
+        raise ValueError(f"Incremental data has no rows of class(es) "
+                         f"{missing}; add recent history that does")
+
+    start = time.perf_counter()
+    Xt = pipeline[:-1].transform(X)
+    clf.set_params(warm_start=True,
+                   n_estimators=len(clf.estimators_) + add_trees)
+    clf.fit(Xt, y)
+    clf.set_params(warm_start=False)
+    dropped = 0
+    if max_trees and len(clf.estimators_) > max_trees:
+        dropped = len(clf.estimators_) - max_trees
+        clf.estimators_ = clf.estimators_[dropped:]
+        clf.set_params(n_estimators=max_trees)
+    return {
+        "added": add_trees,
+        "dropped": dropped,
+        "n_estimators": len(clf.estimators_),
+        "rows": len(X),
+        "fit_s": time.perf_counter() - start,
+    }
+
+
+def read_tail(path, n, chunk_rows=100_000):
+    """The last ``n`` rows of CSV ``path``, read in bounded memory."""
+    tail = None
+    for chunk in pd.read_csv(path, chunksize=chunk_rows):
+        tail = chunk if tail is None else pd.concat([tail, chunk]).tail(n)
+    return tail.tail(n).reset_index(drop=True)
+
+
+def load_recent(model_dir, fallback=None):
+    """The recent-rows buffer of the model in ``model_dir``.
+
+    Models saved before the buffer existed fall back to the tail of the
+    ``fallback`` CSV (which may include rows of their old test split).
+    """
+    path = os.path.join(model_dir, RECENT_FILE)
+    if os.path.exists(path):
+        return pd.read_csv(path)
+    if fallback is None:
+        raise FileNotFoundError(f"No {path}; retrain the model first")
+    return read_tail(fallback, RECENT_MAX_ROWS)
+
+
+def save_recent(rows, model_dir, max_rows=None):
+    """Keep the last ``max_rows`` (default ``RECENT_MAX_ROWS``) of
+    ``rows`` as the recent-rows buffer."""
+    path = os.path.join(model_dir, RECENT_FILE)
+    tmp = path + ".tmp"
+    rows.tail(max_rows or RECENT_MAX_ROWS).to_csv(tmp, index=False)
+    os.replace(tmp, path)
@@ -0,0 +1,211 @@
+# training/outofcore.py
+"""Out-of-core training data: stratified samples from sharded CSVs.
+
+The full dataset is never loaded.  Shards are read in ``chunk_rows``
+chunks with compact dtypes (pandas categories for categorical features,
+float32 for numeric ones), one shard per pool worker, in two passes:
+
+1. ``scan_shard`` counts rows per class and collects every category, so
+   all chunks share one ``CategoricalDtype`` per feature.
+2. ``sample_shard`` gives every row a seeded uniform key.  Keys below
+   ``test_size`` send the row to the test side.  On each side and for each
+   class, only the ``quota`` rows with the smallest keys are kept (a
+   bottom-k sample).  Bottom-k samples merge exactly, so the union of the
+   per-shard samples, cut back to the quotas, is a uniform stratified
+   sample of the whole dataset.
+
+Quotas are proportional to the class counts from the first pass.  Memory
+is bounded by one chunk plus the quotas per worker, whatever the dataset
+size.
+"""
+import glob
+import multiprocessing
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+KEY = "_key"
+
+
+def expand_shards(patterns):
+    """Sorted, de-duplicated files matching the glob ``patterns``."""
+    files = sorted({path for pattern in patterns
+                    for path in glob.glob(pattern)})
+    if not files:
+        raise FileNotFoundError(f"No CSV shards match {patterns}")
+    return files
+
+
+def infer_schema(path, target, sample_rows=1000):
+    """``(features, categorical, numerical)`` columns, as ``train.py``
+    infers them from the full file, from the head of one shard."""
+    head = pd.read_csv(path, nrows=sample_rows)
+    X = head.drop(columns=[target])
+    categorical = [c for c in X.columns
+                   if not pd.api.types.is_numeric_dtype(X[c])]
+    return (list(X.columns), categorical,
+            [c for c in X.columns if c not in categorical])
+
+
+def read_chunks(path, schema, chunk_rows, dtypes=None):
+    """Chunks of ``path`` with compact dtypes.
+
+    ``schema`` is ``(categorical, numerical, target)``.  Categorical
+    columns use ``dtypes[col]`` when given, so codes agree across chunks.
+    """
+    categorical, numerical, target = schema
+    read_dtypes = {col: "category" for col in categorical}
+    read_dtypes.update({col: "float32" for col in numerical})
+    for chunk in pd.read_csv(path, dtype=read_dtypes, chunksize=chunk_rows):
+        if dtypes:
+            for col in categorical:
+                chunk[col] = chunk[col].astype(dtypes[col])
+        chunk[target] = pd.to_numeric(chunk[target], downcast="integer")
+        yield chunk
+
+
+def scan_shard(task):
+    """Pass 1: ``{"rows", "classes": {label: n}, "categories"}``."""
+    path, schema, chunk_rows = task
+    categorical, _, target = schema
+    rows = 0
+    classes = {}
+    categories = {col: set() for col in categorical}
+    for chunk in read_chunks(path, schema, chunk_rows):
+        rows += len(chunk)
+        for label, n in chunk[target].value_counts().items():
+            classes[label] = classes.get(label, 0) + int(n)
+        for col in categorical:
+            categories[col].update(chunk[col].cat.categories)
+    return {"rows": rows, "classes": classes, "categories": categories}
+
+
+def merge_scans(scans):
+    total = {"rows": 0, "classes": {}, "categories": {}}
+    for scan in scans:
+        total["rows"] += scan["rows"]
+        for label, n in scan["classes"].items():
+            total["classes"][label] = total["classes"].get(label, 0) + n
+        for col, values in scan["categories"].items():
+            total["categories"].setdefault(col, set()).update(values)
+    return total
+
+
+def quotas(class_counts, sample_rows):
+    """Rows to keep per class, proportional to its share of the data."""
+    total = sum(class_counts.values())
+    if sample_rows >= total:
+        return dict(class_counts)
+    return {label: max(1, int(round(sample_rows * n / total)))
+            for label, n in class_counts.items()}
+
+
+def _keep_smallest(store, rows, quota):
+    """Merge ``rows`` into the bottom-``quota`` sample ``store``."""
+    if store is not None and len(store) >= quota:
+        # Only rows beating the current k-th key can enter
+        rows = rows[rows[KEY] < store[KEY].iloc[-1]]
+        if rows.empty:
+            return store
+    merged = rows if store is None else pd.concat([store, rows])
+    return merged.nsmallest(quota, KEY)
+
+
+def sample_shard(task):
+    """Pass 2: per-class bottom-k samples of one shard's train and test
+    rows, as ``{"train": {label: frame}, "test": {label: frame}}``."""
+    (shard_index, path, schema, chunk_rows, dtypes, train_quotas,
+     test_quotas, test_size, seed) = task
+    target = schema[2]
+    sample = {"train": {}, "test": {}}
+    for chunk_index, chunk in enumerate(read_chunks(path, schema,
+                                                    chunk_rows, dtypes)):
+        rng = np.random.default_rng([seed, shard_index, chunk_index])
+        u = rng.random(len(chunk))
+        is_test = u < test_size
+        # Rescale each side's keys back to [0, 1)
+        keys = np.where(is_test, u / max(test_size, 1e-12),
+                        (u - test_size) / (1.0 - test_size))
+        chunk[KEY] = keys
+        for side, mask, side_quotas in (("train", ~is_test, train_quotas),
+                                        ("test", is_test, test_quotas)):
+            part = chunk[mask]
+            for label, rows in part.groupby(target, observed=True):
+                quota = side_quotas.get(label, 0)
+                if quota:
+                    sample[side][label] = _keep_smallest(
+                        sample[side].get(label), rows, quota)
+    return sample
+
+
+def _pool(workers):
+    methods = multiprocessing.get_all_start_methods()
+    ctx = multiprocessing.get_context(
+        "fork" if "fork" in methods else None)
+    return ctx.Pool(workers)
+
+
+def stratified_sample(files, target, sample_rows, test_size=0.2,
+                      chunk_rows=100_000, workers=1, seed=42):
+    """Sample training and test frames from CSV ``files`` out of core.
+
+    Returns ``(train, test, info)``: compact DataFrames (without the key
+    column) and ``{"rows", "classes", "features", "categorical",
+    "numerical"}``.
+    """
+    features, categorical, numerical = infer_schema(files[0], target)
+    schema = (categorical, numerical, target)
+    with _pool(min(workers, len(files))) as pool:
+        scan = merge_scans(pool.imap_unordered(
+            scan_shard, [(path, schema, chunk_rows) for path in files]))
+        dtypes = {col: pd.CategoricalDtype(sorted(values))
+                  for col, values in scan["categories"].items()}
+        train_quotas = quotas(scan["classes"],
+                              int(sample_rows * (1 - test_size)))
+        test_quotas = quotas(scan["classes"], int(sample_rows * test_size))
+        tasks = [(i, path, schema, chunk_rows, dtypes, train_quotas,
+                  test_quotas, test_size, seed)
+                 for i, path in enumerate(files)]
+        merged = {"train": {}, "test": {}}
+        for sample in pool.imap_unordered(sample_shard, tasks):
+            for side, side_quotas in (("train", train_quotas),
+                                      ("test", test_quotas)):
+                for label, rows in sample[side].items():
+                    merged[side][label] = _keep_smallest(
+                        merged[side].get(label), rows, side_quotas[label])
+
+    def frame(side):
+        parts = [merged[side][label] for label in sorted(merged[side])]
+        if not parts:
+            return pd.DataFrame(columns=features + [target])
+        # Sorting by key interleaves the classes in random order
+        return (pd.concat(parts).sort_values(KEY).drop(columns=[KEY])
+                .reset_index(drop=True))
+
+    info = {"rows": scan["rows"], "classes": scan["classes"],
+            "features": features, "categorical": categorical,
+            "numerical": numerical}
+    return frame("train"), frame("test"), info
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process and of its largest child, in
+    MiB; ``(None, None)`` where ``resource`` is unavailable."""
+    if resource is None:
+        return None, None
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    unit = 1 if sys.platform == "darwin" else 1024
+    return tuple(
+        resource.getrusage(who).ru_maxrss * unit / (1 << 20)
+        for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN))
+
+
+def file_bytes(files):
+    return sum(os.path.getsize(path) for path in files)
@@ -0,0 +1,247 @@
+# training/selection.py
+"""Latency-aware model selection.
+
+Each candidate pipeline is fitted, written out as ``model.pkl`` and loaded
+back through ``app.loader.load_bundle``, so it is timed on exactly the path
+the API serves it with: the compiled encoder and, for forests, the compiled
+forest.  Per candidate this measures
+
+* single-row latency (p50 / p95 of ``encode`` + ``score`` on one record),
+* batch latency (median time per row over ``batch_rows`` records),
+* pickle size and validation accuracy.
+
+``pareto_front`` keeps the candidates no other candidate beats on both
+single-row p95 latency and accuracy, and ``select`` picks the most accurate
+candidate within a latency budget.
+
+The ``student`` candidates are small forests distilled from a large forest:
+they are fitted on a transfer set (the training rows plus rows resampled
+column by column) labelled with the teacher's class probabilities, each
+row entered once per class weighted by that probability.  The result is a
+plain ``RandomForestClassifier``, so it compiles and serves like any other
+forest.
+"""
+import json
+import os
+import statistics
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.ensemble import (HistGradientBoostingClassifier,
+                              RandomForestClassifier)
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score
+from sklearn.pipeline import Pipeline
+
+from app.loader import load_bundle
+
+# (kind, params); "student" entries are distilled from the teacher forest
+CANDIDATES = [
+    ("forest", {"n_estimators": 100, "max_depth": None}),
+    ("forest", {"n_estimators": 50, "max_depth": None}),
+    ("forest", {"n_estimators": 25, "max_depth": 10}),
+    ("forest", {"n_estimators": 10, "max_depth": 8}),
+    ("hist_gradient_boosting", {"max_iter": 100, "max_depth": None}),
+    ("hist_gradient_boosting", {"max_iter": 50, "max_depth": 3}),
+    ("logistic_regression", {"C": 1.0}),
+    ("logistic_regression", {"C": 0.1}),
+    ("student", {"n_estimators": 10, "max_depth": 6}),
+    ("student", {"n_estimators": 5, "max_depth": 4}),
+]
+TEACHER = ("forest", {"n_estimators": 100, "max_depth": None})
+
+
+def candidate_name(kind, params):
+    return kind + "(" + ", ".join(f"{k}={v}" for k, v in params.items()) \
+        + ")"
+
+
+def make_estimator(kind, params, random_state=42):
+    if kind in ("forest", "student"):
+        return RandomForestClassifier(random_state=random_state, **params)
+    if kind == "hist_gradient_boosting":
+        return HistGradientBoostingClassifier(random_state=random_state,
+                                              **params)
+    if kind == "logistic_regression":
+        return LogisticRegression(max_iter=1000, **params)
+    raise ValueError(f"Unknown candidate kind {kind!r}")
+
+
+def transfer_set(X, n_synthetic, random_state=42):
+    """``X`` plus ``n_synthetic`` rows whose columns are resampled
+    independently, covering combinations the training rows do not."""
+    rng = np.random.default_rng(random_state)
+    synthetic = pd.DataFrame({
+        col: X[col].to_numpy()[rng.integers(0, len(X), n_synthetic)]
+        for col in X.columns})
+    return pd.concat([X, synthetic], ignore_index=True)
+
+
+def distill(teacher, student, X_transfer):
+    """Fit pipeline ``student`` on ``teacher``'s probabilities.
+
+    Every transfer row appears once per class with that class's teacher
+    probability as its sample weight, so the student's leaves average the
+    teacher's soft labels instead of hard 0/1 targets.
+    """
+    proba = teacher.predict_proba(X_transfer)
+    classes = teacher.classes_
+    n = len(X_transfer)
+    X_soft = pd.concat([X_transfer] * len(classes), ignore_index=True)
+    y_soft = np.repeat(classes, n)
+    weight = proba.T.ravel()
+    keep = weight > 0
+    student.fit(X_soft[keep], y_soft[keep],
+                **{f"{student.steps[-1][0]}__sample_weight": weight[keep]})
+    return student
+
+
+def measure_latency(bundle, records, single_calls=300, batch_rows=1000,
+                    batch_repeat=5, warmup=20):
+    """Single-row and batch serving latency of a loaded ``ModelBundle``."""
+    def run(rows):
+        X = bundle.encode(rows)
+        bundle.score(np.asarray(X))
+
+    for record in records[:warmup]:
+        run([record])
+    single = []
+    for i in range(single_calls):
+        record = records[i % len(records)]
+        start = time.perf_counter()
+        run([record])
+        single.append(time.perf_counter() - start)
+    single.sort()
+
+    batch = [records[i % len(records)] for i in range(batch_rows)]
+    run(batch)
+    batch_times = []
+    for _ in range(batch_repeat):
+        start = time.perf_counter()
+        run(batch)
+        batch_times.append(time.perf_counter() - start)
+    return {
+        "single_p50_ms": single[len(single) // 2] * 1e3,
+        "single_p95_ms": single[int(0.95 * (len(single) - 1))] * 1e3,
+        "batch_us_per_row":
+            statistics.median(batch_times) / batch_rows * 1e6,
+    }
+
+
+def evaluate(pipeline, metadata, X_val, y_val, latency_options=None):
+    """Accuracy, pickle size and serving latency of a fitted pipeline."""
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = os.path.join(tmp, "model.pkl")
+        meta_path = os.path.join(tmp, "metadata.json")
+        joblib.dump(pipeline, model_path)
+        with open(meta_path, "w") as f:
+            json.dump(metadata, f)
+        bundle = load_bundle(model_path, meta_path, log=lambda *a: None)
+        size = os.path.getsize(model_path)
+    records = X_val.to_dict(orient="records")
+    result = {
+        "accuracy": float(accuracy_score(y_val, pipeline.predict(X_val))),
+        "size_bytes": size,
+        "compiled": bundle.forest is not None,
+    }
+    result.update(measure_latency(bundle, records,
+                                  **(latency_options or {})))
+    return result
+
+
+def fit_candidate(preprocessor, kind, params, X, y, n_synthetic=None,
+                  fitted=None):
+    """Pipeline of candidate ``(kind, params)`` fitted on ``X`` / ``y``.
+
+    Students are distilled from the ``TEACHER`` forest fitted on the same
+    rows, taken from ``fitted`` (name -> pipeline) when already there.
+    """
+    fitted = {} if fitted is None else fitted
+
+    def build(kind, params):
+        return Pipeline(steps=[("preprocessor", clone(preprocessor)),
+                               ("clf", make_estimator(kind, params))])
+
+    pipeline = build(kind, params)
+    if kind != "student":
+        return pipeline.fit(X, y)
+    key = candidate_name(*TEACHER)
+    if key not in fitted:
+        fitted[key] = build(*TEACHER).fit(X, y)
+    X_transfer = transfer_set(
+        X, n_synthetic if n_synthetic is not None else 4 * len(X))
+    return distill(fitted[key], pipeline, X_transfer)
+
+
+def run_candidates(preprocessor, metadata, X_fit, y_fit, X_val, y_val,
+                   candidates=CANDIDATES, n_synthetic=None,
+                   latency_options=None, log=print):
+    """Fit and measure every candidate.
+
+    Returns ``[{"name", "kind", "params", "pipeline", ...metrics}]``.
+    Students are distilled from the ``TEACHER`` forest, which is fitted
+    once whether or not it is itself a candidate.
+    """
+    fitted = {}
+    results = []
+    for kind, params in candidates:
+        name = candidate_name(kind, params)
+        start = time.perf_counter()
+        pipeline = fit_candidate(preprocessor, kind, params, X_fit, y_fit,
+                                 n_synthetic, fitted)
+        fitted[name] = pipeline
+        fit_s = time.perf_counter() - start
+        result = evaluate(pipeline, metadata, X_val, y_val, latency_options)
+        result.update(name=name, kind=kind, params=params,
+                      fit_s=fit_s, pipeline=pipeline)
+        results.append(result)
+        log(f"  {name}: accuracy {result['accuracy']:.4f}, single-row "
+            f"p95 {result['single_p95_ms']:.3f}ms, "
+            f"{result['size_bytes'] / 1024:.0f} KiB")
+    return results
+
+
+def pareto_front(results, latency="single_p95_ms"):
+    """Candidates not beaten on both ``latency`` and accuracy, fastest
+    first."""
+    front = []
+    best = -1.0
+    for r in sorted(results, key=lambda r: (r[latency], -r["accuracy"])):
+        if r["accuracy"] > best:
+            front.append(r)
+            best = r["accuracy"]
+    return front
+
+
+def select(results, budget_ms=None, latency="single_p95_ms"):
+    """Most accurate candidate with ``latency`` within ``budget_ms``
+    (faster wins ties); None if nothing fits."""
+    fits = [r for r in results if budget_ms is None
+            or r[latency] <= budget_ms]
+    if not fits:
+        return None
+    return max(fits, key=lambda r: (r["accuracy"], -r[latency]))
+
+
+def report(results, front, chosen):
+    """Printable table of ``results``; ``*`` marks the Pareto front."""
+    on_front = {id(r) for r in front}
+    lines = [f"  {'candidate':<52} {'acc':>6} {'p50 ms':>7} "
+             f"{'p95 ms':>7} {'us/row':>7} {'KiB':>7}"]
+    for r in sorted(results, key=lambda r: r["single_p95_ms"]):
+        mark = ">" if r is chosen else ("*" if id(r) in on_front else " ")
+        lines.append(f"{mark} {r['name']:<52} {r['accuracy']:6.4f} "
+                     f"{r['single_p50_ms']:7.3f} {r['single_p95_ms']:7.3f} "
+                     f"{r['batch_us_per_row']:7.2f} "
+                     f"{r['size_bytes'] / 1024:7.0f}")
+    return "\n".join(lines)
+
+
+def summary(results):
+    """JSON-serialisable metrics, without the fitted pipelines."""
+    return [{k: v for k, v in r.items() if k != "pipeline"}
+            for r in results]